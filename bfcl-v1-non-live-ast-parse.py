@@ -1,10 +1,15 @@
-from argparse import ArgumentParser
 import json
-import pandas as pd
-from datasets import Dataset
-from libs.utils import func_name_sanitizer
+from libs.arrow_rows import CanonicalRowBuilder
+from libs.parquet_shards import write_parquet_shards
+from libs.cli import converter_arg_parser
+from libs.profiling import StageProfiler
+from libs.quarantine import QuarantineSink
+from libs.watchdog import RowWatchdog
+from libs.partitions import Partition
+from libs.row_filters import FilterExpressionError, RowFilter
+from libs.tool_names import normalize_tool_names
 
-args_parser = ArgumentParser()
+args_parser = converter_arg_parser()
 args_parser.add_argument(
     "-i", "--input", help="Input file name", dest="input", required=True
 )
@@ -22,7 +27,6 @@ args_parser.add_argument(
     dest="debug",
     action="store_true",
 )
-args = args_parser.parse_args()
 
 
 def modify_data(data_list):
@@ -49,7 +53,7 @@ def modify_data(data_list):
                 {
                     "type": "function",
                     "function": {
-                        "name": func_name_sanitizer(key),
+                        "name": key,
                         "arguments": json.dumps(arguments, ensure_ascii=False),
                     },
                 }
@@ -78,8 +82,6 @@ def parse_function_calling_json(input_data, answer_data):
 
     function_defs = []
     for func in input_data["function"]:
-
-        func["name"] = func_name_sanitizer(func["name"])
         function_defs.append(
             {
                 "type": "function",
@@ -106,59 +108,157 @@ def parse_function_calling_json(input_data, answer_data):
     return parsed_data
 
 
-def process_jsonl_files(input_file_path, answer_file_path, output_file_path):
-    error_count = 0
-    parsed_list = []
-    try:
-        with open(input_file_path, "r", encoding="utf-8") as infile:
-            with open(answer_file_path, "r", encoding="utf-8") as ansfile:
-                for input_line, answer_line in zip(infile, ansfile):
-                    try:
-                        input_data = json.loads(input_line.strip())
-                        answer_data = json.loads(answer_line.strip())
-
-                        # if args.debug:
-                        #     print("Input Data:", input_data)
-                        #     print("Answer Data:", answer_data)
-
-                        parsed_data = parse_function_calling_json(
-                            input_data, answer_data
-                        )
-                        if args.debug:
-                            print("Parsed Data before DataFrame:", parsed_data)
-                        parsed_list.append(parsed_data)
-
-                    except Exception as e:
-                        error_count += 1
-                        if args.debug:
-                            print(f"Error during parsing JSON: {e}")
-
-    except FileNotFoundError:
-        print(f"Error: File not found at {input_file_path} or {output_file_path}")
-    except Exception as e:
-        print(f"An unexpected error occurred during file processing: {e}")
-
-    df = pd.DataFrame(parsed_list)
+def filter_table(input_file_path, columns):
+    """
+    Arrow table of the top-level columns a --filter reads, one row per input line.
+    Lines that are not JSON objects get nulls, so the filter drops them.
+    """
+    import pyarrow as pa
 
-    # for debugging
-    if args.debug:
-        print(df.iloc[0].to_json(indent=2))
+    values = {column: [] for column in columns}
+    names = set()
+    with open(input_file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                data = {}
+            names.update(data)
+            for column in columns:
+                values[column].append(data.get(column))
+    missing = sorted(set(columns) - names)
+    if missing:
+        raise FilterExpressionError(
+            f"Unknown column(s) {', '.join(missing)} "
+            f"(available: {', '.join(sorted(names))})"
+        )
+    # 읽는 컬럼만 Arrow 로 만든다. (다른 컬럼의 타입이 줄마다 달라도 영향을 받지 않는다)
+    arrays = {}
+    for column in columns:
+        try:
+            arrays[column] = pa.array(values[column])
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise FilterExpressionError(
+                f"Cannot read column '{column}' of {input_file_path} for --filter: {e}"
+            ) from None
+    return pa.table(arrays)
 
-    df["tools"] = df["tools"].apply(lambda x: json.dumps(x))
 
-    dataset = Dataset.from_pandas(df)
+def process_jsonl_files(
+    input_file_path,
+    answer_file_path,
+    output_name,
+    debug=False,
+    profiler=None,
+    partition=None,
+    row_filter=None,
+    watchdog=None,
+):
+    profiler = profiler or StageProfiler(output_name)
+    partition = partition or Partition(output_name)
+    watchdog = watchdog or RowWatchdog(output_name)
+    # partition 구간을 정하려면 전체 줄 수가 먼저 필요하다. (row index 는 전체 파일 기준)
+    partition.set_rows(sum(1 for _ in open(input_file_path, "r", encoding="utf-8")))
+    keep = None
+    if row_filter:
+        # filter 는 식이 읽는 input 컬럼만 Arrow 로 만들어 평가하고, 걸러진 줄은 파싱하지 않는다.
+        with profiler.stage("filter"):
+            keep = row_filter.mask(
+                filter_table(input_file_path, sorted(row_filter.columns))
+            )
+        print(
+            f"Filter kept {int(keep[partition.start : partition.end].sum())} of "
+            f"{partition.end - partition.start} rows"
+        )
+    error = QuarantineSink(output_name, partition.quarantine_dir)
+    parsed_list = CanonicalRowBuilder()
+    # input/answer 파일은 한 줄씩 스트리밍으로 읽으므로 load는 parse 단계에 포함된다.
+    with profiler.stage("parse") as stage:
+        try:
+            with open(input_file_path, "r", encoding="utf-8") as infile:
+                with open(answer_file_path, "r", encoding="utf-8") as ansfile:
+                    for idx, (input_line, answer_line) in enumerate(
+                        zip(infile, ansfile)
+                    ):
+                        if not partition.contains(idx):
+                            continue
+                        if keep is not None and not keep[idx]:
+                            continue
+                        row = {"input": input_line, "answer": answer_line}
+                        try:
+                            with watchdog.row(idx, row):
+                                input_data = json.loads(input_line.strip())
+                                answer_data = json.loads(answer_line.strip())
 
-    dataset.to_parquet(output_file_path)
+                                # if debug:
+                                #     print("Input Data:", input_data)
+                                #     print("Answer Data:", answer_data)
+
+                                parsed_data = normalize_tool_names(
+                                    parse_function_calling_json(input_data, answer_data)
+                                )
+                            if debug:
+                                print("Parsed Data before Arrow:", parsed_data)
+                            parsed_list.append(parsed_data)
+
+                        except Exception as e:
+                            error.add(idx, e, row)
+                            if debug:
+                                print(f"Error during parsing JSON: {e}")
+
+        except FileNotFoundError:
+            print(f"Error: File not found at {input_file_path} or {answer_file_path}")
+        except Exception as e:
+            print(f"An unexpected error occurred during file processing: {e}")
+        stage["rows"] = len(parsed_list) + len(error)
+    # JSON encoding done by the builder during the loop belongs to the serialize stage
+    profiler.move(
+        "parse", "serialize", parsed_list.serialize_wall_s, parsed_list.serialize_cpu_s
+    )
 
-    total_lines = sum(1 for _ in open(input_file_path, "r", encoding="utf-8"))
+    with profiler.stage("serialize", rows=len(parsed_list)):
+        table = parsed_list.to_table()
+
+    # for debugging
+    if debug:
+        print(json.dumps(table.slice(0, 1).to_pylist(), indent=2))
+
+    with profiler.stage("write", rows=table.num_rows):
+        write_parquet_shards(table, output_name, partition.output_dir)
+
+    total_lines = partition.end - partition.start
+    if keep is not None:
+        total_lines = int(keep[partition.start : partition.end].sum())
     print(
-        f"Total lines: {total_lines}, Success: {total_lines - error_count}, Error: {error_count}"
+        f"Total lines: {total_lines}, Success: {total_lines - len(error)}, Error: {len(error)}"
     )
-    print(f"Output parquet file saved to {output_file_path}")
+    watchdog.finish()
+    error.close()
+    partition.finish(errors=len(error))
 
 
-input_file = args.input
-answer_file = args.answer
-output_parquet_path = "./parsed/" + input_file.split(".")[0] + ".parquet"
+def main():
+    args = args_parser.parse_args()
+
+    input_file = args.input
+    answer_file = args.answer
+    output_name = input_file.split(".")[0]
+    profiler = StageProfiler(output_name, enabled=args.profile)
+
+    process_jsonl_files(
+        input_file,
+        answer_file,
+        output_name,
+        debug=args.debug,
+        profiler=profiler,
+        partition=Partition(output_name, args.shard),
+        row_filter=RowFilter(args.filters),
+        watchdog=RowWatchdog(output_name, args.row_timeout, args.slow_rows),
+    )
+    profiler.finish()
+
 
-process_jsonl_files(input_file, answer_file, output_parquet_path)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Checks the exclusion lists in ./exclusions against the current inputs (libs/exclusions.py).
+# Usage:
+#   python check-exclusions.py                                   # every source with an exclusion list
+#   python check-exclusions.py hermes-function-calling-v1       # the list shared by the hermes files
+#   python check-exclusions.py --hash dolphin-r1-korean-deepseek 1273   # sha256:<hash> lines for rows
+#   python check-exclusions.py --hash dolphin-r1-korean-deepseek 1273 --output-rows
+#       # rows given as output positions of the last full run (quarantined rows skipped)
+#
+# Exits with 1 if an entry no longer matches any row (stale).
+
+from argparse import ArgumentParser
+import glob
+import os
+import sys
+
+from libs.exclusions import EXCLUSIONS_DIR, ExclusionList, list_sources, row_sha256
+from libs.quarantine import QUARANTINE_DIR
+from libs.snapshots import load_source
+
+parser = ArgumentParser()
+parser.add_argument(
+    "sources",
+    help="Sources or upstream datasets to check (default: all with a list)",
+    nargs="*",
+)
+parser.add_argument(
+    "-d",
+    "--exclusions-dir",
+    help="Exclusions directory",
+    dest="exclusions_dir",
+    default=EXCLUSIONS_DIR,
+)
+parser.add_argument(
+    "--hash",
+    help="Print the content hash entries of input rows instead",
+    dest="hash_rows",
+    nargs=2,
+    metavar=("SOURCE", "ROWS"),
+)
+parser.add_argument(
+    "--output-rows",
+    help="With --hash, ROWS are output row positions of a full run without exclusions, "
+    "mapped to input rows by skipping the rows in its quarantine file",
+    dest="output_rows",
+    action="store_true",
+)
+parser.add_argument(
+    "-q",
+    "--quarantine-dir",
+    help="Quarantine directory of the full run (--output-rows)",
+    dest="quarantine_dir",
+    default=QUARANTINE_DIR,
+)
+
+
+def input_rows(source: str, num_rows: int, rows: list[int], quarantine_dir: str):
+    """
+    Input positions of output rows of a full run: the rows that were not quarantined.
+    """
+    import numpy as np
+    import pyarrow.parquet as pq
+
+    # 실패한 row 가 없으면 quarantine 파일이 남지 않는다.
+    path = os.path.join(quarantine_dir, f"{source}.parquet")
+    quarantined = []
+    if os.path.exists(path):
+        quarantined = pq.read_table(path, columns=["row_index"]).column("row_index")
+    kept = np.setdiff1d(np.arange(num_rows), np.asarray(quarantined, dtype=np.int64))
+    return [int(kept[row]) for row in rows]
+
+
+def main():
+    args = parser.parse_args()
+
+    if args.hash_rows:
+        source, rows = args.hash_rows
+        dataset = load_source(source)["train"]
+        rows = [int(row) for row in rows.split(",")]
+        if args.output_rows:
+            rows = input_rows(source, len(dataset), rows, args.quarantine_dir)
+        for row in rows:
+            print(f"sha256:{row_sha256(dataset[row])}  # row {row}")
+        return
+
+    names = args.sources or sorted(
+        os.path.splitext(os.path.basename(path))[0]
+        for path in glob.glob(os.path.join(args.exclusions_dir, "*.txt"))
+    )
+    stale = 0
+    for name in names:
+        exclusions = ExclusionList.load(name, args.exclusions_dir)
+        # 데이터셋 단위 목록은 모든 파일을 본 뒤에 stale 을 판단한다.
+        for source in list_sources(name):
+            excluded = exclusions.excluded_rows(load_source(source)["train"])
+            print(f"{source}: {len(exclusions)} entries, {len(excluded)} rows excluded")
+        for entry in exclusions.stale():
+            print(f"  stale: {entry}")
+            stale += 1
+    sys.exit(1 if stale else 0)
+
+
+if __name__ == "__main__":
+    main()
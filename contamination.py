@@ -0,0 +1,199 @@
+# Flags training rows that overlap with an evaluation set (BFCL) using a hashed n-gram index (libs/ngram_index.py).
+# Usage:
+#   python bfcl-v1-non-live-ast-parse.py -i BFCL_v3_simple.json -a BFCL_v3_simple_answer.json
+#   python contamination.py -e BFCL_v3_simple                                  # every other dataset in ./parsed
+#   python contamination.py -e BFCL_v3_simple -e BFCL_v3_multiple xlam-function-calling-60k toolace -t 0.3
+#
+# Writes ./contamination/index.npz (the evaluation n-grams), per dataset
+# ./contamination/<name>.drop-mask.parquet (row_index, drop, ngram_overlap, tool_overlap)
+# and summary.json. A row is dropped when the share of n-grams of one of its user messages
+# found in the index reaches --threshold and the share of its tool names that also appear in
+# the evaluation set reaches --tool-threshold (0 = tool names are not required).
+# Row groups are scored in worker processes, each holding the index and one row group.
+
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from libs.ngram_index import DEFAULT_NGRAM, NgramIndex, init_worker, score_row_group
+from libs.parquet_shards import list_manifests
+
+parser = ArgumentParser()
+parser.add_argument(
+    "names",
+    help="Training datasets to check (default: all in the input dir but the eval sets)",
+    nargs="*",
+)
+parser.add_argument(
+    "-e",
+    "--eval",
+    help="Parsed evaluation dataset to index (repeatable)",
+    dest="eval",
+    action="append",
+    required=True,
+)
+parser.add_argument(
+    "-i", "--input", help="Directory with manifests", dest="input", default="./parsed"
+)
+parser.add_argument(
+    "-o", "--output", help="Output directory", dest="output", default="./contamination"
+)
+parser.add_argument(
+    "-n",
+    "--ngram",
+    help="Words per n-gram",
+    dest="ngram",
+    type=int,
+    default=DEFAULT_NGRAM,
+)
+parser.add_argument(
+    "-t",
+    "--threshold",
+    help="Share of a user message's n-grams found in the eval set to flag the row",
+    dest="threshold",
+    type=float,
+    default=0.5,
+)
+parser.add_argument(
+    "--tool-threshold",
+    help="Share of the row's tool names found in the eval set also required to flag it",
+    dest="tool_threshold",
+    type=float,
+    default=0.0,
+)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    help="Worker processes",
+    dest="jobs",
+    type=int,
+    default=os.cpu_count() or 1,
+)
+
+
+def row_groups(input_dir: str, manifest: dict):
+    """
+    (path, row group, first row index) for every row group of a dataset.
+    """
+    offset = 0
+    for shard in manifest["shards"]:
+        path = os.path.join(input_dir, shard["file"])
+        metadata = pq.ParquetFile(path).metadata
+        for row_group in range(metadata.num_row_groups):
+            yield path, row_group, offset
+            offset += metadata.row_group(row_group).num_rows
+
+
+def eval_rows(input_dir: str, manifest: dict):
+    for shard in manifest["shards"]:
+        parquet_file = pq.ParquetFile(os.path.join(input_dir, shard["file"]))
+        for batch in parquet_file.iter_batches(columns=["messages", "tools"]):
+            yield from zip(
+                batch.column("messages").to_pylist(), batch.column("tools").to_pylist()
+            )
+
+
+def main():
+    from tqdm import tqdm
+
+    args = parser.parse_args()
+    manifests = {manifest["name"]: manifest for manifest in list_manifests(args.input)}
+    missing = [name for name in args.eval + args.names if name not in manifests]
+    if missing:
+        raise ValueError(f"No manifest in {args.input} for: {missing}")
+    names = args.names or sorted(set(manifests) - set(args.eval))
+
+    def all_eval_rows():
+        for name in args.eval:
+            yield from eval_rows(args.input, manifests[name])
+
+    index = NgramIndex.build(all_eval_rows(), args.ngram, args.eval)
+    index_path = os.path.join(args.output, "index.npz")
+    index.save(index_path)
+    print(
+        f"Indexed {len(index)} {args.ngram}-grams and {len(index.tool_names)} tool names "
+        f"from {', '.join(args.eval)} ({index.ngrams.nbytes / 1024:.0f} KiB)"
+    )
+
+    ngram_overlaps = {
+        name: np.zeros(manifests[name]["num_rows"], dtype=np.float32) for name in names
+    }
+    tool_overlaps = {
+        name: np.zeros(manifests[name]["num_rows"], dtype=np.float32) for name in names
+    }
+    errors = dict.fromkeys(names, 0)
+
+    with (
+        ProcessPoolExecutor(
+            max_workers=args.jobs, initializer=init_worker, initargs=(index_path,)
+        ) as executor,
+        tqdm(
+            total=sum(len(ngram_overlaps[name]) for name in names), desc="Scoring"
+        ) as progress,
+    ):
+
+        def collect(done):
+            for f in done:
+                name, offset, ngram_overlap, tool_overlap, row_errors = f.result()
+                end = offset + len(ngram_overlap)
+                ngram_overlaps[name][offset:end] = ngram_overlap
+                tool_overlaps[name][offset:end] = tool_overlap
+                errors[name] += row_errors
+                progress.update(len(ngram_overlap))
+
+        # 한 번에 jobs * 2 개의 row group 만 띄워서 메모리를 제한한다.
+        pending = set()
+        for name in names:
+            for path, row_group, offset in row_groups(args.input, manifests[name]):
+                if len(pending) >= args.jobs * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(
+                    executor.submit(score_row_group, (name, path, row_group, offset))
+                )
+        collect(wait(pending)[0])
+
+    summary = {
+        "eval": args.eval,
+        "ngram": args.ngram,
+        "threshold": args.threshold,
+        "tool_threshold": args.tool_threshold,
+        "datasets": {},
+    }
+    for name in names:
+        drop = (ngram_overlaps[name] >= args.threshold) & (
+            tool_overlaps[name] >= args.tool_threshold
+        )
+        pq.write_table(
+            pa.table(
+                {
+                    "row_index": pa.array(np.arange(len(drop), dtype=np.int64)),
+                    "drop": pa.array(drop),
+                    "ngram_overlap": pa.array(ngram_overlaps[name]),
+                    "tool_overlap": pa.array(tool_overlaps[name]),
+                }
+            ),
+            os.path.join(args.output, f"{name}.drop-mask.parquet"),
+        )
+        summary["datasets"][name] = {
+            "rows": len(drop),
+            "dropped": int(drop.sum()),
+            "errors": errors[name],
+        }
+        print(
+            f"{name}: {int(drop.sum())} of {len(drop)} rows flagged"
+            + (f", {errors[name]} rows could not be scored" if errors[name] else "")
+        )
+
+    with open(os.path.join(args.output, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Drop masks saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
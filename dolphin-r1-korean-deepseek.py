@@ -1,13 +1,22 @@
 # Original dataset: https://huggingface.co/datasets/cognitivecomputations/dolphin-r1/viewer/reasoning-deepseek/train
 # Translated Korean dataset: exp-models/dolphin-r1-korean-deepseek-toolcalls
-from jsondiff import diff
-
 import json, re, ast
-from datasets import Dataset, load_dataset
-import pandas as pd
 
 
 from libs.xlam_tool_definition_uitls import type2_tool_definition_conv
+from libs.arrow_rows import CanonicalRowBuilder
+from libs.schema_normalizer import TYPE1_PASSES, normalize_schema
+from libs.parquet_shards import write_parquet_shards
+from libs.cli import converter_arg_parser
+from libs.profiling import StageProfiler
+from libs.arrow_batches import iter_rows
+from libs.quarantine import QuarantineSink
+from libs.watchdog import RowWatchdog
+from libs.snapshots import load_source
+from libs.exclusions import ExclusionList
+from libs.row_filters import RowFilter
+from libs.partitions import Partition
+from libs.tool_names import normalize_tool_names
 
 
 import logging, os
@@ -59,47 +68,7 @@ def reasoning_parser(data):
     return reasoning_str.strip() if reasoning_str else None
 
 
-def update_array_type1_json_schema(schema):
-    """
-    Recursively updates a JSON schema dict for type1 tools:
-    - If a property is List[str], deduplicate the list and convert to str if only one element remains.
-    - If an array has 'prefixItems' and 'type' but no 'items', adds 'items': {}.
-    - If an array has neither 'prefixItems' nor 'items', adds 'items': {}.
-    """
-    if isinstance(schema, dict):
-        # First, handle List[str] value deduplication and conversion
-        for key, value in list(schema.items()):
-            # Check if value is a list of strings
-            if isinstance(value, list) and all(isinstance(v, str) for v in value):
-                # Deduplicate
-                deduped = list(dict.fromkeys(value))
-                if len(deduped) < len(value):
-                    schema[key] = deduped
-                # If only one element remains, convert to str
-                if len(deduped) == 1:
-                    schema[key] = deduped[0]
-            elif isinstance(value, dict):
-                update_array_type1_json_schema(value)
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, dict):
-                        update_array_type1_json_schema(item)
-
-        # Now handle array type schema
-        if (
-            schema.get("type") == "array"
-            or isinstance(schema.get("type"), list)
-            and "array" in schema["type"]
-        ):
-            has_prefix = "prefixItems" in schema
-            has_items = "items" in schema
-            # If prefixItems exists and items does not, add items: {}
-            if has_prefix and not has_items:
-                schema["items"] = {}
-            # If neither prefixItems nor items, add items: {}
-            elif not has_prefix and not has_items:
-                schema["items"] = {}
-    return schema
+INPUT_COLUMNS = ["messages"]
 
 
 def parse_function_calling_json(data):
@@ -129,8 +98,9 @@ def parse_function_calling_json(data):
                     # type 1 tool definition
 
                     # properties의 value 중에서 type이 array인데, items 필드가 없는 경우 items: {} 추가
-                    properties = update_array_type1_json_schema(
-                        tool["function"]["parameters"].get("properties", {})
+                    properties = normalize_schema(
+                        tool["function"]["parameters"].get("properties", {}),
+                        TYPE1_PASSES,
                     )
 
                     remaped_tool = {
@@ -148,13 +118,16 @@ def parse_function_calling_json(data):
                             },
                         },
                     }
-                    # tool과 remaped_tool의 diff를 출력
-                    diff_result = diff(tool, remaped_tool)
-                    if diff_result:
-                        logger.info(
-                            f"Tool remapping diff: {diff_result} for tool: {tool}"
-                        )
-                        # exit(0)
+                    # tool과 remaped_tool의 diff를 출력 (INFO 로그가 꺼져 있으면 jsondiff를 부르지 않음)
+                    if logger.isEnabledFor(logging.INFO):
+                        from jsondiff import diff
+
+                        diff_result = diff(tool, remaped_tool)
+                        if diff_result:
+                            logger.info(
+                                f"Tool remapping diff: {diff_result} for tool: {tool}"
+                            )
+                            # exit(0)
                     tools.append(remaped_tool)
                     continue
                 else:
@@ -220,69 +193,98 @@ def parse_function_calling_json(data):
     return parsed_data
 
 
-input_ds = load_dataset(
-    "exp-models/dolphin-r1-korean-deepseek-toolcalls",
-    data_files="data/*.parquet",
-)
-
-output = []
-error = []
-
-for idx, data in enumerate(input_ds["train"]):
-    # for dubugging
-    # if idx > 200:
-    #     continue
-    # if idx != 10:  # Limit to first 5 for brevity
-    #     continue
-
-    try:
-        parsed = parse_function_calling_json(data)
-        output.append(parsed)
-    except Exception as e:
-        error.append(data)
-        print(f"Idx: {idx}, Error: {e}")
-
-
-output_df = pd.DataFrame(output)
-
-# output_df에서 1273번 row drop
-if 1273 in output_df.index:
-    output_df = output_df.drop(index=1273)
+def remove_reasoning_content(table):
+    """
+    Sets messages.reasoning_content to null with Arrow arrays, without decoding rows.
+    """
+    import pyarrow as pa
+    from libs.arrow_rows import MESSAGE_TYPE
+
+    messages = table["messages"].combine_chunks()
+    fields = messages.values.flatten()
+    reasoning_idx = MESSAGE_TYPE.get_field_index("reasoning_content")
+    fields[reasoning_idx] = pa.nulls(len(messages.values), pa.string())
+    new_values = pa.StructArray.from_arrays(fields, fields=list(MESSAGE_TYPE))
+    new_messages = pa.ListArray.from_arrays(messages.offsets, new_values)
+    return table.set_column(
+        table.schema.get_field_index("messages"), "messages", new_messages
+    )
+
+
+def main():
+    args = converter_arg_parser().parse_args()
+    profiler = StageProfiler("dolphin-r1-korean-deepseek", enabled=args.profile)
+    partition = Partition("dolphin-r1-korean-deepseek", args.shard)
+    row_filter = RowFilter(args.filters)
+
+    with profiler.stage("load") as stage:
+        input_ds = load_source("dolphin-r1-korean-deepseek")
+        exclusions = ExclusionList.load("dolphin-r1-korean-deepseek")
+        input_ds["train"] = partition.select(
+            row_filter.apply(exclusions.apply(input_ds["train"]))
+        )
+        stage["rows"] = len(input_ds["train"])
+        source_rows = partition.source_rows(exclusions, row_filter)
+
+    output = CanonicalRowBuilder(ensure_ascii=False)
+    error = QuarantineSink("dolphin-r1-korean-deepseek", partition.quarantine_dir)
+    watchdog = RowWatchdog(
+        "dolphin-r1-korean-deepseek", args.row_timeout, args.slow_rows
+    )
+
+    with profiler.stage("parse", rows=len(input_ds["train"])):
+        for idx, data in enumerate(iter_rows(input_ds["train"], INPUT_COLUMNS)):
+            # for dubugging
+            # if idx > 200:
+            #     continue
+            # if idx != 10:  # Limit to first 5 for brevity
+            #     continue
+
+            try:
+                with watchdog.row(source_rows[idx], data):
+                    parsed = normalize_tool_names(parse_function_calling_json(data))
+            except Exception as e:
+                error.add(source_rows[idx], e, data)
+                continue
+            output.append(parsed)
+    # JSON encoding done by the builder during the loop belongs to the serialize stage
+    profiler.move(
+        "parse", "serialize", output.serialize_wall_s, output.serialize_cpu_s
+    )
+
+    with profiler.stage("serialize", rows=len(output)):
+        output_table = output.to_table()
+        # reasoning_content만 제거한 버전
+        non_reasoning_table = remove_reasoning_content(output_table)
+
+    with profiler.stage("write", rows=output_table.num_rows * 2):
+        # reasoning_content가 포함된 원본 저장
+        write_parquet_shards(
+            output_table, "dolphin-r1-korean-deepseek", partition.output_dir
+        )
+        # reasoning_content만 제거한 버전 저장
+        write_parquet_shards(
+            non_reasoning_table,
+            "dolphin-r1-korean-deepseek-non-reasoning",
+            partition.output_dir,
+        )
 
-# reasoning_content가 포함된 원본 저장
-output_df["tools"] = output_df["tools"].apply(
-    lambda x: json.dumps(x, ensure_ascii=False)
-)
-reasoning_ds = Dataset.from_pandas(output_df, preserve_index=False)
-output_rfile_path = "./parsed/dolphin-r1-korean-deepseek.parquet"
-reasoning_ds.to_parquet(output_rfile_path)
-
-
-# reasoning_content만 제거한 버전 생성 및 저장
-def remove_reasoning_content(messages):
-    new_msgs = []
-    for m in messages:
-        if (
-            isinstance(m, dict)
-            and m.get("role") == "assistant"
-            and "reasoning_content" in m
-        ):
-            m = m.copy()
-            m.pop("reasoning_content", None)
-        new_msgs.append(m)
-    return new_msgs
-
-
-non_reasoning_df = output_df.copy()
-non_reasoning_df["messages"] = non_reasoning_df["messages"].apply(
-    remove_reasoning_content
-)
-non_reasoning_ds = Dataset.from_pandas(non_reasoning_df)
-output_nrfile_path = "./parsed/dolphin-r1-korean-deepseek-non-reasoning.parquet"
-non_reasoning_ds.to_parquet(output_nrfile_path)
-
-INPUT_DATASET_LENGTH = len(input_ds["train"])
-OUTPUT_DATASET_LENGTH = len(output_df)
-print(
-    f"Total lines: {INPUT_DATASET_LENGTH}, Saved: {OUTPUT_DATASET_LENGTH}, Error: {INPUT_DATASET_LENGTH - OUTPUT_DATASET_LENGTH}"
-)
+    INPUT_DATASET_LENGTH = len(input_ds["train"])
+    OUTPUT_DATASET_LENGTH = output_table.num_rows
+    print(
+        f"Total lines: {INPUT_DATASET_LENGTH}, Saved: {OUTPUT_DATASET_LENGTH}, Error: {INPUT_DATASET_LENGTH - OUTPUT_DATASET_LENGTH}"
+    )
+    watchdog.finish()
+    error.close()
+    partition.finish(
+        [
+            "dolphin-r1-korean-deepseek",
+            "dolphin-r1-korean-deepseek-non-reasoning",
+        ],
+        errors=len(error),
+    )
+    profiler.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,58 @@
 import json
-from datasets import load_dataset
 import os
-from openai import OpenAI
-from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-client = OpenAI(
-    base_url="https://api.friendli.ai/serverless/v1",
-    api_key=os.environ.get("FRIENDLI_TOKEN"),
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
 )
+from libs.arrow_batches import iter_rows
+from libs.parquet_shards import shard_paths
+from libs.request_engine import classify_error
+from libs.telemetry import Telemetry
 
-ds = load_dataset("./parsed", data_files="*.parquet")
-print(ds)
+# 기본은 서버(max_tokens=1)로 확인하고, --template 을 주면 로컬 chat template 으로 렌더링만 해 본다.
+#   python format-validation.py --template ./llama-3.1/tokenizer_config.json
 
-error = []
+parser = ArgumentParser()
+parser.add_argument(
+    "-t",
+    "--template",
+    help="Render rows offline with a chat template (.jinja or tokenizer_config.json)",
+    dest="template",
+)
+parser.add_argument(
+    "--template-name",
+    help="Named template in tokenizer_config.json (default: tool_use, then default)",
+    dest="template_name",
+)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    help="Worker processes for offline rendering",
+    dest="jobs",
+    type=int,
+    default=os.cpu_count() or 1,
+)
+parser.add_argument(
+    "--chunk-size",
+    help="Rows sent to a worker at once",
+    dest="chunk_size",
+    type=int,
+    default=500,
+)
 
-total = len(ds["train"]["messages"])
+# 동시에 들고 있는 요청 수 상한 (전체 row를 한 번에 submit 하지 않음)
+max_workers = 16
+max_pending = max_workers * 4
 
 
-def process(idx, messages, tools):
+def process(client, telemetry, idx, messages, tools):
+    telemetry.request_started()
+    start = time.monotonic()
     try:
         completion = client.chat.completions.create(
             model="meta-llama-3.1-8b-instruct",
@@ -30,6 +64,13 @@ def process(idx, messages, tools):
             # max_completion_tokens=1,
         )
 
+        usage = completion.usage
+        telemetry.request_finished(
+            time.monotonic() - start,
+            usage.prompt_tokens if usage else None,
+            usage.completion_tokens if usage else None,
+        )
+
         print(completion.choices[0].message)
         return None
     except Exception as e:
@@ -37,9 +78,14 @@ def process(idx, messages, tools):
             "Could not finish the message because max_tokens or model output limit was reached."
             in str(e)
         ):
+            # max_tokens=1 이므로 예상된 에러 -> 성공으로 센다.
+            telemetry.request_finished(time.monotonic() - start)
             # print(f"Skipping idx {idx} due to max_tokens error.")
             return None
         else:
+            telemetry.request_finished(
+                time.monotonic() - start, error=classify_error(e) or type(e).__name__
+            )
 
             print(f"Index: {idx}")
             print("Messages:", messages)
@@ -49,19 +95,131 @@ def process(idx, messages, tools):
             return (idx, str(e))
 
 
-print("Starting parallel processing...")
-
-with ThreadPoolExecutor(max_workers=16) as executor:
-    futures = [
-        executor.submit(process, idx, messages, tools)
-        for idx, (messages, tools) in enumerate(
-            zip(ds["train"]["messages"], ds["train"]["tools"])
-        )
-    ]
-    for f in tqdm(as_completed(futures), total=total, desc="Processing"):
+def collect(done, progress, error):
+    for f in done:
         result = f.result()
         if result:
             error.append(result)
+    progress.update(len(done))
+
+
+def validate_remote(ds, error):
+    from openai import OpenAI
+    from tqdm import tqdm
+
+    client = OpenAI(
+        base_url="https://api.friendli.ai/serverless/v1",
+        api_key=os.environ.get("FRIENDLI_TOKEN"),
+    )
+    # 진행 중에 ./telemetry/format-validation.json / .prom 으로 처리량과 지연 시간을 기록한다.
+    telemetry = Telemetry("format-validation").start()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, tqdm(
+        total=ds.num_rows, desc="Processing"
+    ) as progress:
+        pending = set()
+        # messages / tools 컬럼만 batch 단위로 decode 해서 넘긴다.
+        for idx, row in enumerate(iter_rows(ds, ["messages", "tools"])):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done, progress, error)
+            pending.add(
+                executor.submit(
+                    process, client, telemetry, idx, row["messages"], row["tools"]
+                )
+            )
+
+        collect(wait(pending)[0], progress, error)
+
+    telemetry.close()
+
+
+def validate_template(ds, error, template_path, template_name, jobs, chunk_size):
+    from tqdm import tqdm
+    from libs.chat_template import (
+        compile_template,
+        init_worker,
+        load_chat_template,
+        render_rows,
+    )
+
+    source, special_tokens = load_chat_template(template_path, template_name)
+    # 템플릿 문법 오류는 worker 를 띄우기 전에 여기서 바로 드러나게 한다.
+    compile_template(source)
+
+    lengths = []
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=init_worker, initargs=(source, special_tokens)
+    ) as executor, tqdm(total=ds.num_rows, desc="Rendering") as progress:
+
+        def collect_rendered(done):
+            for f in done:
+                results = f.result()
+                for idx, length, e in results:
+                    if e is None:
+                        lengths.append(length)
+                    else:
+                        error.append((idx, e))
+                progress.update(len(results))
+
+        pending = set()
+        chunk = []
+        # worker 에는 row 하나씩이 아니라 chunk 단위로 넘겨 pickling 왕복을 줄인다.
+        for idx, row in enumerate(iter_rows(ds, ["messages", "tools"])):
+            chunk.append((idx, row["messages"], row["tools"]))
+            if len(chunk) < chunk_size:
+                continue
+            if len(pending) >= jobs * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect_rendered(done)
+            pending.add(executor.submit(render_rows, chunk))
+            chunk = []
+        if chunk:
+            pending.add(executor.submit(render_rows, chunk))
+        collect_rendered(wait(pending)[0])
+
+    if lengths:
+        lengths.sort()
+        n = len(lengths)
+        print(
+            f"Rendered length (chars): min {lengths[0]}, p50 {lengths[n // 2]}, "
+            f"p95 {lengths[min(n - 1, int(n * 0.95))]}, max {lengths[-1]}"
+        )
+    for message, count in Counter(e for _, e in error).most_common(10):
+        print(f"{count:>8}  {message[:200]}")
+
+
+def main():
+    args = parser.parse_args()
+    from datasets import load_dataset
+
+    # 매니페스트에 기록된 샤드만 읽는다. (에러 파일 등은 제외, 샤드별로 병렬 로딩)
+    data_files = shard_paths("./parsed")
+    ds = load_dataset(
+        "parquet",
+        data_files=data_files,
+        num_proc=max(1, min(len(data_files), os.cpu_count() or 1)),
+    )
+    print(ds)
+
+    error = []
+
+    print("Starting parallel processing...")
+    if args.template:
+        validate_template(
+            ds["train"],
+            error,
+            args.template,
+            args.template_name,
+            args.jobs,
+            args.chunk_size,
+        )
+    else:
+        validate_remote(ds["train"], error)
+
+    print(f"Total errors: {len(error)}")
+    print("Errors:", error)
+
 
-print(f"Total errors: {len(error)}")
-print("Errors:", error)
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
 import json, re, ast
-from datasets import Dataset, load_dataset
-import pandas as pd
+from libs.arrow_rows import CanonicalRowBuilder
+from libs.parquet_shards import write_parquet_shards
+from libs.cli import converter_arg_parser
+from libs.profiling import StageProfiler
+from libs.arrow_batches import iter_rows
+from libs.quarantine import QuarantineSink
+from libs.watchdog import RowWatchdog
+from libs.snapshots import load_source
+from libs.exclusions import ExclusionList
+from libs.row_filters import RowFilter
+from libs.partitions import Partition
+from libs.tool_names import normalize_tool_names
 
 
 def hermes_system_parser(data, tools_entry):
@@ -45,9 +55,6 @@ def parse_function_calling_json(data):
         "extra": {k: v for k, v in data.items() if k not in ["conversations", "tools"]},
     }
 
-    if "id" in data and data["id"] == "e39781a4-29a3-4896-83d2-0ab5d264b6ed":
-        raise Exception("Skip this data")
-
     for conversation in data["conversations"]:
         data_from, data_value = conversation["from"], conversation["value"]
 
@@ -125,41 +132,65 @@ target_files = [
     "glaive-function-calling-5k.json",
 ]
 
-for target_file in target_files:
-    input_ds = load_dataset(
-        "NousResearch/hermes-function-calling-v1",
-        data_files={
-            "train": [
-                target_file,
-            ]
-        },
-    )
-
-    output = []
-    error = []
-
-    for idx, data in enumerate(input_ds["train"]):
-        try:
-            output.append(parse_function_calling_json(data))
-        except Exception as e:
-            error.append(data)
-            print(f"Idx: {idx}, Error: {e}")
-
-    output_df = pd.DataFrame(output)
-
-    # for debugging
-    # print(output_df.iloc[0].to_json(indent=2))
-
-    # Since each tool has different properties, convert to string to meet the requirements of parquet.
-    output_df["tools"] = output_df["tools"].apply(lambda x: json.dumps(x))
-
-    dataset = Dataset.from_pandas(output_df)
-
-    output_file_path = f"./parsed/{target_file.split('.')[0]}.parquet"
-    dataset.to_parquet(output_file_path)
 
-    print(
-        f"Total lines: {
-            len(input_ds['train'])
-        }, Success: {len(output)}, Error: {len(error)}"
-    )
+def main():
+    args = converter_arg_parser().parse_args()
+    row_filter = RowFilter(args.filters)
+    # 세 파일이 목록 하나를 같이 쓰고, stale 여부는 모든 파일을 본 뒤에 판단한다.
+    exclusions = ExclusionList.load("hermes-function-calling-v1")
+    for target_file in target_files:
+        output_name = target_file.split(".")[0]
+        profiler = StageProfiler(output_name, enabled=args.profile)
+        partition = Partition(output_name, args.shard)
+
+        with profiler.stage("load") as stage:
+            input_ds = load_source(f"hermes-{output_name}")
+            input_ds["train"] = partition.select(
+                row_filter.apply(
+                    exclusions.apply(input_ds["train"], report_stale=False)
+                )
+            )
+            stage["rows"] = len(input_ds["train"])
+            source_rows = partition.source_rows(exclusions, row_filter)
+
+        output = CanonicalRowBuilder()
+        error = QuarantineSink(output_name, partition.quarantine_dir)
+        watchdog = RowWatchdog(output_name, args.row_timeout, args.slow_rows)
+
+        with profiler.stage("parse", rows=len(input_ds["train"])):
+            for idx, data in enumerate(iter_rows(input_ds["train"])):
+                try:
+                    with watchdog.row(source_rows[idx], data):
+                        parsed = normalize_tool_names(parse_function_calling_json(data))
+                    output.append(parsed)
+                except Exception as e:
+                    error.add(source_rows[idx], e, data)
+        # JSON encoding done by the builder during the loop belongs to the serialize stage
+        profiler.move(
+            "parse", "serialize", output.serialize_wall_s, output.serialize_cpu_s
+        )
+
+        # Since each tool has different properties, tools are stored as a JSON string (see libs/arrow_rows.py).
+        with profiler.stage("serialize", rows=len(output)):
+            output_table = output.to_table()
+
+        # for debugging
+        # print(output_table.slice(0, 1).to_pylist())
+
+        with profiler.stage("write", rows=output_table.num_rows):
+            write_parquet_shards(output_table, output_name, partition.output_dir)
+
+        print(
+            f"Total lines: {
+                len(input_ds['train'])
+            }, Success: {len(output)}, Error: {len(error)}"
+        )
+        watchdog.finish()
+        error.close()
+        partition.finish(errors=len(error))
+        profiler.finish()
+    exclusions.print_stale()
+
+
+if __name__ == "__main__":
+    main()
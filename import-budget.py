@@ -0,0 +1,163 @@
+# Import-time budget check for the libs and converter scripts.
+# Usage:
+#   python import-budget.py             # exit code 1 if any target is over budget or pulls in a heavy module
+#   python import-budget.py -r 10 -v    # more repeats, print the heavy modules that were imported
+#
+# Every measurement runs in a fresh interpreter, so module caches never hide a regression.
+
+from argparse import ArgumentParser
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+parser = ArgumentParser()
+parser.add_argument(
+    "-r",
+    "--repeat",
+    help="Fresh interpreter runs per target (the median is reported)",
+    dest="repeat",
+    type=int,
+    default=5,
+)
+parser.add_argument(
+    "-s",
+    "--scale",
+    help="Multiply every budget (e.g. 2 on slow machines)",
+    dest="scale",
+    type=float,
+    default=1.0,
+)
+parser.add_argument(
+    "-v",
+    "--verbose",
+    help="Print the heavy modules each target imported",
+    dest="verbose",
+    action="store_true",
+)
+
+# import만으로 불러오면 안 되는 무거운 의존성 (각각 실제로 필요한 코드 경로에서만 import)
+HEAVY_MODULES = (
+    "datasets",
+    "pandas",
+    "openai",
+    "pydantic",
+    "sympy",
+    "jsondiff",
+    "pyarrow",
+    "numpy",
+)
+
+LIB_MODULES = [
+    "libs.arrow_batches",
+    "libs.arrow_rows",
+    "libs.batch_files",
+    "libs.chat_template",
+    "libs.cli",
+    "libs.exclusions",
+    "libs.jsonl_index",
+    "libs.ngram_index",
+    "libs.parquet_profiles",
+    "libs.parquet_shards",
+    "libs.packing",
+    "libs.partitions",
+    "libs.profiling",
+    "libs.quarantine",
+    "libs.request_engine",
+    "libs.row_hashes",
+    "libs.row_filters",
+    "libs.schema_normalizer",
+    "libs.snapshots",
+    "libs.telemetry",
+    "libs.token_counts",
+    "libs.tool_catalog",
+    "libs.tool_names",
+    "libs.utils",
+    "libs.watchdog",
+    "libs.xlam_tool_definition_uitls",
+]
+
+CONVERTER_SCRIPTS = [
+    "apigen-mt-5k.py",
+    "bfcl-v1-non-live-ast-parse.py",
+    "dolphin-r1-korean-deepseek.py",
+    "hermes-parse.py",
+    "toolace-parse.py",
+    "xlam-irrelevance-parse.py",
+    "xlam-parse.py",
+]
+
+# 밀리초 단위 예산 (--help 는 인터프리터 시작 시간 포함)
+# 표준 라이브러리 import만으로도 수십 ms가 걸리므로, 무거운 의존성 하나만 끌려와도 넘는 수준으로 잡는다.
+IMPORT_BUDGET_MS = 100
+HELP_BUDGET_MS = 250
+
+MEASURE_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = sorted({{m.split(".")[0] for m in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure_import(statement: str) -> dict:
+    code = MEASURE_IMPORT.format(statement=statement, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_help(script: str) -> dict:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, script, "--help"], capture_output=True, check=True)
+    return {"ms": (time.perf_counter() - start) * 1000, "heavy": []}
+
+
+def targets():
+    for module in LIB_MODULES:
+        yield f"import {module}", IMPORT_BUDGET_MS, lambda m=module: measure_import(
+            f"import {m}"
+        )
+    for script in CONVERTER_SCRIPTS:
+        yield f"import {script}", IMPORT_BUDGET_MS, lambda s=script: measure_import(
+            f"from libs.utils import load_script; load_script({s!r})"
+        )
+    for script in CONVERTER_SCRIPTS:
+        yield f"{script} --help", HELP_BUDGET_MS, lambda s=script: measure_help(s)
+
+
+def main():
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'target':<48} {'median ms':>10} {'budget':>8}  status")
+    for label, budget, measure in targets():
+        runs = [measure() for _ in range(args.repeat)]
+        median = statistics.median(run["ms"] for run in runs)
+        heavy = sorted({module for run in runs for module in run["heavy"]})
+        budget = budget * args.scale
+
+        status = "ok"
+        if median > budget:
+            status = "OVER BUDGET"
+        if heavy:
+            status = "HEAVY IMPORT" if status == "ok" else f"{status}, HEAVY IMPORT"
+        if status != "ok":
+            failures += 1
+
+        print(f"{label:<48} {median:>10.1f} {budget:>8.0f}  {status}")
+        if heavy and (args.verbose or status != "ok"):
+            print(f"{'':<4}heavy modules: {', '.join(heavy)}")
+
+    if failures:
+        print(f"{failures} target(s) failed the import budget")
+        sys.exit(1)
+    print("All targets within the import budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Byte-offset index for the JSONL outputs (libs/jsonl_index.py).
+# Usage:
+#   python jsonl-index.py build                                  # every ./parsed/*.jsonl
+#   python jsonl-index.py build ./parsed/xlam-function-calling-60k.jsonl -k extra.id
+#   python jsonl-index.py get ./parsed/apigen-mt-5k.jsonl 1234
+#   python jsonl-index.py find ./parsed/xlam-function-calling-60k.jsonl 4711   # id (index built with -k)
+#   python jsonl-index.py find ./parsed/apigen-mt-5k.jsonl --hash 3fa2          # content hash prefix
+#   python jsonl-index.py sample ./parsed/apigen-mt-5k.jsonl -n 5 -s 0
+
+from argparse import ArgumentParser
+import glob
+import json
+import time
+
+from libs.jsonl_index import JsonlIndex, build_index
+
+parser = ArgumentParser()
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+build_parser = subparsers.add_parser("build", help="Build or refresh indexes")
+build_parser.add_argument(
+    "paths", help="JSONL files (default: ./parsed/*.jsonl)", nargs="*"
+)
+build_parser.add_argument(
+    "-k",
+    "--key",
+    help="Row field to index as id, dotted for nested/JSON fields (e.g. extra.id)",
+    dest="key",
+)
+
+get_parser = subparsers.add_parser("get", help="Print rows by number")
+get_parser.add_argument("path", help="JSONL file")
+get_parser.add_argument(
+    "rows", help="Row numbers (negative from the end)", nargs="+", type=int
+)
+
+find_parser = subparsers.add_parser(
+    "find", help="Print rows by id or content hash prefix"
+)
+find_parser.add_argument("path", help="JSONL file")
+find_parser.add_argument("value", help="Id, or content hash prefix with --hash")
+find_parser.add_argument(
+    "--hash",
+    help="Look up a content hash prefix instead of an id",
+    dest="by_hash",
+    action="store_true",
+)
+
+sample_parser = subparsers.add_parser("sample", help="Print random rows")
+sample_parser.add_argument("path", help="JSONL file")
+sample_parser.add_argument(
+    "-n", "--num", help="Number of rows", dest="num", type=int, default=5
+)
+sample_parser.add_argument("-s", "--seed", help="Random seed", dest="seed", type=int)
+
+for sub in (get_parser, find_parser, sample_parser):
+    sub.add_argument(
+        "--raw", help="Print the lines as stored", dest="raw", action="store_true"
+    )
+
+
+def print_rows(index: JsonlIndex, rows: list[int], raw: bool):
+    for row in rows:
+        print(f"# row {row} (hash {index.row_hash(row)})")
+        line = index.line(row)
+        if raw:
+            print(line.decode("utf-8"))
+        else:
+            print(json.dumps(json.loads(line), indent=2, ensure_ascii=False))
+
+
+def main():
+    args = parser.parse_args()
+
+    if args.command == "build":
+        paths = args.paths or sorted(glob.glob("./parsed/*.jsonl"))
+        for path in paths:
+            start = time.perf_counter()
+            output = build_index(path, args.key)
+            with JsonlIndex(path, build=False) as index:
+                rows = len(index)
+            print(f"{output}: {rows} rows in {time.perf_counter() - start:.2f}s")
+        return
+
+    with JsonlIndex(args.path) as index:
+        if args.command == "get":
+            print_rows(index, args.rows, args.raw)
+        elif args.command == "find":
+            try:
+                rows = index.find(args.value, args.by_hash)
+            except ValueError as e:
+                find_parser.error(str(e))
+            if not rows:
+                print(f"No row matches '{args.value}'")
+            print_rows(index, rows, args.raw)
+        elif args.command == "sample":
+            print_rows(index, index.sample(args.num, args.seed), args.raw)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import time
+from functools import cache
+
+# 모든 변환기가 공유하는 출력 row 스키마 (messages, tools, extra)
+#
+# - messages: OpenAI chat 형식 메시지. 소스마다 쓰는 필드가 달라도 스키마는 동일하고, 없는 필드는 null.
+# - tools: tool 정의 리스트의 JSON 문자열 (tool마다 properties가 달라 parquet 컬럼으로 고정할 수 없음)
+# - extra: 소스별 부가 정보(dict)의 JSON 문자열, 없으면 null
+#
+# pyarrow는 import 비용이 커서 TOOL_CALL_TYPE / MESSAGE_TYPE / CANONICAL_SCHEMA 에
+# 처음 접근할 때 불러온다. (모듈 __getattr__, 파서 단위 사용과 --help 는 pyarrow 없이 시작)
+MESSAGE_FIELDS = frozenset(
+    ["role", "content", "name", "tool_calls", "reasoning_content"]
+)
+
+
+@cache
+def _arrow_types() -> dict:
+    import pyarrow as pa
+
+    tool_call_type = pa.struct(
+        [
+            ("type", pa.string()),
+            (
+                "function",
+                pa.struct([("name", pa.string()), ("arguments", pa.string())]),
+            ),
+        ]
+    )
+    message_type = pa.struct(
+        [
+            ("role", pa.string()),
+            ("content", pa.string()),
+            ("name", pa.string()),
+            ("tool_calls", pa.list_(tool_call_type)),
+            ("reasoning_content", pa.string()),
+        ]
+    )
+    canonical_schema = pa.schema(
+        [
+            ("messages", pa.list_(message_type)),
+            ("tools", pa.string()),
+            ("extra", pa.string()),
+        ]
+    )
+    return {
+        "TOOL_CALL_TYPE": tool_call_type,
+        "MESSAGE_TYPE": message_type,
+        "CANONICAL_SCHEMA": canonical_schema,
+    }
+
+
+def __getattr__(name: str):
+    if name in ("TOOL_CALL_TYPE", "MESSAGE_TYPE", "CANONICAL_SCHEMA"):
+        return _arrow_types()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class CanonicalRowBuilder:
+    """
+    Builds a CANONICAL_SCHEMA table from parsed rows without going through pandas.
+
+    Rows are buffered as Python objects and converted into an Arrow record batch
+    every batch_size rows, so only one batch of dicts is alive at a time.
+    tools and extra are JSON-encoded on append.
+
+    The time spent encoding and converting is accumulated in serialize_wall_s /
+    serialize_cpu_s, so profilers can report it separately from parsing.
+    """
+
+    def __init__(self, batch_size: int = 10_000, ensure_ascii: bool = True):
+        self.batch_size = batch_size
+        self.ensure_ascii = ensure_ascii
+        self._batches = []
+        self._num_rows = 0
+        self.serialize_wall_s = 0.0
+        self.serialize_cpu_s = 0.0
+        self._reset_buffer()
+
+    def _reset_buffer(self):
+        self._messages = []
+        self._tools = []
+        self._extra = []
+
+    def __len__(self):
+        return self._num_rows
+
+    def append(self, row: dict):
+        for message in row["messages"]:
+            unknown = message.keys() - MESSAGE_FIELDS
+            if unknown:
+                # pyarrow는 스키마에 없는 키를 조용히 버리므로 여기서 막는다.
+                raise ValueError(f"Unknown message fields: {sorted(unknown)}")
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        self._messages.append(row["messages"])
+        self._tools.append(json.dumps(row["tools"], ensure_ascii=self.ensure_ascii))
+        self._extra.append(
+            json.dumps(row["extra"], ensure_ascii=self.ensure_ascii)
+            if row.get("extra") is not None
+            else None
+        )
+        self._num_rows += 1
+        self.serialize_wall_s += time.perf_counter() - wall_start
+        self.serialize_cpu_s += time.process_time() - cpu_start
+
+        if len(self._messages) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._messages:
+            return
+        import pyarrow as pa
+
+        schema = _arrow_types()["CANONICAL_SCHEMA"]
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        self._batches.append(
+            pa.record_batch(
+                [
+                    pa.array(self._messages, type=schema.field("messages").type),
+                    pa.array(self._tools, type=pa.string()),
+                    pa.array(self._extra, type=pa.string()),
+                ],
+                schema=schema,
+            )
+        )
+        self._reset_buffer()
+        self.serialize_wall_s += time.perf_counter() - wall_start
+        self.serialize_cpu_s += time.process_time() - cpu_start
+
+    def to_table(self) -> pa.Table:
+        import pyarrow as pa
+
+        self.flush()
+        return pa.Table.from_batches(
+            self._batches, schema=_arrow_types()["CANONICAL_SCHEMA"]
+        )
+
+
+def write_jsonl(table: pa.Table, path: str, batch_size: int = 10_000):
+    """
+    Writes an Arrow table as JSON lines, one batch of rows at a time.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for batch in table.to_batches(max_chunksize=batch_size):
+            for row in batch.to_pylist():
+                f.write(json.dumps(row))
+                f.write("\n")
+    print(f"Output saved to {path}")
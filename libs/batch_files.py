@@ -0,0 +1,132 @@
+import glob
+import json
+import os
+
+# OpenAI 호환 batch 입력/출력 JSONL 파일
+#
+# 입력: 한 줄에 요청 하나
+#   {"custom_id": "<input row index>", "method": "POST", "url": "/v1/chat/completions", "body": {...}}
+# 출력(결과 파일): 한 줄에 응답 하나, 순서는 보장되지 않는다.
+#   {"custom_id": "<input row index>", "response": {"status_code": 200, "body": {...}}, "error": null}
+#
+# 입력 파일은 요청 수 / 바이트 크기 상한을 넘기 전에 다음 파일로 넘어간다.
+
+# 파일 하나당 상한 (OpenAI batch 기준 50,000 요청 / 200MB)
+DEFAULT_MAX_REQUESTS = 50_000
+DEFAULT_MAX_BYTES = 190 * 1024 * 1024
+
+MANIFEST_NAME = "manifest.json"
+
+
+class BatchRequestError(RuntimeError):
+    pass
+
+
+def batch_request_line(
+    custom_id: str, body: dict, url: str = "/v1/chat/completions"
+) -> bytes:
+    line = {"custom_id": custom_id, "method": "POST", "url": url, "body": body}
+    return (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class BatchFileWriter:
+    """
+    Writes batch request lines into "requests-00000.jsonl", "requests-00001.jsonl", ...
+    in output_dir, starting a new file before one would exceed max_requests or max_bytes.
+    close() writes manifest.json with the request count and byte size of every file.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        metadata: dict | None = None,
+    ):
+        self.output_dir = output_dir
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.metadata = metadata or {}
+        self.files = []
+        self._file = None
+        self._requests = 0
+        self._bytes = 0
+
+        os.makedirs(output_dir, exist_ok=True)
+        # 이전 실행의 요청 파일이 남아 있으면 결과와 섞이므로 지운다.
+        for path in glob.glob(os.path.join(output_dir, "requests-*.jsonl")):
+            os.remove(path)
+
+    def _open(self):
+        name = f"requests-{len(self.files):05d}.jsonl"
+        self._file = open(os.path.join(self.output_dir, name), "wb")
+        self.files.append({"file": name, "requests": 0, "bytes": 0})
+        self._requests = 0
+        self._bytes = 0
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self.files[-1].update(requests=self._requests, bytes=self._bytes)
+
+    def write(self, custom_id: str, body: dict):
+        line = batch_request_line(custom_id, body)
+        if len(line) > self.max_bytes:
+            raise ValueError(
+                f"Batch request {custom_id} is larger than the file limit ({len(line)} bytes)"
+            )
+        if (
+            self._file is None
+            or self._requests >= self.max_requests
+            or self._bytes + len(line) > self.max_bytes
+        ):
+            self._close_file()
+            self._open()
+        self._file.write(line)
+        self._requests += 1
+        self._bytes += len(line)
+
+    def __len__(self):
+        return sum(f["requests"] for f in self.files[:-1]) + self._requests
+
+    def close(self) -> dict:
+        total = len(self)
+        self._close_file()
+        manifest = dict(self.metadata, requests=total, files=self.files)
+        with open(
+            os.path.join(self.output_dir, MANIFEST_NAME), "w", encoding="utf-8"
+        ) as f:
+            json.dump(manifest, f, indent=2)
+        print(
+            f"Wrote {total} batch requests to {self.output_dir} ({len(self.files)} files)"
+        )
+        return manifest
+
+
+def iter_batch_results(paths: list[str]):
+    """
+    Streams (custom_id, body, error) from batch result files, one line at a time.
+    body is the response body of a successful request; otherwise error is a
+    BatchRequestError describing the failure.
+    """
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get("response") or {}
+                status = response.get("status_code")
+                if result.get("error") or status != 200:
+                    detail = result.get("error") or (response.get("body") or {}).get(
+                        "error"
+                    )
+                    if isinstance(detail, dict):
+                        detail = detail.get("message") or json.dumps(detail)
+                    yield result["custom_id"], None, BatchRequestError(
+                        f"Batch request failed with status {status}: {detail}"
+                    )
+                    continue
+                yield result["custom_id"], response["body"], None
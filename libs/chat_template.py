@@ -0,0 +1,145 @@
+import json
+from datetime import datetime
+
+# 모델의 Jinja chat template 으로 messages / tools 를 로컬에서 렌더링해 본다.
+# (transformers 의 apply_chat_template 과 같은 sandbox 환경 / 전역 함수 / tojson 필터)
+#
+# 템플릿 파일은 .jinja 파일 그대로이거나, chat_template 키가 있는 tokenizer_config.json 이다.
+
+# 자주 쓰이는 special token 기본값 (템플릿이 bos_token 등을 참조할 때)
+DEFAULT_SPECIAL_TOKENS = {"bos_token": "<|begin_of_text|>", "eos_token": "<|eot_id|>"}
+
+
+class TemplateError(Exception):
+    pass
+
+
+def load_chat_template(path: str, name: str | None = None) -> tuple[str, dict]:
+    """
+    Returns (template source, special tokens) from a .jinja file or a tokenizer_config.json.
+    name selects one of several named templates (e.g. "tool_use") in a tokenizer config.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if not path.endswith(".json"):
+        return text, dict(DEFAULT_SPECIAL_TOKENS)
+
+    config = json.loads(text)
+    template = config.get("chat_template")
+    if isinstance(template, list):
+        templates = {t["name"]: t["template"] for t in template}
+        key = name or ("tool_use" if "tool_use" in templates else "default")
+        if key not in templates:
+            raise KeyError(f"No chat template named '{key}' in {path}")
+        template = templates[key]
+    if not template:
+        raise KeyError(f"No chat_template in {path}")
+
+    tokens = dict(DEFAULT_SPECIAL_TOKENS)
+    for key in ("bos_token", "eos_token", "pad_token", "unk_token"):
+        value = config.get(key)
+        if isinstance(value, dict):
+            value = value.get("content")
+        if value:
+            tokens[key] = value
+    return template, tokens
+
+
+def compile_template(source: str):
+    """
+    Compiles a chat template in an immutable sandbox, like transformers does.
+    """
+    try:
+        from jinja2.sandbox import ImmutableSandboxedEnvironment
+    except ImportError:
+        raise ImportError(
+            "Rendering chat templates needs jinja2 (uv sync --extra tokenizer)"
+        ) from None
+
+    def raise_exception(message):
+        raise TemplateError(message)
+
+    def tojson(
+        value, ensure_ascii=False, indent=None, separators=None, sort_keys=False
+    ):
+        return json.dumps(
+            value,
+            ensure_ascii=ensure_ascii,
+            indent=indent,
+            separators=separators,
+            sort_keys=sort_keys,
+        )
+
+    def strftime_now(format):
+        return datetime.now().strftime(format)
+
+    env = ImmutableSandboxedEnvironment(
+        trim_blocks=True, lstrip_blocks=True, extensions=["jinja2.ext.loopcontrols"]
+    )
+    env.filters["tojson"] = tojson
+    env.globals["raise_exception"] = raise_exception
+    env.globals["strftime_now"] = strftime_now
+    return env.from_string(source)
+
+
+def template_messages(messages: list) -> list:
+    """
+    Converts canonical messages to the shape chat templates expect: no null fields and
+    tool call arguments as objects instead of JSON strings.
+    """
+    converted = []
+    for message in messages:
+        message = {k: v for k, v in message.items() if v is not None}
+        if message.get("tool_calls"):
+            tool_calls = []
+            for tool_call in message["tool_calls"]:
+                function = dict(tool_call["function"])
+                if isinstance(function.get("arguments"), str):
+                    try:
+                        function["arguments"] = json.loads(function["arguments"])
+                    except json.JSONDecodeError:
+                        pass
+                tool_calls.append(dict(tool_call, function=function))
+            message["tool_calls"] = tool_calls
+        converted.append(message)
+    return converted
+
+
+def render(template, messages: list, tools: list | None, special_tokens: dict) -> str:
+    return template.render(
+        messages=template_messages(messages),
+        tools=tools or None,
+        add_generation_prompt=False,
+        **special_tokens,
+    )
+
+
+# ProcessPoolExecutor worker 쪽 상태 (initializer 에서 한 번만 컴파일)
+_worker_template = None
+_worker_special_tokens = None
+
+
+def init_worker(source: str, special_tokens: dict):
+    global _worker_template, _worker_special_tokens
+    _worker_template = compile_template(source)
+    _worker_special_tokens = special_tokens
+
+
+def render_rows(rows: list) -> list:
+    """
+    Renders [(idx, messages, tools JSON), ...] in a worker.
+    Returns [(idx, rendered length or None, error or None), ...].
+    """
+    results = []
+    for idx, messages, tools in rows:
+        try:
+            rendered = render(
+                _worker_template,
+                messages,
+                json.loads(tools) if tools else None,
+                _worker_special_tokens,
+            )
+            results.append((idx, len(rendered), None))
+        except Exception as e:
+            results.append((idx, None, f"{type(e).__name__}: {e}"))
+    return results
@@ -0,0 +1,75 @@
+from argparse import ArgumentParser, ArgumentTypeError
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """
+    Parses "i/N" (0 <= i < N) into (i, N).
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ArgumentTypeError(f"expected i/N, got '{value}'") from None
+    if not 0 <= index < count:
+        raise ArgumentTypeError(f"shard index must be in [0, {count}), got {index}")
+    return index, count
+
+
+def parse_filter(value: str) -> str:
+    """
+    Checks the syntax of a --filter expression, so a malformed one is a usage error
+    before any input is loaded. Column names are checked once the input is known.
+    """
+    from libs.row_filters import FilterExpressionError, RowFilter
+
+    try:
+        RowFilter([value])
+    except FilterExpressionError as e:
+        raise ArgumentTypeError(str(e)) from None
+    return value
+
+
+def converter_arg_parser(**kwargs) -> ArgumentParser:
+    """
+    ArgumentParser with the options every converter script shares.
+    Scripts add their own arguments on top of it.
+    """
+    parser = ArgumentParser(**kwargs)
+    parser.add_argument(
+        "--profile",
+        help="Save a JSON stage timing report and cProfile stats of the parse stage to ./profile",
+        dest="profile",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--shard",
+        help="Process only partition i of N (0-based, e.g. 0/4) into ./partitions; "
+        "combine the partitions with merge-partitions.py",
+        dest="shard",
+        type=parse_shard,
+    )
+    parser.add_argument(
+        "--filter",
+        help="Only convert rows matching an expression over the raw input columns, "
+        "evaluated in Arrow before parsing (e.g. 'len(conversations) > 3', "
+        "'count(answers, \"name\") >= 2'); repeat to combine with and. See libs/row_filters.py",
+        dest="filters",
+        action="append",
+        type=parse_filter,
+        metavar="EXPR",
+    )
+    parser.add_argument(
+        "--row-timeout",
+        help="Quarantine rows whose parsing takes longer than this many seconds",
+        dest="row_timeout",
+        type=float,
+        metavar="SECONDS",
+    )
+    parser.add_argument(
+        "--slow-rows",
+        help="Report the K slowest rows to ./profile/<name>.slow-rows.json",
+        dest="slow_rows",
+        type=int,
+        default=0,
+        metavar="K",
+    )
+    return parser
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import re
+
+# 소스별로 알려진 불량 row 제외 목록 (./exclusions/<source>.txt)
+#
+#   # 주석 (값 뒤에 붙여도 된다)
+#   id:e39781a4-29a3-4896-83d2-0ab5d264b6ed     id 컬럼 값
+#   sha256:<hex>                                 row 내용 hash (row_sha256)
+#   row:1024                                     입력 데이터셋에서의 위치 (lockfile 로 revision 이 고정된 경우만)
+#
+# 파싱 전에 Arrow 입력에서 제외할 row 를 찾아 Dataset 에서 빼므로, 제외된 row 는 Python 으로
+# decode 되지 않는다. id 는 pyarrow is_in 으로 batch 단위로 비교하고, sha256 항목이 있을 때만
+# row 를 decode 해서 hash 를 계산한다.
+#
+# 같은 upstream 데이터셋의 파일 여러 개(hermes-*)는 데이터셋 이름의 목록 하나
+# (./exclusions/hermes-function-calling-v1.txt)를 같이 쓰고, 어느 파일에도 없는 항목만 stale 이다.
+# apply() 뒤의 kept 는 남은 row 의 원래 위치라서 quarantine / watchdog 의 row index 를 되돌리는 데 쓴다.
+
+EXCLUSIONS_DIR = "./exclusions"
+
+KEY_TYPES = ("id", "sha256", "row")
+
+
+def exclusion_path(source: str, directory: str = EXCLUSIONS_DIR) -> str:
+    return os.path.join(directory, f"{source}.txt")
+
+
+def list_sources(name: str) -> list[str]:
+    """
+    Sources an exclusion list applies to: the source itself, or every source loaded
+    from the upstream dataset of that name (e.g. hermes-function-calling-v1).
+    """
+    from libs.snapshots import SOURCES
+
+    if name in SOURCES:
+        return [name]
+    return sorted(
+        key for key, source in SOURCES.items() if source["path"].split("/")[-1] == name
+    )
+
+
+def row_sha256(row: dict) -> str:
+    """
+    Content hash of an input row: sha256 of its canonical JSON (sorted keys, no spaces).
+    """
+    encoded = json.dumps(
+        row, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ExclusionList:
+    def __init__(
+        self, source: str, entries: dict | None = None, path: str | None = None
+    ):
+        self.source = source
+        self.path = path
+        self.entries = entries or {key_type: set() for key_type in KEY_TYPES}
+        self.matched = {key_type: set() for key_type in KEY_TYPES}
+        # 마지막 apply() 에서 남은 row 의 입력 위치 (제외된 row 가 없으면 None)
+        self.kept = None
+
+    @classmethod
+    def load(cls, source: str, directory: str = EXCLUSIONS_DIR) -> "ExclusionList":
+        """
+        Reads exclusions/<source>.txt. A missing file is an empty list.
+        """
+        path = exclusion_path(source, directory)
+        entries = {key_type: set() for key_type in KEY_TYPES}
+        if not os.path.exists(path):
+            return cls(source, entries)
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                # check-exclusions.py --hash 출력처럼 값 뒤에 " # 주석" 이 붙을 수 있다.
+                line = re.split(r"\s+#", line.strip(), maxsplit=1)[0]
+                if not line or line.startswith("#"):
+                    continue
+                key_type, _, value = line.partition(":")
+                value = value.strip()
+                if key_type not in KEY_TYPES or not value:
+                    raise ValueError(
+                        f"{path}:{line_number}: expected one of "
+                        f"{', '.join(t + ':<value>' for t in KEY_TYPES)}, got '{line}'"
+                    )
+                if key_type == "row":
+                    value = int(value)
+                elif key_type == "sha256":
+                    value = value.lower()
+                entries[key_type].add(value)
+        return cls(source, entries, path)
+
+    def __len__(self):
+        return sum(len(values) for values in self.entries.values())
+
+    def excluded_rows(self, dataset, id_column: str = "id") -> list[int]:
+        """
+        Positions of the rows of dataset that match an entry. Matched entries are recorded
+        for stale().
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        from libs.arrow_batches import iter_batches
+
+        ids = self.entries["id"]
+        hashes = self.entries["sha256"]
+        has_id_column = id_column in dataset.column_names
+        if ids and not has_id_column:
+            raise ValueError(
+                f"{self.path} has id entries, but {self.source} has no '{id_column}' column"
+            )
+
+        excluded = [
+            position for position in self.entries["row"] if 0 <= position < len(dataset)
+        ]
+        self.matched["row"].update(excluded)
+
+        # hash 항목이 없으면 id 컬럼만 읽는다.
+        if hashes:
+            columns = None
+        elif ids:
+            columns = [id_column]
+        else:
+            return sorted(excluded)
+
+        value_set = pa.array(sorted(ids), type=pa.string()) if ids else None
+        offset = 0
+        for batch in iter_batches(dataset, columns):
+            if value_set is not None:
+                column = batch.column(id_column)
+                if column.type != pa.string():
+                    column = pc.cast(column, pa.string())
+                mask = pc.fill_null(pc.is_in(column, value_set=value_set), False)
+                positions = np.flatnonzero(mask.to_numpy(zero_copy_only=False))
+                if len(positions):
+                    excluded.extend((positions + offset).tolist())
+                    self.matched["id"].update(pc.filter(column, mask).to_pylist())
+            if hashes:
+                names = batch.schema.names
+                values = [batch.column(name).to_pylist() for name in names]
+                for position, row in enumerate(zip(*values)):
+                    digest = row_sha256(dict(zip(names, row)))
+                    if digest in hashes:
+                        excluded.append(offset + position)
+                        self.matched["sha256"].add(digest)
+            offset += batch.num_rows
+        return sorted(set(excluded))
+
+    def apply(self, dataset, id_column: str = "id", report_stale: bool = True):
+        """
+        Returns dataset without the excluded rows and prints what was excluded.
+        The input positions of the remaining rows are kept in self.kept.
+        """
+        self.kept = None
+        if not len(self):
+            return dataset
+        excluded = self.excluded_rows(dataset, id_column)
+        print(f"Excluded {len(excluded)} rows of {self.source} ({self.path})")
+        if report_stale:
+            self.print_stale()
+        if not excluded:
+            return dataset
+
+        import numpy as np
+
+        keep = np.ones(len(dataset), dtype=bool)
+        keep[excluded] = False
+        self.kept = np.flatnonzero(keep)
+        # 남은 row 의 index mapping 만 만들고 데이터는 복사하지 않는다.
+        return dataset.select(self.kept)
+
+    def print_stale(self):
+        for entry in self.stale():
+            print(f"  stale exclusion (matches no row): {entry}")
+
+    def stale(self) -> list[str]:
+        """
+        Entries that did not match any row in the last excluded_rows() call.
+        """
+        return [
+            f"{key_type}:{value}"
+            for key_type in KEY_TYPES
+            for value in sorted(self.entries[key_type] - self.matched[key_type])
+        ]
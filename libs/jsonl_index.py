@@ -0,0 +1,231 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+
+# JSONL 출력의 byte offset 인덱스
+#
+# <file>.jsonl 옆에 <file>.jsonl.idx.npz 를 만든다.
+# - offsets: 각 줄의 시작 위치 (마지막 원소는 파일 끝) -> row i 는 offsets[i]:offsets[i+1]
+# - hashes: 줄 내용의 blake2b 64bit hash (정렬된 순서도 같이 저장해서 prefix 검색)
+# - keys: row 에서 꺼낸 id (선택, 정렬해서 저장)
+# 조회는 파일을 mmap 해서 해당 구간만 읽으므로 파일 크기와 상관없이 row 하나에 수 µs 이다.
+
+INDEX_SUFFIX = ".idx.npz"
+
+# newline 을 찾을 때 한 번에 numpy 로 보는 크기
+SCAN_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def index_path(path: str) -> str:
+    return f"{path}{INDEX_SUFFIX}"
+
+
+def line_hash(line: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(line, digest_size=8).digest(), "big")
+
+
+def extract_key(row: dict, field: str):
+    """
+    Reads a dotted field from a row. JSON-encoded string values on the way
+    (e.g. the "extra" column) are decoded, so "extra.id" works on canonical rows.
+    """
+    value = row
+    for part in field.split("."):
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                return None
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return None if value is None else str(value)
+
+
+def line_offsets(buffer, chunk_size: int = SCAN_CHUNK_BYTES):
+    import numpy as np
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    parts = [np.zeros(1, dtype=np.uint64)]
+    for start in range(0, len(data), chunk_size):
+        newlines = np.flatnonzero(data[start : start + chunk_size] == ord("\n"))
+        parts.append((newlines + start + 1).astype(np.uint64))
+    offsets = np.concatenate(parts)
+    if offsets[-1] != len(data):
+        # 마지막 줄에 newline 이 없는 경우
+        offsets = np.append(offsets, np.uint64(len(data)))
+    return offsets
+
+
+def build_index(path: str, key_field: str | None = None) -> str:
+    """
+    Scans a JSONL file once and writes its index. Returns the index path.
+    """
+    import numpy as np
+
+    size = os.path.getsize(path)
+    offsets = np.zeros(1, dtype=np.uint64)
+    hashes, keys, key_rows = [], [], []
+    if size:
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            offsets = line_offsets(mm)
+            bounds = offsets.tolist()
+            # 줄을 한 번에 하나씩만 꺼내므로 파일 크기만큼 메모리를 쓰지 않는다.
+            for i in range(len(bounds) - 1):
+                line = mm[bounds[i] : bounds[i + 1]].rstrip(b"\r\n")
+                hashes.append(line_hash(line))
+                if key_field and line.strip():
+                    key = extract_key(json.loads(line), key_field)
+                    if key is not None:
+                        keys.append(key)
+                        key_rows.append(i)
+
+    hashes = np.array(hashes, dtype=np.uint64)
+    arrays = {
+        "offsets": offsets,
+        "hashes": hashes,
+        "hash_order": np.argsort(hashes, kind="stable"),
+        "meta": np.array(
+            [json.dumps({"size": size, "mtime_ns": os.stat(path).st_mtime_ns})]
+        ),
+    }
+    if key_field:
+        keys = np.array(keys, dtype=str)
+        order = np.argsort(keys, kind="stable")
+        arrays["keys"] = keys[order]
+        arrays["key_rows"] = np.array(key_rows, dtype=np.int64)[order]
+        arrays["key_field"] = np.array([key_field])
+
+    output = index_path(path)
+    tmp_output = f"{output}.tmp.npz"
+    np.savez(tmp_output, **arrays)
+    os.replace(tmp_output, output)
+    return output
+
+
+class JsonlIndex:
+    """
+    Random access to the rows of an indexed JSONL file.
+
+        index = JsonlIndex("./parsed/apigen-mt-5k.jsonl")
+        index.row(1234)
+        index.find("some-id")
+    """
+
+    def __init__(self, path: str, build: bool = True, key_field: str | None = None):
+        import numpy as np
+
+        self.path = path
+        if build and (not os.path.exists(index_path(path)) or self._stale()):
+            if key_field is None and os.path.exists(index_path(path)):
+                # 다시 만들 때는 이전 인덱스의 key field 를 이어서 쓴다.
+                with np.load(index_path(path)) as data:
+                    if "key_field" in data:
+                        key_field = str(data["key_field"][0])
+            build_index(path, key_field)
+
+        with np.load(index_path(path)) as data:
+            self.offsets = data["offsets"]
+            self.hashes = data["hashes"]
+            self.hash_order = data["hash_order"]
+            self.keys = data["keys"] if "keys" in data else None
+            self.key_rows = data["key_rows"] if "key_rows" in data else None
+            self.key_field = str(data["key_field"][0]) if "key_field" in data else None
+        if self._stale():
+            raise ValueError(f"Index of {path} is out of date, rebuild it")
+
+        self._file = open(path, "rb")
+        size = os.path.getsize(path)
+        self._mm = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        )
+        # numpy 스칼라 인덱싱보다 list 가 빠르다.
+        self._bounds = self.offsets.tolist()
+        self._sorted_hashes = self.hashes[self.hash_order]
+
+    def _stale(self) -> bool:
+        import numpy as np
+
+        with np.load(index_path(self.path)) as data:
+            meta = json.loads(str(data["meta"][0]))
+        stat = os.stat(self.path)
+        return meta["size"] != stat.st_size or meta["mtime_ns"] != stat.st_mtime_ns
+
+    def __len__(self):
+        return len(self._bounds) - 1
+
+    def line(self, row: int) -> bytes:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"Row {row} out of range ({len(self)} rows)")
+        return self._mm[self._bounds[row] : self._bounds[row + 1]].rstrip(b"\r\n")
+
+    def row(self, row: int) -> dict:
+        return json.loads(self.line(row))
+
+    def row_hash(self, row: int) -> str:
+        return f"{int(self.hashes[row]):016x}"
+
+    def find_hash(self, prefix: str) -> list[int]:
+        """
+        Rows whose content hash (16 hex digits) starts with prefix.
+        """
+        import numpy as np
+
+        prefix = prefix.lower()
+        # hex 가 아닌 값은 어떤 hash 의 prefix 도 아니다.
+        if not re.fullmatch("[0-9a-f]{1,16}", prefix):
+            return []
+        low = np.uint64(int(prefix.ljust(16, "0"), 16))
+        high = np.uint64(int(prefix.ljust(16, "f"), 16))
+        start = np.searchsorted(self._sorted_hashes, low, side="left")
+        end = np.searchsorted(self._sorted_hashes, high, side="right")
+        return sorted(self.hash_order[start:end].tolist())
+
+    def find_key(self, key: str) -> list[int]:
+        import numpy as np
+
+        if self.keys is None:
+            return []
+        start = np.searchsorted(self.keys, key, side="left")
+        end = np.searchsorted(self.keys, key, side="right")
+        return sorted(self.key_rows[start:end].tolist())
+
+    def find(self, value: str, by_hash: bool = False) -> list[int]:
+        """
+        Rows whose id is value, or with by_hash rows whose content hash starts with value.
+        An id that is not found never falls back to hash prefixes.
+        """
+        if by_hash:
+            return self.find_hash(value)
+        if self.keys is None:
+            raise ValueError(
+                f"{index_path(self.path)} has no ids (build it with -k <field>, "
+                f"or look up a content hash prefix with --hash)"
+            )
+        return self.find_key(value)
+
+    def sample(self, n: int, seed: int | None = None) -> list[int]:
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        return sorted(
+            rng.choice(len(self), size=min(n, len(self)), replace=False).tolist()
+        )
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
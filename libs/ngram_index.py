@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+# 평가셋(BFCL) 오염 검사용 hashed n-gram index
+#
+# - 평가셋 user 질문을 소문자 단어로 나누고, 연속한 n 단어마다 64bit hash 하나를 만든다.
+#   (단어가 n 개보다 적은 질문은 질문 전체를 n-gram 하나로 본다)
+# - index 는 정렬된 uint64 numpy 배열 하나(+ tool 이름 hash 배열)라 n-gram 하나에 8byte 이고,
+#   학습 row 의 n-gram 은 searchsorted 로 한 번에 찾는다. 평가 row 와 학습 row 를 짝지어 비교하지 않는다.
+# - row 의 ngram_overlap 은 user 메시지마다 index 에 있는 n-gram 비율을 구한 뒤 가장 큰 값,
+#   tool_overlap 은 row 의 tool 이름 중 평가셋에도 있는 이름의 비율이다.
+
+DEFAULT_NGRAM = 8
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1 << 20)
+def _word_hash(word: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+def ngram_hashes(text: str, n: int = DEFAULT_NGRAM):
+    """
+    uint64 hashes of the word n-grams of text (one hash for the whole text if it is
+    shorter than n words).
+    """
+    import numpy as np
+
+    from libs.row_hashes import POLY_BASE, mix
+
+    tokens = np.fromiter(
+        (_word_hash(word) for word in words(text or "")), dtype=np.uint64
+    )
+    if not len(tokens):
+        return tokens
+    width = min(n, len(tokens))
+    count = len(tokens) - width + 1
+    hashes = np.full(count, width, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for i in range(width):
+            hashes = mix(hashes * np.uint64(POLY_BASE) + tokens[i : i + count])
+    return hashes
+
+
+def tool_name_hashes(tools):
+    """
+    uint64 hashes of the lowercased tool names in a tools list or its JSON string.
+    """
+    import numpy as np
+
+    if isinstance(tools, str):
+        tools = json.loads(tools) if tools else []
+    names = set()
+    for tool in tools or []:
+        function = tool.get("function", tool) if isinstance(tool, dict) else None
+        if isinstance(function, dict) and function.get("name"):
+            names.add(str(function["name"]).lower())
+    return np.array([_word_hash(name) for name in sorted(names)], dtype=np.uint64)
+
+
+def user_texts(messages) -> list[str]:
+    return [
+        message.get("content") or ""
+        for message in messages or []
+        if message.get("role") == "user"
+    ]
+
+
+def _sorted_contains(sorted_hashes, hashes):
+    import numpy as np
+
+    if not len(sorted_hashes) or not len(hashes):
+        return np.zeros(len(hashes), dtype=bool)
+    positions = np.searchsorted(sorted_hashes, hashes)
+    positions = np.minimum(positions, len(sorted_hashes) - 1)
+    return sorted_hashes[positions] == hashes
+
+
+class NgramIndex:
+    """
+    Sorted uint64 n-gram and tool name hashes of an evaluation set.
+    """
+
+    def __init__(self, ngrams, tool_names, n: int = DEFAULT_NGRAM, sources=()):
+        self.ngrams = ngrams
+        self.tool_names = tool_names
+        self.n = n
+        self.sources = list(sources)
+
+    def __len__(self):
+        return len(self.ngrams)
+
+    @classmethod
+    def build(cls, rows, n: int = DEFAULT_NGRAM, sources=()):
+        """
+        Builds the index from (messages, tools) pairs; only user messages are indexed.
+        """
+        import numpy as np
+
+        ngrams, tool_names = [], []
+        for messages, tools in rows:
+            for text in user_texts(messages):
+                ngrams.append(ngram_hashes(text, n))
+            tool_names.append(tool_name_hashes(tools))
+        empty = np.zeros(0, dtype=np.uint64)
+        return cls(
+            np.unique(np.concatenate(ngrams or [empty])),
+            np.unique(np.concatenate(tool_names or [empty])),
+            n,
+            sources,
+        )
+
+    def save(self, path: str):
+        import numpy as np
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            ngrams=self.ngrams,
+            tool_names=self.tool_names,
+            n=np.int64(self.n),
+            sources=np.array(self.sources, dtype=str),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        import numpy as np
+
+        with np.load(path) as data:
+            return cls(
+                data["ngrams"],
+                data["tool_names"],
+                int(data["n"]),
+                data["sources"].tolist(),
+            )
+
+    def score(self, messages, tools) -> tuple[float, float]:
+        """
+        (ngram_overlap, tool_overlap) of one canonical row.
+        """
+        ngram_overlap = 0.0
+        for text in user_texts(messages):
+            hashes = ngram_hashes(text, self.n)
+            if len(hashes):
+                found = _sorted_contains(self.ngrams, hashes)
+                ngram_overlap = max(ngram_overlap, float(found.mean()))
+        tool_overlap = 0.0
+        names = tool_name_hashes(tools)
+        if len(names):
+            tool_overlap = float(_sorted_contains(self.tool_names, names).mean())
+        return ngram_overlap, tool_overlap
+
+
+# ProcessPoolExecutor worker 쪽 index (initializer 에서 한 번만 로드)
+_worker_index = None
+
+
+def init_worker(index_path: str):
+    global _worker_index
+    _worker_index = NgramIndex.load(index_path)
+
+
+def score_row_group(task: tuple) -> tuple:
+    """
+    Scores one parquet row group in a worker: (name, path, row group, first row index).
+    Returns (name, first row index, ngram overlaps, tool overlaps, errors).
+    """
+    import numpy as np
+    import pyarrow.parquet as pq
+
+    name, path, row_group, offset = task
+    table = pq.ParquetFile(path).read_row_group(
+        row_group, columns=["messages", "tools"]
+    )
+    ngram_overlaps = np.zeros(table.num_rows, dtype=np.float32)
+    tool_overlaps = np.zeros(table.num_rows, dtype=np.float32)
+    errors = 0
+    for i, (messages, tools) in enumerate(
+        zip(table.column("messages").to_pylist(), table.column("tools").to_pylist())
+    ):
+        try:
+            ngram_overlaps[i], tool_overlaps[i] = _worker_index.score(messages, tools)
+        except (ValueError, TypeError, AttributeError):
+            errors += 1
+    return name, offset, ngram_overlaps, tool_overlaps, errors
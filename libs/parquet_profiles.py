@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+
+# parquet writer 프로필 (환경변수 PARQUET_PROFILE 로 선택, parquet-bench.py 로 비교)
+#
+# - fast-write: 가벼운 압축, 반복 컬럼만 dictionary, 통계 없음, 큰 row group
+# - small-size: zstd 고압축, 전체 dictionary, 큰 row group
+# - fast-scan: snappy, 전체 dictionary, 통계 + page index, 작은 row group (병렬/선택적 스캔용)
+WRITER_PROFILES = {
+    "fast-write": {
+        "compression": "lz4",
+        "compression_level": None,
+        "dictionary": "repetitive",
+        "write_statistics": False,
+        "write_page_index": False,
+        "row_group_size": 50_000,
+    },
+    "small-size": {
+        "compression": "zstd",
+        "compression_level": 9,
+        "dictionary": True,
+        "write_statistics": False,
+        "write_page_index": False,
+        "row_group_size": 50_000,
+    },
+    "fast-scan": {
+        "compression": "snappy",
+        "compression_level": None,
+        "dictionary": True,
+        "write_statistics": True,
+        "write_page_index": True,
+        "row_group_size": 10_000,
+    },
+}
+
+DEFAULT_PROFILE = os.getenv("PARQUET_PROFILE", "fast-scan")
+
+# 값의 종류가 적고 반복이 많은 leaf 컬럼 (role, tool 이름, "function" 타입 등)
+REPETITIVE_COLUMNS = {"role", "name", "type"}
+
+
+def leaf_column_paths(schema: pa.Schema) -> list[str]:
+    """
+    Returns the parquet leaf column paths of an Arrow schema,
+    e.g. "messages.list.element.role".
+    """
+    import pyarrow as pa
+
+    def walk(prefix, arrow_type):
+        if pa.types.is_struct(arrow_type):
+            for field in arrow_type:
+                yield from walk(f"{prefix}.{field.name}", field.type)
+        elif pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+            yield from walk(f"{prefix}.list.element", arrow_type.value_type)
+        else:
+            yield prefix
+
+    paths = []
+    for field in schema:
+        paths.extend(walk(field.name, field.type))
+    return paths
+
+
+def get_profile(profile: str | None = None) -> dict:
+    profile = profile or DEFAULT_PROFILE
+    if profile not in WRITER_PROFILES:
+        raise ValueError(
+            f"Unknown parquet profile '{profile}', expected one of {list(WRITER_PROFILES)}"
+        )
+    return WRITER_PROFILES[profile]
+
+
+def writer_options(schema: pa.Schema, profile: str | None = None) -> dict:
+    """
+    Converts a profile into keyword arguments for pyarrow.parquet.ParquetWriter.
+    """
+    settings = get_profile(profile)
+
+    use_dictionary = settings["dictionary"]
+    if use_dictionary == "repetitive":
+        use_dictionary = [
+            path
+            for path in leaf_column_paths(schema)
+            if path.rsplit(".", 1)[-1] in REPETITIVE_COLUMNS
+        ]
+
+    return {
+        "compression": settings["compression"],
+        "compression_level": settings["compression_level"],
+        "use_dictionary": use_dictionary,
+        "write_statistics": settings["write_statistics"],
+        "write_page_index": settings["write_page_index"],
+    }
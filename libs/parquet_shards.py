@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+
+from libs.parquet_profiles import DEFAULT_PROFILE, get_profile, writer_options
+
+# 샤드 하나의 목표 크기 (환경변수로 조정 가능, 기본 256MiB)
+DEFAULT_MAX_SHARD_BYTES = int(os.getenv("PARQUET_MAX_SHARD_BYTES", 256 * 1024 * 1024))
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path(output_dir: str, name: str) -> str:
+    return os.path.join(output_dir, f"{name}{MANIFEST_SUFFIX}")
+
+
+def shard_file_name(name: str, index: int, total: int) -> str:
+    return f"{name}-{index:05d}-of-{total:05d}.parquet"
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_manifest(output_dir: str, name: str) -> dict | None:
+    path = manifest_path(output_dir, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_manifests(output_dir: str = "./parsed") -> list[dict]:
+    """
+    Returns every manifest in output_dir, sorted by dataset name.
+    """
+    manifests = []
+    for path in sorted(glob.glob(os.path.join(output_dir, f"*{MANIFEST_SUFFIX}"))):
+        with open(path, "r", encoding="utf-8") as f:
+            manifests.append(json.load(f))
+    return manifests
+
+
+def shard_paths(
+    output_dir: str = "./parsed", names: list[str] | None = None
+) -> list[str]:
+    """
+    Resolves shard file paths from the manifests in output_dir.
+    If names is given, only shards of those datasets are returned, so readers can skip the rest.
+    """
+    paths = []
+    for manifest in list_manifests(output_dir):
+        if names is not None and manifest["name"] not in names:
+            continue
+        for shard in manifest["shards"]:
+            paths.append(os.path.join(output_dir, shard["file"]))
+    return paths
+
+
+def _remove_previous_output(output_dir: str, name: str, previous: dict | None, keep):
+    # 이전 실행의 샤드가 남아있으면 "*.parquet" glob에 중복으로 잡히므로 삭제한다.
+    # 새 샤드와 manifest 가 자리를 잡은 뒤에 부르므로, 중간에 죽어도 이전 출력은 남는다.
+    if previous is not None:
+        for shard in previous["shards"]:
+            path = os.path.join(output_dir, shard["file"])
+            if shard["file"] not in keep and os.path.exists(path):
+                os.remove(path)
+
+    # 샤딩 이전 방식의 단일 파일 출력
+    monolithic = os.path.join(output_dir, f"{name}.parquet")
+    if os.path.exists(monolithic):
+        os.remove(monolithic)
+
+
+class ShardedParquetWriter:
+    """
+    Writes an Arrow stream into size-bounded parquet shards and a JSON manifest.
+
+    Tables are appended with write(); a new shard is started as soon as the current
+    one reaches max_shard_bytes on disk. close() renames the shards to their final
+    "<name>-00000-of-0000N.parquet" names and writes "<name>.manifest.json" with the
+    row count, byte size and sha256 of every shard. The shards of the previous output are
+    removed only after that, so a run that fails midway leaves the last output intact.
+
+    Encoding options and the row group size come from the parquet writer profile
+    (see libs/parquet_profiles.py).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        output_dir: str = "./parsed",
+        max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+        profile: str | None = None,
+        rows_per_chunk: int | None = None,
+    ):
+        self.name = name
+        self.output_dir = output_dir
+        self.max_shard_bytes = max_shard_bytes
+        self.profile = profile or DEFAULT_PROFILE
+        # 샤드 크기는 row group 단위로 확인한다.
+        self.rows_per_chunk = (
+            rows_per_chunk or get_profile(self.profile)["row_group_size"]
+        )
+
+        self.schema = None
+        self.shards = []
+        self._sink = None
+        self._writer = None
+        self._shard_rows = 0
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _tmp_path(self, index: int) -> str:
+        return os.path.join(self.output_dir, f".{self.name}-{index:05d}.parquet.tmp")
+
+    def _open_shard(self):
+        # manifest/경로 헬퍼는 pyarrow 없이 쓸 수 있도록 실제로 쓸 때만 불러온다.
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self._tmp_path(len(self.shards))
+        self._sink = pa.OSFile(path, "wb")
+        self._writer = pq.ParquetWriter(
+            self._sink, self.schema, **writer_options(self.schema, self.profile)
+        )
+        self._shard_rows = 0
+
+    def _close_shard(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._sink.close()
+        self.shards.append(
+            {
+                "tmp_path": self._tmp_path(len(self.shards)),
+                "num_rows": self._shard_rows,
+            }
+        )
+        self._writer = None
+        self._sink = None
+
+    def write(self, table: pa.Table):
+        if self.schema is None:
+            self.schema = table.schema
+        elif table.schema != self.schema:
+            table = table.cast(self.schema)
+
+        for offset in range(0, table.num_rows, self.rows_per_chunk):
+            chunk = table.slice(offset, self.rows_per_chunk)
+            if self._writer is None:
+                self._open_shard()
+            self._writer.write_table(chunk, row_group_size=self.rows_per_chunk)
+            self._shard_rows += chunk.num_rows
+            if self._sink.tell() >= self.max_shard_bytes:
+                self._close_shard()
+
+    def close(self) -> dict:
+        # 빈 데이터셋이라도 스키마를 가진 샤드 하나는 남긴다.
+        if self._writer is None and not self.shards and self.schema is not None:
+            self._open_shard()
+        self._close_shard()
+
+        previous = read_manifest(self.output_dir, self.name)
+        total = len(self.shards)
+        shards = []
+        for index, shard in enumerate(self.shards):
+            file_name = shard_file_name(self.name, index, total)
+            path = os.path.join(self.output_dir, file_name)
+            os.replace(shard["tmp_path"], path)
+            shards.append(
+                {
+                    "file": file_name,
+                    "num_rows": shard["num_rows"],
+                    "num_bytes": os.path.getsize(path),
+                    "sha256": file_sha256(path),
+                }
+            )
+
+        manifest = {
+            "name": self.name,
+            "num_rows": sum(s["num_rows"] for s in shards),
+            "num_bytes": sum(s["num_bytes"] for s in shards),
+            "max_shard_bytes": self.max_shard_bytes,
+            "profile": self.profile,
+            "shards": shards,
+        }
+        path = manifest_path(self.output_dir, self.name)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+        _remove_previous_output(
+            self.output_dir, self.name, previous, {s["file"] for s in shards}
+        )
+        return manifest
+
+
+def write_parquet_shards(
+    table: pa.Table,
+    name: str,
+    output_dir: str = "./parsed",
+    max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+    profile: str | None = None,
+) -> dict:
+    """
+    Writes table to ./parsed/<name>-XXXXX-of-YYYYY.parquet shards and returns the manifest.
+    """
+    writer = ShardedParquetWriter(
+        name, output_dir, max_shard_bytes=max_shard_bytes, profile=profile
+    )
+    writer.write(table)
+    manifest = writer.close()
+    print(
+        f"Output saved to {manifest_path(output_dir, name)} "
+        f"({manifest['num_rows']} rows, {len(manifest['shards'])} shards)"
+    )
+    return manifest
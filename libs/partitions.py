@@ -0,0 +1,282 @@
+import json
+import os
+import shutil
+
+from libs.parquet_shards import (
+    ShardedParquetWriter,
+    file_sha256,
+    manifest_path,
+    read_manifest,
+)
+from libs.quarantine import QUARANTINE_DIR
+
+# 여러 머신에서 컨버터 하나를 나눠 돌리기 위한 partition (--shard i/N)
+#
+# row key 는 입력 데이터셋에서의 위치다. (snapshot/lockfile 로 revision 이 고정되어 있으므로
+# 어느 머신에서 읽어도 같다.) partition i 는 연속 구간 [rows*i/N, rows*(i+1)/N) 을 맡으므로 겹치지 않고,
+# partition 순서대로 이어 붙이면 원래 순서가 된다.
+#
+# partition 출력은 ./partitions/<name>/part-0000i-of-0000N/ 에 parquet 샤드 / jsonl / quarantine
+# 과 함께 partition.json(구간, 출력 목록)으로 남고, merge_partitions 가 ./parsed 로 합친다.
+
+PARTITIONS_DIR = "./partitions"
+PARTITION_INFO = "partition.json"
+
+
+def shard_range(num_rows: int, index: int, count: int) -> tuple[int, int]:
+    return num_rows * index // count, num_rows * (index + 1) // count
+
+
+def partition_dir(
+    name: str, index: int, count: int, partitions_dir: str = PARTITIONS_DIR
+) -> str:
+    return os.path.join(partitions_dir, name, f"part-{index:05d}-of-{count:05d}")
+
+
+class Partition:
+    """
+    The slice of the input a converter run is responsible for, and where its output goes.
+    shard is (index, count) from --shard, or None for a full run into ./parsed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        shard: tuple[int, int] | None = None,
+        partitions_dir: str = PARTITIONS_DIR,
+    ):
+        self.name = name
+        self.sharded = shard is not None
+        self.index, self.count = shard or (0, 1)
+        self.start = 0
+        self.end = None
+        self.input_rows = None
+
+        if self.sharded:
+            self.output_dir = partition_dir(
+                name, self.index, self.count, partitions_dir
+            )
+            # 샤드 정리 로직이 <name>.parquet 를 지우므로 quarantine 은 하위 디렉터리에 둔다.
+            self.quarantine_dir = os.path.join(self.output_dir, "quarantine")
+            os.makedirs(self.output_dir, exist_ok=True)
+            # 완료 표시는 끝날 때 다시 쓴다. (중간에 죽은 partition 을 merge 하지 않도록)
+            info_path = os.path.join(self.output_dir, PARTITION_INFO)
+            if os.path.exists(info_path):
+                os.remove(info_path)
+        else:
+            self.output_dir = "./parsed"
+            self.quarantine_dir = QUARANTINE_DIR
+
+    def set_rows(self, num_rows: int) -> tuple[int, int]:
+        self.input_rows = num_rows
+        self.start, self.end = shard_range(num_rows, self.index, self.count)
+        if self.sharded:
+            print(
+                f"Partition {self.index}/{self.count}: rows {self.start}-{self.end} "
+                f"of {num_rows}"
+            )
+        return self.start, self.end
+
+    def select(self, dataset):
+        """
+        Returns the rows of a datasets.Dataset this partition is responsible for.
+        """
+        self.set_rows(len(dataset))
+        if not self.sharded:
+            return dataset
+        # 연속 구간 select 는 index mapping 없이 Arrow table slice 가 된다.
+        return dataset.select(range(self.start, self.end))
+
+    def source_rows(self, *steps):
+        """
+        Input positions of the rows select() returned. steps are the row removals applied
+        before select() (ExclusionList, RowFilter), in order; each maps back through its kept
+        positions, so quarantine and slow-row reports point at the original input row.
+        """
+        import numpy as np
+
+        rows = np.arange(self.start, self.end, dtype=np.int64)
+        for step in reversed(steps):
+            if step.kept is not None:
+                rows = step.kept[rows]
+        return rows.tolist()
+
+    def contains(self, row: int) -> bool:
+        return self.start <= row < self.end
+
+    def jsonl_path(self, name: str | None = None) -> str:
+        return os.path.join(self.output_dir, f"{name or self.name}.jsonl")
+
+    def finish(self, outputs: list[str] | None = None, errors: int = 0):
+        """
+        Marks a sharded run as complete. outputs are the dataset names written to output_dir.
+        """
+        if not self.sharded:
+            return
+        info = {
+            "name": self.name,
+            "index": self.index,
+            "count": self.count,
+            "start": self.start,
+            "end": self.end,
+            "input_rows": self.input_rows,
+            "outputs": outputs or [self.name],
+            "errors": errors,
+        }
+        with open(
+            os.path.join(self.output_dir, PARTITION_INFO), "w", encoding="utf-8"
+        ) as f:
+            json.dump(info, f, indent=2)
+
+
+def read_partitions(name: str, partitions_dir: str = PARTITIONS_DIR) -> list[dict]:
+    """
+    Returns the partition infos of a sharded run in order, after checking that every
+    partition finished and that their row ranges cover the input exactly once.
+    """
+    root = os.path.join(partitions_dir, name)
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"No partitions of '{name}' in {partitions_dir}")
+
+    infos, unfinished = [], []
+    for entry in sorted(os.listdir(root)):
+        path = os.path.join(root, entry, PARTITION_INFO)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+            info["dir"] = os.path.join(root, entry)
+            infos.append(info)
+        elif os.path.isdir(os.path.join(root, entry)):
+            unfinished.append(entry)
+    if not infos:
+        raise FileNotFoundError(f"No finished partitions of '{name}' in {root}")
+
+    count = infos[0]["count"]
+    input_rows = infos[0]["input_rows"]
+    for info in infos:
+        if info["count"] != count or info["input_rows"] != input_rows:
+            raise ValueError(
+                f"Partitions of '{name}' come from different runs "
+                f"({info['dir']}: {info['index']}/{info['count']} of {info['input_rows']} rows, "
+                f"expected ?/{count} of {input_rows} rows). Remove the stale ones in {root}"
+            )
+
+    infos.sort(key=lambda info: info["index"])
+    missing = sorted(set(range(count)) - {info["index"] for info in infos})
+    if missing:
+        detail = f" (unfinished: {', '.join(unfinished)})" if unfinished else ""
+        raise ValueError(
+            f"Missing partitions of '{name}': {missing} of {count}{detail}"
+        )
+
+    position = 0
+    for info in infos:
+        if info["start"] != position:
+            raise ValueError(
+                f"Partition {info['index']} of '{name}' starts at row {info['start']}, "
+                f"expected {position}"
+            )
+        position = info["end"]
+    if position != input_rows:
+        raise ValueError(
+            f"Partitions of '{name}' end at row {position} of {input_rows}"
+        )
+    return infos
+
+
+def _verified_manifest(directory: str, name: str) -> dict:
+    manifest = read_manifest(directory, name)
+    if manifest is None:
+        raise FileNotFoundError(f"No manifest {manifest_path(directory, name)}")
+    for shard in manifest["shards"]:
+        path = os.path.join(directory, shard["file"])
+        if not os.path.exists(path) or file_sha256(path) != shard["sha256"]:
+            raise ValueError(f"Shard {path} is missing or does not match its manifest")
+    return manifest
+
+
+def merge_partitions(
+    name: str,
+    output_dir: str = "./parsed",
+    partitions_dir: str = PARTITIONS_DIR,
+    quarantine_dir: str = QUARANTINE_DIR,
+) -> dict:
+    """
+    Stitches the partitions of a sharded run into output_dir in original row order.
+    Returns {output name: rows}.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    infos = read_partitions(name, partitions_dir)
+    outputs = infos[0]["outputs"]
+
+    # 쓰기 전에 모든 partition 의 샤드를 먼저 검증한다. (반쯤 합쳐진 출력을 남기지 않도록)
+    manifests = {
+        (info["index"], output): _verified_manifest(info["dir"], output)
+        for info in infos
+        for output in outputs
+    }
+    # jsonl 은 모든 partition 에 있거나 하나도 없어야 한다. (일부만 있으면 이전 jsonl 이 남는다)
+    jsonl_parts = {
+        output: [os.path.join(info["dir"], f"{output}.jsonl") for info in infos]
+        for output in outputs
+    }
+    for output, paths in jsonl_parts.items():
+        missing = [
+            info["index"]
+            for info, path in zip(infos, paths)
+            if not os.path.exists(path)
+        ]
+        if missing and len(missing) < len(infos):
+            raise ValueError(
+                f"Partitions {missing} of '{name}' have no {output}.jsonl, "
+                f"but the other partitions do"
+            )
+
+    merged = {}
+    for output in outputs:
+        writer = ShardedParquetWriter(output, output_dir)
+        for info in infos:
+            manifest = manifests[(info["index"], output)]
+            for shard in manifest["shards"]:
+                parquet_file = pq.ParquetFile(os.path.join(info["dir"], shard["file"]))
+                for batch in parquet_file.iter_batches():
+                    writer.write(pa.Table.from_batches([batch]))
+        manifest = writer.close()
+        merged[output] = manifest["num_rows"]
+        print(
+            f"Output saved to {manifest_path(output_dir, output)} "
+            f"({manifest['num_rows']} rows, {len(manifest['shards'])} shards)"
+        )
+
+        # jsonl 은 partition 순서대로 이어 붙이면 된다.
+        if all(os.path.exists(path) for path in jsonl_parts[output]):
+            jsonl_path = os.path.join(output_dir, f"{output}.jsonl")
+            with open(jsonl_path, "wb") as out:
+                for path in jsonl_parts[output]:
+                    with open(path, "rb") as f:
+                        shutil.copyfileobj(f, out)
+            print(f"Output saved to {jsonl_path}")
+
+    # quarantine 은 row_index 가 전체 기준이므로 그대로 이어 붙인다.
+    quarantine_parts = [
+        os.path.join(info["dir"], "quarantine", f"{name}.parquet") for info in infos
+    ]
+    quarantine_parts = [path for path in quarantine_parts if os.path.exists(path)]
+    quarantine_path = os.path.join(quarantine_dir, f"{name}.parquet")
+    if os.path.exists(quarantine_path):
+        os.remove(quarantine_path)
+    if quarantine_parts:
+        os.makedirs(quarantine_dir, exist_ok=True)
+        writer = None
+        for path in quarantine_parts:
+            table = pq.read_table(path)
+            if writer is None:
+                writer = pq.ParquetWriter(quarantine_path, table.schema)
+            writer.write_table(table)
+        writer.close()
+        print(
+            f"Quarantined {sum(info['errors'] for info in infos)} rows to {quarantine_path}"
+        )
+    return merged
@@ -0,0 +1,139 @@
+import cProfile
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+
+# 변환기 단계(load / parse / serialize / write)별 시간, CPU, 처리량, 메모리 측정
+#
+# 항상 단계별 요약을 출력하고, --profile 옵션이 켜지면
+# ./profile/<name>.timings.json (실행 간 diff 용) 과 parse 단계의 cProfile 결과
+# ./profile/<name>.parse.pstats 를 저장한다.
+
+PROFILE_DIR = "./profile"
+
+
+def peak_rss_mb() -> float:
+    # Linux에서 ru_maxrss 단위는 KiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageProfiler:
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = False,
+        cprofile_stages: tuple = ("parse",),
+        output_dir: str = PROFILE_DIR,
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.cprofile_stages = cprofile_stages
+        self.output_dir = output_dir
+        self.stages = {}
+        self._profiles = {}
+
+    def _stage_record(self, stage: str) -> dict:
+        return self.stages.setdefault(
+            stage,
+            {
+                "wall_s": 0.0,
+                "cpu_s": 0.0,
+                "rows": None,
+                "peak_rss_mb": 0.0,
+                "peak_rss_growth_mb": 0.0,
+            },
+        )
+
+    @contextmanager
+    def stage(self, stage: str, rows: int | None = None):
+        """
+        Measures the enclosed block. The yielded dict can be updated with
+        record["rows"] = n when the row count is only known at the end.
+        """
+        record = self._stage_record(stage)
+        if rows is not None:
+            record["rows"] = rows
+
+        profile = None
+        if self.enabled and stage in self.cprofile_stages:
+            profile = self._profiles.setdefault(stage, cProfile.Profile())
+
+        rss_start = peak_rss_mb()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record["wall_s"] += time.perf_counter() - wall_start
+            record["cpu_s"] += time.process_time() - cpu_start
+            record["peak_rss_mb"] = peak_rss_mb()
+            record["peak_rss_growth_mb"] += record["peak_rss_mb"] - rss_start
+
+    def move(self, source: str, target: str, wall_s: float, cpu_s: float):
+        """
+        Moves time measured inside one stage to another, e.g. the JSON encoding
+        the row builder does while the parse loop is running.
+        """
+        source_record = self._stage_record(source)
+        target_record = self._stage_record(target)
+        source_record["wall_s"] -= wall_s
+        source_record["cpu_s"] -= cpu_s
+        target_record["wall_s"] += wall_s
+        target_record["cpu_s"] += cpu_s
+
+    def report(self) -> dict:
+        stages = {}
+        for stage, record in self.stages.items():
+            stages[stage] = dict(record)
+            rows = record["rows"]
+            stages[stage]["rows_per_sec"] = (
+                rows / record["wall_s"] if rows and record["wall_s"] > 0 else None
+            )
+        return {"name": self.name, "stages": stages}
+
+    def print_summary(self):
+        report = self.report()
+        print(f"\n[{self.name}] stage timings")
+        print(
+            f"{'stage':<10} {'wall s':>9} {'cpu s':>9} {'rows':>9} {'rows/s':>10} {'peak MB':>9}"
+        )
+        for stage, record in report["stages"].items():
+            rows = record["rows"] if record["rows"] is not None else "-"
+            rows_per_sec = (
+                f"{record['rows_per_sec']:>10.0f}"
+                if record["rows_per_sec"]
+                else f"{'-':>10}"
+            )
+            print(
+                f"{stage:<10} {record['wall_s']:>9.3f} {record['cpu_s']:>9.3f} "
+                f"{rows:>9} {rows_per_sec} {record['peak_rss_mb']:>9.1f}"
+            )
+
+    def finish(self):
+        """
+        Prints the stage summary, and with --profile also writes the JSON timing
+        report and the cProfile stats of the profiled stages.
+        """
+        self.print_summary()
+        if not self.enabled:
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        timings_path = os.path.join(self.output_dir, f"{self.name}.timings.json")
+        with open(timings_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Timing report saved to {timings_path}")
+
+        for stage, profile in self._profiles.items():
+            stats_path = os.path.join(self.output_dir, f"{self.name}.{stage}.pstats")
+            profile.dump_stats(stats_path)
+            print(
+                f"cProfile stats saved to {stats_path} "
+                f"(python -m pstats {stats_path})"
+            )
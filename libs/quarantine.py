@@ -0,0 +1,138 @@
+import json
+import os
+import re
+import traceback
+from collections import Counter
+from functools import cache
+
+# 파싱에 실패한 row를 메모리에 쌓지 않고 ./quarantine/<name>.parquet 로 흘려보낸다.
+# 각 row에는 원본 row index, 정규화된 reason code, 잘린 traceback, 원본 row(JSON)가 저장된다.
+
+QUARANTINE_DIR = "./quarantine"
+
+
+@cache
+def quarantine_schema():
+    # 에러가 하나도 없으면 pyarrow를 불러오지 않는다.
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("row_index", pa.int64()),
+            ("reason", pa.string()),
+            ("exception", pa.string()),
+            ("message", pa.string()),
+            ("traceback", pa.string()),
+            ("row", pa.string()),
+        ]
+    )
+
+
+MAX_REASON_CHARS = 120
+MAX_MESSAGE_CHARS = 1000
+
+
+def reason_code(exception_name: str, message: str) -> str:
+    """
+    Normalizes an error into a short code that groups identical failures,
+    e.g. "JSONDecodeError: Expecting value: line <n> column <n> (char <n>)".
+    Payloads dumped into the message (dicts, lists) and numbers are stripped.
+    """
+    message = message.strip().split("\n", 1)[0]
+    # 메시지 뒤에 붙은 row/tool dump 제거
+    message = re.split(r"[{\[]", message, maxsplit=1)[0].rstrip(" :,")
+    message = re.sub(r"\d+", "<n>", message)
+    code = f"{exception_name}: {message}" if message else exception_name
+    return code[:MAX_REASON_CHARS]
+
+
+class QuarantineSink:
+    def __init__(
+        self,
+        name: str,
+        output_dir: str = QUARANTINE_DIR,
+        batch_size: int = 1000,
+        max_traceback_chars: int = 2000,
+        row_offset: int = 0,
+    ):
+        self.name = name
+        self.path = os.path.join(output_dir, f"{name}.parquet")
+        self.batch_size = batch_size
+        self.max_traceback_chars = max_traceback_chars
+        # partition 실행에서 row index 를 전체 입력 기준으로 맞춘다.
+        self.row_offset = row_offset
+        self.reasons = Counter()
+        self._buffer = []
+        self._writer = None
+        self._count = 0
+
+        os.makedirs(output_dir, exist_ok=True)
+        # 이전 실행 결과가 남아있으면 이번 실행의 결과와 섞이지 않도록 삭제
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, row_index: int, error: BaseException, row=None):
+        tb = "".join(traceback.format_exception(error))
+        self.add_record(row_index, type(error).__name__, str(error), tb, row)
+
+    def add_record(
+        self,
+        row_index: int,
+        exception_name: str,
+        message: str,
+        tb: str = "",
+        row=None,
+    ):
+        reason = reason_code(exception_name, message)
+        self.reasons[reason] += 1
+        self._count += 1
+        self._buffer.append(
+            {
+                "row_index": row_index + self.row_offset,
+                "reason": reason,
+                "exception": exception_name,
+                "message": message[:MAX_MESSAGE_CHARS],
+                # traceback은 마지막 frame 쪽이 중요하므로 뒤쪽을 남긴다.
+                "traceback": tb[-self.max_traceback_chars :],
+                "row": (
+                    json.dumps(row, ensure_ascii=False, default=str)
+                    if row is not None
+                    else None
+                ),
+            }
+        )
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = quarantine_schema()
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, schema)
+        self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=schema))
+        self._buffer = []
+
+    def close(self, top: int = 10):
+        """
+        Flushes the remaining rows and prints a per-reason summary.
+        """
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        if not self._count:
+            return
+        print(f"Quarantined {self._count} rows to {self.path}")
+        for reason, count in self.reasons.most_common(top):
+            print(f"  {count:>8}  {reason}")
+        if len(self.reasons) > top:
+            others = sum(count for _, count in self.reasons.most_common()[top:])
+            print(f"  {others:>8}  ({len(self.reasons) - top} other reasons)")
@@ -0,0 +1,366 @@
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# 네트워크 I/O 위주의 LLM 요청 엔진 (스레드 기반, client 하나를 공유)
+#
+# - 동시 요청 수는 AIMD 로 자동 조절한다.
+#   성공하면 조금씩 늘리고(slow start 이후엔 limit 만큼 성공할 때마다 +1),
+#   429 / 5xx / timeout 이나 지연 시간 급증이 보이면 곱으로 줄인다.
+# - 분당 요청 수(RPM)와 분당 토큰 수(TPM)는 token bucket 으로 제한한다.
+# - 재시도는 엔진이 한다. (client 쪽 재시도는 끄고 써야 429 를 엔진이 볼 수 있다.)
+
+
+def _status_code(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error: Exception) -> str | None:
+    """
+    Returns "throttled" (429), "server" (5xx, 408, 409) or "timeout" (timeouts and
+    connection errors) for errors worth retrying, and None for everything else.
+    """
+    status = _status_code(error)
+    if status == 429:
+        return "throttled"
+    if status is not None and (status >= 500 or status in (408, 409)):
+        return "server"
+    if status is None:
+        name = type(error).__name__
+        if isinstance(error, (TimeoutError, ConnectionError)) or any(
+            keyword in name for keyword in ("Timeout", "Connection")
+        ):
+            return "timeout"
+    return None
+
+
+def retry_after(error: Exception) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at per_minute / 60 per second.
+    per_minute=None disables the limit.
+    """
+
+    def __init__(self, per_minute: float | None, burst: float | None = None):
+        self.rate = per_minute / 60 if per_minute else None
+        # 기본 burst 는 10초 분량
+        self.capacity = burst or (max(1.0, per_minute / 6) if per_minute else None)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0):
+        if self.rate is None:
+            return
+        # bucket 보다 큰 요청이 영원히 기다리지 않도록 capacity 로 자른다.
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def consume(self, amount: float):
+        """
+        Charges (or refunds, if negative) tokens without waiting, e.g. to reconcile
+        an estimate with the usage reported by the response. The balance may go negative.
+        """
+        if self.rate is None:
+            return
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AIMDController:
+    """
+    Adaptive concurrency limit (additive increase, multiplicative decrease).
+
+    The limit decreases on overload signals (429 / 5xx / timeouts) and when the
+    smoothed latency grows past latency_tolerance times the best latency seen in the
+    last baseline_window seconds.
+    At most one decrease happens per smoothed latency, so a burst of failures
+    caused by the same overload only counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 256,
+        decrease_factor: float = 0.7,
+        latency_tolerance: float | None = 3.0,
+        baseline_window: float = 300.0,
+    ):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self.slow_start = True
+        self.best_latency = None
+        self.baseline_window = baseline_window
+        # (시각, 지연 시간) 을 지연 시간 오름차순으로 유지하는 sliding window minimum
+        self._recent_latencies = deque()
+        self.latency_ewma = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.current_limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency_ewma or 1.0):
+            return
+        self._last_decrease = now
+        self.slow_start = False
+        self.limit = max(self.minimum, self.limit * self.decrease_factor)
+
+    def on_success(self, latency: float):
+        with self._cond:
+            self.latency_ewma = (
+                latency
+                if self.latency_ewma is None
+                else 0.8 * self.latency_ewma + 0.2 * latency
+            )
+            # 기준 지연 시간은 최근 baseline_window 초 동안의 최소값이라, 혼잡이 그보다 오래
+            # 이어져야 올라간다. (성공 횟수가 아니라 시간에 묶어서 아주 천천히 적응한다)
+            now = time.monotonic()
+            recent = self._recent_latencies
+            while recent and recent[-1][1] >= latency:
+                recent.pop()
+            recent.append((now, latency))
+            while now - recent[0][0] > self.baseline_window:
+                recent.popleft()
+            self.best_latency = recent[0][1]
+
+            if (
+                self.latency_tolerance is not None
+                and self.latency_ewma > self.best_latency * self.latency_tolerance
+            ):
+                self._decrease()
+            elif self.in_flight >= self.current_limit:
+                # limit 을 실제로 다 쓰고 있을 때만 늘린다.
+                step = 1.0 if self.slow_start else 1.0 / self.limit
+                self.limit = min(self.maximum, self.limit + step)
+                self.peak_limit = max(self.peak_limit, self.limit)
+            self._cond.notify_all()
+
+    def on_overload(self):
+        with self._cond:
+            self._decrease()
+            self._cond.notify_all()
+
+
+class RequestEngine:
+    """
+    Runs request_fn(item) for every item with adaptive concurrency, rate limits and retries.
+
+    - estimate_tokens(item): tokens charged to the TPM bucket before the request
+    - usage(result): (prompt_tokens, completion_tokens) reported by the response, used to
+      correct the estimate afterwards. Latency is divided by the completion tokens so
+      long answers are not mistaken for an overloaded endpoint.
+    - telemetry: a libs.telemetry.Telemetry that records every attempt
+    """
+
+    def __init__(
+        self,
+        request_fn,
+        concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 256,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        estimate_tokens=None,
+        usage=None,
+        telemetry=None,
+        latency_tolerance: float | None = 3.0,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.request_fn = request_fn
+        self.controller = AIMDController(
+            concurrency,
+            min_concurrency,
+            max_concurrency,
+            latency_tolerance=latency_tolerance,
+        )
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.estimate_tokens = estimate_tokens
+        self.usage = usage
+        self.telemetry = telemetry
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self.started = None
+        self.finished = None
+        if telemetry is not None:
+            telemetry.gauge("concurrency_limit", lambda: self.controller.current_limit)
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = retry_after(error)
+        if delay is None:
+            # full jitter
+            delay = random.uniform(
+                0, min(self.backoff_max, self.backoff_base * 2**attempt)
+            )
+        return delay
+
+    def _call(self, item):
+        attempt = 0
+        while True:
+            estimate = 0
+            self.request_bucket.acquire(1)
+            if self.token_bucket.rate is not None and self.estimate_tokens:
+                estimate = self.estimate_tokens(item)
+                self.token_bucket.acquire(estimate)
+
+            self.controller.acquire()
+            # usage() 나 on_success() 가 예외를 던져도 slot 은 항상 돌려준다.
+            try:
+                if self.telemetry is not None:
+                    self.telemetry.request_started()
+                start = time.monotonic()
+                try:
+                    result = self.request_fn(item)
+                    latency = time.monotonic() - start
+                    prompt_tokens, completion_tokens = (
+                        self.usage(result) if self.usage else None
+                    ) or (None, None)
+                    error = None
+                except Exception as e:
+                    error = e
+                if error is None:
+                    self.controller.on_success(
+                        latency / completion_tokens if completion_tokens else latency
+                    )
+            finally:
+                self.controller.release()
+
+            if error is not None:
+                kind = classify_error(error)
+                if self.telemetry is not None:
+                    self.telemetry.request_finished(
+                        time.monotonic() - start, error=kind or type(error).__name__
+                    )
+                if kind is None:
+                    raise error
+                self._count(kind)
+                self.controller.on_overload()
+                if attempt >= self.max_retries:
+                    raise error
+                self._count("retries")
+                time.sleep(self._backoff(attempt, error))
+                attempt += 1
+                continue
+
+            if self.telemetry is not None:
+                self.telemetry.request_finished(
+                    latency, prompt_tokens, completion_tokens
+                )
+            if prompt_tokens is not None or completion_tokens is not None:
+                used = (prompt_tokens or 0) + (completion_tokens or 0)
+                self._count("tokens", used)
+                self.token_bucket.consume(used - estimate)
+            return result
+
+    def run(self, items):
+        """
+        Yields (index, item, result, error) in completion order.
+        error is None on success; otherwise result is None.
+        """
+        self.started = time.monotonic()
+        pending = {}
+
+        def finished(done):
+            for future in done:
+                index, item = pending.pop(future)
+                error = future.exception()
+                self._count("failed" if error else "completed")
+                yield index, item, (None if error else future.result()), error
+
+        with ThreadPoolExecutor(max_workers=self.controller.maximum) as executor:
+            for index, item in enumerate(items):
+                # 대기 중인 요청 수를 현재 limit 에 맞춰 묶어 둔다 (입력을 한 번에 올리지 않음).
+                while len(pending) >= self.controller.current_limit * 2 + 1:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from finished(done)
+                pending[executor.submit(self._call, item)] = (index, item)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+        self.finished = time.monotonic()
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.monotonic()) - (
+            self.started or time.monotonic()
+        )
+        completed = self.stats["completed"]
+        return {
+            "completed": completed,
+            "failed": self.stats["failed"],
+            "retries": self.stats["retries"],
+            "throttled": self.stats["throttled"],
+            "server_errors": self.stats["server"],
+            "timeouts": self.stats["timeout"],
+            "tokens": self.stats["tokens"],
+            "elapsed_s": elapsed,
+            "requests_per_sec": completed / elapsed if elapsed > 0 else None,
+            "concurrency_limit": self.controller.current_limit,
+            "peak_concurrency_limit": int(self.controller.peak_limit),
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        rate = f"{s['requests_per_sec']:.2f}" if s["requests_per_sec"] else "-"
+        print(
+            f"Requests: {s['completed']} ok, {s['failed']} failed, {s['retries']} retries "
+            f"(429: {s['throttled']}, 5xx: {s['server_errors']}, timeouts: {s['timeouts']}), "
+            f"{rate} req/s, concurrency {s['concurrency_limit']} (peak {s['peak_concurrency_limit']})"
+        )
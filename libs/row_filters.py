@@ -0,0 +1,343 @@
+# 컨버터의 --filter 식을 Arrow 입력 컬럼에 batch 단위 pyarrow compute 로 평가해서,
+# 조건에 맞지 않는 row 는 Python 으로 decode/파싱하기 전에 Dataset 에서 뺀다.
+#
+#   --filter 'count(answers, "\"name\"") >= 2'              # xlam: answer 가 2개 이상
+#   --filter 'len(conversations) > 3'                       # hermes: multi-turn
+#   --filter 'strlen(messages.content) < 20000'             # dolphin: 전체 메시지 길이 제한
+#   --filter 'contains(query, "weather") and not contains(tools, "stock")'
+#
+# 식은 Python 문법의 부분집합이다.
+# - 컬럼: name, struct/list<struct> 의 필드는 name.field
+# - 상수, 비교(<, <=, >, >=, ==, !=, in [...], not in [...], is None, is not None),
+#   and / or / not, +, -, *, /
+# - 함수 (list 컬럼은 row 안의 원소를 모두 합산한다)
+#     len(x)          list 길이, 문자열이면 문자 수
+#     strlen(x)       문자열 길이의 합
+#     count(x, "s")   substring 등장 횟수의 합
+#     contains(x, "s")  substring 이 하나라도 있으면 True
+# 결과가 null 인 row (컬럼 값이 null 등) 는 제외된다.
+
+FUNCTIONS = {"len": 1, "strlen": 1, "count": 2, "contains": 2}
+
+# ast 는 --filter 를 쓸 때만 불러오므로 연산자는 노드 클래스 이름으로 찾는다.
+COMPARISONS = {
+    "Lt": "less",
+    "LtE": "less_equal",
+    "Gt": "greater",
+    "GtE": "greater_equal",
+    "Eq": "equal",
+    "NotEq": "not_equal",
+}
+
+ARITHMETIC = {
+    "Add": "add",
+    "Sub": "subtract",
+    "Mult": "multiply",
+    "Div": "divide",
+}
+
+
+class FilterExpressionError(ValueError):
+    pass
+
+
+def _column_path(node) -> list[str] | None:
+    import ast
+
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.Attribute):
+        path = _column_path(node.value)
+        return None if path is None else path + [node.attr]
+    return None
+
+
+def _check(node, expression: str, columns: set):
+    """
+    Validates the syntax tree of an expression and collects the top-level columns it reads.
+    """
+    import ast
+
+    def fail(message):
+        raise FilterExpressionError(f"{message} in filter '{expression}'")
+
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        path = _column_path(node)
+        if path is None:
+            fail(f"Unsupported field access '{ast.unparse(node)}'")
+        columns.add(path[0])
+    elif isinstance(node, ast.Constant):
+        if not isinstance(node.value, (str, int, float, bool, type(None))):
+            fail(f"Unsupported constant {node.value!r}")
+    elif isinstance(node, ast.Call):
+        name = node.func.id if isinstance(node.func, ast.Name) else None
+        if name not in FUNCTIONS:
+            fail(
+                f"Unknown function '{ast.unparse(node.func)}' "
+                f"(available: {', '.join(FUNCTIONS)})"
+            )
+        if len(node.args) != FUNCTIONS[name] or node.keywords:
+            fail(f"{name}() takes {FUNCTIONS[name]} positional argument(s)")
+        _check(node.args[0], expression, columns)
+        if len(node.args) == 2 and not (
+            isinstance(node.args[1], ast.Constant)
+            and isinstance(node.args[1].value, str)
+        ):
+            fail(f"The second argument of {name}() must be a string")
+    elif isinstance(node, ast.Compare):
+        _check(node.left, expression, columns)
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(
+                    comparator, (ast.List, ast.Tuple, ast.Set)
+                ) or not all(
+                    isinstance(element, ast.Constant) for element in comparator.elts
+                ):
+                    fail("'in' needs a list of constants")
+            elif isinstance(op, (ast.Is, ast.IsNot)):
+                if not (
+                    isinstance(comparator, ast.Constant) and comparator.value is None
+                ):
+                    fail("'is' is only supported with None")
+            elif type(op).__name__ not in COMPARISONS:
+                fail(f"Unsupported comparison '{type(op).__name__}'")
+            else:
+                _check(comparator, expression, columns)
+    elif isinstance(node, ast.BoolOp):
+        for value in node.values:
+            _check(value, expression, columns)
+    elif isinstance(node, ast.UnaryOp):
+        if not isinstance(node.op, (ast.Not, ast.USub)):
+            fail(f"Unsupported operator '{type(node.op).__name__}'")
+        _check(node.operand, expression, columns)
+    elif isinstance(node, ast.BinOp):
+        if type(node.op).__name__ not in ARITHMETIC:
+            fail(f"Unsupported operator '{type(node.op).__name__}'")
+        _check(node.left, expression, columns)
+        _check(node.right, expression, columns)
+    else:
+        fail(f"Unsupported syntax '{ast.unparse(node)}'")
+
+
+def _is_list(array) -> bool:
+    import pyarrow as pa
+
+    return pa.types.is_list(array.type) or pa.types.is_large_list(array.type)
+
+
+def _field(array, name: str):
+    """
+    Field of a struct array; for (nested) lists of structs, the lists of that field.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if _is_list(array):
+        list_class = (
+            pa.LargeListArray if pa.types.is_large_list(array.type) else pa.ListArray
+        )
+        # offsets 는 slice 를 반영한 값이고 values 는 slice 전 전체 child 라서 그대로 짝이 맞는다.
+        return list_class.from_arrays(
+            array.offsets, _field(array.values, name), mask=array.is_null()
+        )
+    if not pa.types.is_struct(array.type):
+        raise FilterExpressionError(f"Cannot read field '{name}' of {array.type}")
+    return pc.struct_field(array, name)
+
+
+def _per_row(array, function):
+    """
+    Applies function to the strings of array and sums the results within each (nested) list,
+    so a list<string> column gives one number per row.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not _is_list(array):
+        if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+            raise FilterExpressionError(f"Expected a string column, got {array.type}")
+        return function(array)
+
+    inner = pc.fill_null(_per_row(pc.list_flatten(array), function), 0)
+    parents = pc.list_parent_indices(array).to_numpy()
+    totals = np.bincount(
+        parents, weights=inner.to_numpy(zero_copy_only=False), minlength=len(array)
+    )
+    return pa.array(
+        totals.astype(np.int64), mask=array.is_null().to_numpy(zero_copy_only=False)
+    )
+
+
+def _call(name: str, array, argument: str | None):
+    import pyarrow.compute as pc
+
+    if name == "len":
+        if _is_list(array):
+            return pc.list_value_length(array)
+        return pc.utf8_length(array)
+    if name == "strlen":
+        return _per_row(array, pc.utf8_length)
+    counts = _per_row(array, lambda strings: pc.count_substring(strings, argument))
+    if name == "count":
+        return counts
+    return pc.greater(counts, 0)
+
+
+def _evaluate(node, batch):
+    import ast
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        path = _column_path(node)
+        array = batch.column(path[0])
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        for name in path[1:]:
+            array = _field(array, name)
+        return array
+    if isinstance(node, ast.Call):
+        argument = node.args[1].value if len(node.args) == 2 else None
+        return _call(node.func.id, _evaluate(node.args[0], batch), argument)
+    if isinstance(node, ast.Compare):
+        result = None
+        left = _evaluate(node.left, batch)
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                values = pa.array([element.value for element in comparator.elts])
+                value = pc.is_in(left, value_set=values.cast(left.type))
+                if isinstance(op, ast.NotIn):
+                    value = pc.invert(value)
+                right = comparator
+            elif isinstance(op, (ast.Is, ast.IsNot)):
+                value = (
+                    pc.is_null(left) if isinstance(op, ast.Is) else pc.is_valid(left)
+                )
+                right = comparator
+            else:
+                right = _evaluate(comparator, batch)
+                value = getattr(pc, COMPARISONS[type(op).__name__])(left, right)
+            result = value if result is None else pc.and_kleene(result, value)
+            left = right
+        return result
+    if isinstance(node, ast.BoolOp):
+        combine = pc.and_kleene if isinstance(node.op, ast.And) else pc.or_kleene
+        result = _evaluate(node.values[0], batch)
+        for value in node.values[1:]:
+            result = combine(result, _evaluate(value, batch))
+        return result
+    if isinstance(node, ast.UnaryOp):
+        operand = _evaluate(node.operand, batch)
+        if isinstance(node.op, ast.Not):
+            return not operand if isinstance(operand, bool) else pc.invert(operand)
+        return -operand if isinstance(operand, (int, float)) else pc.negate(operand)
+    if isinstance(node, ast.BinOp):
+        left = _evaluate(node.left, batch)
+        right = _evaluate(node.right, batch)
+        if isinstance(node.op, ast.Div):
+            # 정수끼리 나누면 Arrow 는 몫을 준다.
+            left = pc.cast(left, pa.float64())
+        return getattr(pc, ARITHMETIC[type(node.op).__name__])(left, right)
+    raise FilterExpressionError(f"Unsupported syntax '{ast.unparse(node)}'")
+
+
+class RowFilter:
+    """
+    The conjunction of the --filter expressions of a converter run.
+    """
+
+    def __init__(self, expressions: list[str] | None = None):
+        import ast
+
+        self.expressions = list(expressions or [])
+        self.trees = []
+        self.columns = set()
+        # 마지막 apply() 에서 남은 row 의 입력 위치 (빠진 row 가 없으면 None)
+        self.kept = None
+        for expression in self.expressions:
+            try:
+                tree = ast.parse(expression.strip(), mode="eval").body
+            except SyntaxError as e:
+                raise FilterExpressionError(
+                    f"Invalid filter '{expression}': {e.msg}"
+                ) from None
+            _check(tree, expression, self.columns)
+            self.trees.append(tree)
+
+    def __bool__(self):
+        return bool(self.trees)
+
+    def check_columns(self, column_names: list[str]):
+        missing = sorted(self.columns - set(column_names))
+        if missing:
+            raise FilterExpressionError(
+                f"Unknown column(s) {', '.join(missing)} "
+                f"(available: {', '.join(column_names)})"
+            )
+
+    def mask(self, batch):
+        """
+        Boolean numpy mask of the rows of an Arrow table/record batch that pass every expression.
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        self.check_columns(batch.schema.names)
+        keep = np.ones(batch.num_rows, dtype=bool)
+        for expression, tree in zip(self.expressions, self.trees):
+            try:
+                result = _evaluate(tree, batch)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, TypeError) as e:
+                raise FilterExpressionError(
+                    f"Cannot evaluate filter '{expression}': {e}"
+                )
+            if not isinstance(result, (pa.Array, pa.ChunkedArray)):
+                # 상수 식
+                keep &= bool(result)
+                continue
+            if not pa.types.is_boolean(result.type):
+                raise FilterExpressionError(
+                    f"Filter '{expression}' gives {result.type} values, not booleans"
+                )
+            keep &= pc.fill_null(result, False).to_numpy(zero_copy_only=False)
+        return keep
+
+    def kept_rows(self, source):
+        """
+        Positions of the rows of a datasets.Dataset or pyarrow.Table that pass the filter.
+        Only the columns the expressions read are touched.
+        """
+        import numpy as np
+
+        from libs.arrow_batches import iter_batches
+
+        self.check_columns(source.column_names)
+        masks = [
+            self.mask(batch) for batch in iter_batches(source, sorted(self.columns))
+        ]
+        if not masks:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(np.concatenate(masks))
+
+    def apply(self, dataset):
+        """
+        Returns the rows of a datasets.Dataset that pass the filter and prints how many did.
+        The input positions of the remaining rows are kept in self.kept.
+        """
+        self.kept = None
+        if not self:
+            return dataset
+        kept = self.kept_rows(dataset)
+        print(
+            f"Filter kept {len(kept)} of {len(dataset)} rows: "
+            + " and ".join(f"({expression})" for expression in self.expressions)
+        )
+        if len(kept) == len(dataset):
+            return dataset
+        self.kept = kept
+        return dataset.select(kept)
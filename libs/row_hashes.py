@@ -0,0 +1,197 @@
+# Arrow 컬럼의 row 별 64bit 내용 hash 를 numpy 로 한 번에 계산한다. (pyarrow compute 에는 hash 커널이 없다)
+#
+# - 문자열: byte 단위 다항식 hash  h = sum(b[i] * P^i) mod 2^64 를 누적합 차이로 모든 문자열에 대해 구하고,
+#   시작 위치만큼 밀린 P^start 는 P 의 역원(mod 2^64, P 가 홀수라 존재)의 거듭제곱을 곱해서 되돌린다.
+# - 숫자 / bool: 값의 bit 를 그대로 쓴다.
+# - struct: 필드 hash 를 순서대로 섞는다.
+# - list: 원소 hash 를 원소 위치와 섞은 뒤 row 안에서 합한다. (누적합 차이, 길이도 섞는다)
+# - null 은 별도 상수
+# 같은 내용이면 batch 경계, slice 여부, 실행과 상관없이 같은 값이 나온다.
+
+MASK64 = (1 << 64) - 1
+POLY_BASE = 0x100000001B3
+NULL_HASH = 0x9E3779B97F4A7C15
+
+
+def _u64(value: int):
+    import numpy as np
+
+    return np.uint64(value & MASK64)
+
+
+def mix(x):
+    """
+    splitmix64 finalizer on a uint64 array.
+    """
+    import numpy as np
+
+    with np.errstate(over="ignore"):
+        x = x + _u64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> _u64(30))) * _u64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> _u64(27))) * _u64(0x94D049BB133111EB)
+        return x ^ (x >> _u64(31))
+
+
+def _pow_mod64(base: int, exponents):
+    """
+    base ** exponents mod 2^64 for a uint64 array of exponents (square-and-multiply).
+    """
+    import numpy as np
+
+    result = np.ones(len(exponents), dtype=np.uint64)
+    exponents = exponents.astype(np.uint64)
+    factor = base & MASK64
+    with np.errstate(over="ignore"):
+        while exponents.any():
+            odd = (exponents & _u64(1)).astype(bool)
+            result[odd] *= _u64(factor)
+            exponents >>= _u64(1)
+            factor = factor * factor & MASK64
+    return result
+
+
+# P^0, P^1, ... 를 한 번 계산해두고 컬럼마다 다시 쓴다. (필요하면 두 배씩 늘린다)
+_power_cache = None
+
+
+def _powers(n: int):
+    import numpy as np
+
+    global _power_cache
+    if _power_cache is None or len(_power_cache) < n:
+        size = max(n, 2 * len(_power_cache) if _power_cache is not None else 1 << 16)
+        powers = np.full(size, _u64(POLY_BASE), dtype=np.uint64)
+        powers[0] = 1
+        with np.errstate(over="ignore"):
+            np.cumprod(powers, out=powers)
+        _power_cache = powers
+    return _power_cache[:n]
+
+
+def _segment_sums(values, offsets):
+    """
+    Sums of values[offsets[i]:offsets[i + 1]] mod 2^64.
+    """
+    import numpy as np
+
+    sums = np.zeros(len(values) + 1, dtype=np.uint64)
+    np.cumsum(values, dtype=np.uint64, out=sums[1:])
+    with np.errstate(over="ignore"):
+        return sums[offsets[1:]] - sums[offsets[:-1]]
+
+
+def _null_mask(array):
+    if array.null_count == 0:
+        return None
+    return array.is_null().to_numpy(zero_copy_only=False)
+
+
+def _hash_binary(array):
+    import numpy as np
+    import pyarrow as pa
+
+    large = pa.types.is_large_string(array.type) or pa.types.is_large_binary(array.type)
+    buffers = array.buffers()
+    offsets = np.frombuffer(buffers[1], dtype=np.int64 if large else np.int32)
+    offsets = offsets[array.offset : array.offset + len(array) + 1].astype(np.int64)
+    data = (
+        np.frombuffer(buffers[2], dtype=np.uint8)
+        if buffers[2] is not None
+        else np.zeros(0, dtype=np.uint8)
+    )
+    data = data[offsets[0] : offsets[-1]]
+    starts = offsets[:-1] - offsets[0]
+    lengths = np.diff(offsets).astype(np.uint64)
+
+    with np.errstate(over="ignore"):
+        # weighted[k] = b[k] * P^k
+        weighted = _powers(len(data)) * data
+        sums = _segment_sums(weighted, offsets - offsets[0])
+        # P^-start 를 곱해서 문자열 시작 기준으로 맞춘다.
+        hashes = sums * _pow_mod64(pow(POLY_BASE, -1, 1 << 64), starts)
+        return mix(hashes ^ mix(lengths))
+
+
+def _hash_list(array):
+    import numpy as np
+
+    offsets = array.offsets.to_numpy().astype(np.int64)
+    values = array.values.slice(offsets[0], offsets[-1] - offsets[0])
+    offsets = offsets - offsets[0]
+    lengths = np.diff(offsets)
+    # 원소의 row 안 위치
+    positions = np.arange(len(values), dtype=np.int64) - np.repeat(
+        offsets[:-1], lengths
+    )
+    with np.errstate(over="ignore"):
+        elements = mix(hash_array(values) + mix(positions.astype(np.uint64)))
+        return mix(_segment_sums(elements, offsets) ^ mix(lengths.astype(np.uint64)))
+
+
+def hash_array(array):
+    """
+    Per-element uint64 content hashes of an Arrow array or chunked array.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if isinstance(array, pa.ChunkedArray):
+        if array.num_chunks == 0:
+            return np.zeros(0, dtype=np.uint64)
+        return np.concatenate([hash_array(chunk) for chunk in array.chunks])
+
+    t = array.type
+    if pa.types.is_dictionary(t):
+        array = array.dictionary_decode()
+        t = array.type
+    if (
+        pa.types.is_string(t)
+        or pa.types.is_large_string(t)
+        or pa.types.is_binary(t)
+        or pa.types.is_large_binary(t)
+    ):
+        hashes = _hash_binary(array)
+    elif pa.types.is_list(t) or pa.types.is_large_list(t):
+        hashes = _hash_list(array)
+    elif pa.types.is_struct(t):
+        hashes = np.full(len(array), _u64(t.num_fields), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for i in range(t.num_fields):
+                hashes = mix(
+                    hashes * _u64(POLY_BASE) + hash_array(pc.struct_field(array, i))
+                )
+    elif pa.types.is_boolean(t):
+        values = pc.fill_null(array, False).to_numpy(zero_copy_only=False)
+        hashes = mix(values.astype(np.uint64))
+    elif pa.types.is_floating(t):
+        values = pc.fill_null(array.cast(pa.float64()), 0).to_numpy()
+        hashes = mix(values.view(np.uint64))
+    elif pa.types.is_integer(t) or pa.types.is_temporal(t):
+        values = pc.fill_null(array.cast(pa.int64()), 0).to_numpy()
+        hashes = mix(values.view(np.uint64))
+    elif pa.types.is_null(t):
+        hashes = np.full(len(array), _u64(NULL_HASH), dtype=np.uint64)
+    else:
+        raise TypeError(f"Cannot hash Arrow type {t}")
+
+    nulls = _null_mask(array)
+    if nulls is not None:
+        hashes = hashes.copy()
+        hashes[nulls] = _u64(NULL_HASH)
+    return hashes
+
+
+def hash_table(table, columns: list[str] | None = None) -> tuple:
+    """
+    Returns (row hashes, {column: hashes}) for a pyarrow Table or RecordBatch.
+    """
+    import numpy as np
+
+    columns = columns or table.schema.names
+    column_hashes = {name: hash_array(table.column(name)) for name in columns}
+    row_hashes = np.full(table.num_rows, _u64(len(columns)), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for name in columns:
+            row_hashes = mix(row_hashes * _u64(POLY_BASE) + column_hashes[name])
+    return row_hashes, column_hashes
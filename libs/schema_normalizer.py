@@ -0,0 +1,94 @@
+import copy
+import hashlib
+import json
+
+# tool parameters JSON Schema 정규화
+#
+# 규칙 하나하나를 pass 로 등록하고(@schema_pass), 선택한 pass 들을 스키마를 한 번 도는
+# 반복(비재귀) 순회 안에서 노드마다 차례로 적용한다.
+# 같은 스키마는 hash 로 memoize 해서 한 번만 정규화하고, 호출자에게는 항상 새 복사본을 준다.
+
+SCHEMA_PASSES = {}
+
+# 캐시 항목 수 상한 (넘으면 비운다)
+CACHE_SIZE = 100_000
+
+_cache = {}
+
+
+def schema_pass(name: str):
+    """
+    Registers fn(node: dict) as a normalization pass. Passes mutate the node in place.
+    """
+
+    def register(fn):
+        SCHEMA_PASSES[name] = fn
+        return fn
+
+    return register
+
+
+@schema_pass("dedupe_string_lists")
+def dedupe_string_lists(node: dict):
+    # 문자열 리스트는 중복을 제거하고, 하나만 남으면 문자열로 바꾼다.
+    for key, value in list(node.items()):
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            deduped = list(dict.fromkeys(value))
+            if len(deduped) == 1:
+                node[key] = deduped[0]
+            elif len(deduped) < len(value):
+                node[key] = deduped
+
+
+@schema_pass("array_items")
+def array_items(node: dict):
+    # array 타입인데 items 가 없으면 items: {} 추가 (prefixItems 가 있어도 동일)
+    schema_type = node.get("type")
+    is_array = schema_type == "array" or (
+        isinstance(schema_type, list) and "array" in schema_type
+    )
+    if is_array and "items" not in node:
+        node["items"] = {}
+
+
+# type 1 (OpenAI 형식) tool 의 properties
+TYPE1_PASSES = ("dedupe_string_lists", "array_items")
+# type 2 (xlam 형식) 타입 문자열에서 pydantic 으로 만든 스키마
+TYPE2_PASSES = ("array_items",)
+
+
+def _apply_passes(schema, passes: tuple):
+    functions = [SCHEMA_PASSES[name] for name in passes]
+    stack = [schema]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        for fn in functions:
+            fn(node)
+        for value in node.values():
+            if isinstance(value, dict):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(item for item in value if isinstance(item, dict))
+    return schema
+
+
+def normalize_schema(schema, passes: tuple = TYPE1_PASSES):
+    """
+    Returns a normalized copy of schema; the input is not modified.
+    """
+    try:
+        encoded = json.dumps(schema)
+    except (TypeError, ValueError):
+        # JSON 으로 직렬화할 수 없는 값이 섞인 스키마는 캐시 없이 처리
+        return _apply_passes(copy.deepcopy(schema), passes)
+
+    key = (passes, hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).digest())
+    normalized = _cache.get(key)
+    if normalized is None:
+        normalized = json.dumps(_apply_passes(json.loads(encoded), passes))
+        if len(_cache) >= CACHE_SIZE:
+            _cache.clear()
+        _cache[key] = normalized
+    return json.loads(normalized)
@@ -0,0 +1,192 @@
+import json
+import os
+import shutil
+from functools import cache
+
+# upstream 데이터셋의 로컬 스냅샷 저장소
+#
+# snapshot.py 가 SOURCES 의 각 데이터셋을 고정된 revision(commit sha)으로 한 번 받아서
+# ./snapshots/<key>/ 에 Arrow 파일로 저장하고, revision 과 파일 sha256 을 lockfile 에 기록한다.
+# 컨버터는 load_source(key) 로 읽는데, 스냅샷이 있으면 네트워크/HF 캐시 확인 없이
+# Arrow 파일을 memory-map 하고, 없으면 lockfile 의 revision 으로 load_dataset 한다.
+
+SNAPSHOT_DIR = os.getenv("DATASET_SNAPSHOT_DIR", "./snapshots")
+LOCKFILE = os.getenv("DATASET_LOCKFILE", "./datasets.lock.json")
+
+SNAPSHOT_INFO = "snapshot.json"
+
+HERMES_FILES = [
+    "func-calling.json",
+    "func-calling-singleturn.json",
+    "glaive-function-calling-5k.json",
+]
+
+# key -> load_dataset 인자
+SOURCES = {
+    "xlam-function-calling-60k": {"path": "Salesforce/xlam-function-calling-60k"},
+    "xlam-irrelevance-7.5k": {"path": "MadeAgents/xlam-irrelevance-7.5k"},
+    "toolace": {"path": "Team-ACE/ToolACE"},
+    "apigen-mt-5k": {"path": "Salesforce/APIGen-MT-5k"},
+    "dolphin-r1-korean-deepseek": {
+        "path": "exp-models/dolphin-r1-korean-deepseek-toolcalls",
+        "data_files": "data/*.parquet",
+    },
+    **{
+        f"hermes-{file.split('.')[0]}": {
+            "path": "NousResearch/hermes-function-calling-v1",
+            "data_files": {"train": [file]},
+        }
+        for file in HERMES_FILES
+    },
+}
+
+
+def get_source(key: str) -> dict:
+    if key not in SOURCES:
+        raise KeyError(f"Unknown source '{key}' (available: {', '.join(SOURCES)})")
+    return SOURCES[key]
+
+
+def snapshot_path(key: str, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, key)
+
+
+def read_lockfile(path: str = LOCKFILE) -> dict:
+    if not os.path.exists(path):
+        return {"sources": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_lockfile(lock: dict, path: str = LOCKFILE):
+    lock["sources"] = dict(sorted(lock["sources"].items()))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_info(key: str, snapshot_dir: str = SNAPSHOT_DIR) -> dict | None:
+    path = os.path.join(snapshot_path(key, snapshot_dir), SNAPSHOT_INFO)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@cache
+def resolve_revision(path: str) -> str:
+    """
+    Returns the current commit sha of a dataset repository on the Hub.
+    """
+    from huggingface_hub import HfApi
+
+    return HfApi().dataset_info(path).sha
+
+
+def snapshot_files(directory: str) -> dict:
+    """
+    Returns {relative path: sha256} of the files save_to_disk wrote into directory.
+    """
+    from libs.parquet_shards import file_sha256
+
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            if name == SNAPSHOT_INFO:
+                continue
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, directory)] = file_sha256(path)
+    return dict(sorted(files.items()))
+
+
+def snapshot_source(
+    key: str, revision: str | None = None, snapshot_dir: str = SNAPSHOT_DIR
+) -> dict:
+    """
+    Downloads a source at revision (latest if None) and saves it under
+    snapshot_dir/key. Returns the lockfile entry.
+    """
+    from datasets import load_dataset
+
+    source = get_source(key)
+    revision = revision or resolve_revision(source["path"])
+    kwargs = {k: v for k, v in source.items() if k != "path"}
+    dataset = load_dataset(source["path"], revision=revision, **kwargs)
+
+    # 중간에 실패해도 이전 스냅샷이 깨지지 않도록 임시 디렉터리에 쓴 뒤 교체한다.
+    target = snapshot_path(key, snapshot_dir)
+    tmp_target = f"{target}.tmp"
+    shutil.rmtree(tmp_target, ignore_errors=True)
+    dataset.save_to_disk(tmp_target)
+
+    entry = dict(
+        source,
+        revision=revision,
+        splits={split: dataset[split].num_rows for split in dataset},
+        files=snapshot_files(tmp_target),
+    )
+    with open(os.path.join(tmp_target, SNAPSHOT_INFO), "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_target, target)
+    return entry
+
+
+def verify_snapshot(key: str, entry: dict, snapshot_dir: str = SNAPSHOT_DIR) -> list:
+    """
+    Compares a snapshot on disk with its lockfile entry. Returns a list of problems.
+    """
+    info = read_snapshot_info(key, snapshot_dir)
+    if info is None:
+        return ["snapshot missing"]
+    if info["revision"] != entry["revision"]:
+        return [f"snapshot is at {info['revision']}, lockfile pins {entry['revision']}"]
+
+    problems = []
+    files = snapshot_files(snapshot_path(key, snapshot_dir))
+    for name, sha256 in entry["files"].items():
+        if name not in files:
+            problems.append(f"{name} missing")
+        elif files[name] != sha256:
+            problems.append(f"{name} checksum mismatch")
+    problems.extend(f"{name} not in lockfile" for name in files.keys() - entry["files"])
+    return problems
+
+
+def load_source(key: str, snapshot_dir: str = SNAPSHOT_DIR, lockfile: str = LOCKFILE):
+    """
+    Loads a source as a DatasetDict.
+
+    The local snapshot is memory-mapped when it matches the revision pinned in the
+    lockfile. Otherwise the pinned revision (or the latest one, if the source is not
+    locked) is loaded with load_dataset.
+    """
+    source = get_source(key)
+    entry = read_lockfile(lockfile)["sources"].get(key)
+    info = read_snapshot_info(key, snapshot_dir)
+
+    if info is not None and (entry is None or info["revision"] == entry["revision"]):
+        from datasets import load_from_disk
+
+        return load_from_disk(snapshot_path(key, snapshot_dir))
+
+    if info is not None:
+        raise ValueError(
+            f"Snapshot of '{key}' is at revision {info['revision']}, but the lockfile "
+            f"pins {entry['revision']}. Run: python snapshot.py {key}"
+        )
+    if os.getenv("HF_HUB_OFFLINE") == "1" or os.getenv("HF_DATASETS_OFFLINE") == "1":
+        raise FileNotFoundError(
+            f"No snapshot of '{key}' in {snapshot_dir} and the Hub is offline. "
+            f"Run: python snapshot.py {key}"
+        )
+
+    from datasets import load_dataset
+
+    kwargs = {k: v for k, v in source.items() if k != "path"}
+    if entry is not None:
+        kwargs["revision"] = entry["revision"]
+    return load_dataset(source["path"], **kwargs)
@@ -0,0 +1,301 @@
+import json
+import random
+import uuid
+
+# parser-bench.py 용 합성 입력 생성기
+# 각 함수는 실제 소스 데이터셋과 같은 모양의 row를 만든다. (네트워크/다운로드 없이 로컬에서 생성)
+
+WORDS = (
+    "weather stock price news flight hotel movie recipe translate convert "
+    "currency distance restaurant music playlist calendar reminder email "
+    "search product review order shipping invoice payment account profile"
+).split()
+
+KOREAN_WORDS = "날씨 주식 가격 뉴스 항공편 호텔 영화 레시피 번역 환율 거리 음식점 음악 일정".split()
+
+TYPE2_TYPES = [
+    "str",
+    "int",
+    "float",
+    "bool",
+    "List[str]",
+    "List[int]",
+    "Dict[str, Any]",
+    "Optional[str]",
+    "str, optional",
+    "int, optional",
+    "List[Dict[str, Any]]",
+    "Tuple[float, float]",
+]
+
+
+def _sentence(rng: random.Random, n_words: int, words=WORDS) -> str:
+    return " ".join(rng.choice(words) for _ in range(n_words))
+
+
+def _tool_name(rng: random.Random, separator: str = "_") -> str:
+    return separator.join(rng.sample(WORDS, 2))
+
+
+def _arguments(rng: random.Random, param_names: list[str]) -> dict:
+    arguments = {}
+    for name in param_names:
+        kind = rng.random()
+        if kind < 0.5:
+            arguments[name] = _sentence(rng, rng.randint(1, 3))
+        elif kind < 0.8:
+            arguments[name] = rng.randint(0, 10_000)
+        else:
+            arguments[name] = [rng.choice(WORDS) for _ in range(rng.randint(1, 4))]
+    return arguments
+
+
+def _type2_default(rng: random.Random, type_str: str):
+    if type_str.startswith("int"):
+        return rng.choice([rng.randint(0, 100), str(rng.randint(0, 100)), ""])
+    if type_str.startswith("float"):
+        return rng.choice([round(rng.random() * 10, 2), "1.5"])
+    if type_str.startswith("bool"):
+        return rng.choice([True, "true", "false"])
+    if type_str.startswith("str"):
+        return rng.choice(WORDS)
+    return None
+
+
+def type2_parameters(rng: random.Random, n_params: int) -> dict:
+    """
+    xlam style (type 2) parameters: {"name": {"description", "type": "str, optional", "default"}}
+    """
+    parameters = {}
+    for name in rng.sample(WORDS, n_params):
+        type_str = rng.choice(TYPE2_TYPES)
+        value = {"description": _sentence(rng, rng.randint(4, 12)), "type": type_str}
+        if "optional" in type_str or rng.random() < 0.3:
+            value["default"] = _type2_default(rng, type_str)
+        parameters[name] = value
+    return parameters
+
+
+def type1_tool(rng: random.Random, n_params: int) -> dict:
+    """
+    OpenAI style (type 1) tool definition.
+    """
+    properties = {}
+    for name in rng.sample(WORDS, n_params):
+        json_type = rng.choice(["string", "integer", "number", "boolean", "array"])
+        prop = {"type": json_type, "description": _sentence(rng, rng.randint(4, 10))}
+        if json_type == "string" and rng.random() < 0.3:
+            prop["enum"] = [rng.choice(WORDS) for _ in range(rng.randint(2, 5))]
+        properties[name] = prop
+    return {
+        "type": "function",
+        "function": {
+            "name": _tool_name(rng),
+            "description": _sentence(rng, rng.randint(6, 16)),
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties)[: rng.randint(0, n_params)],
+            },
+        },
+    }
+
+
+def xlam_row(rng: random.Random, idx: int) -> dict:
+    tools = [
+        {
+            "name": _tool_name(rng),
+            "description": _sentence(rng, rng.randint(6, 16)),
+            "parameters": type2_parameters(rng, rng.randint(1, 5)),
+        }
+        for _ in range(rng.randint(1, 4))
+    ]
+    answers = [
+        {
+            "name": tool["name"],
+            "arguments": _arguments(rng, list(tool["parameters"])),
+        }
+        for tool in rng.sample(tools, rng.randint(1, len(tools)))
+    ]
+    return {
+        "id": idx,
+        "query": _sentence(rng, rng.randint(8, 30)),
+        "answers": json.dumps(answers),
+        "tools": json.dumps(tools),
+    }
+
+
+def hermes_tool_call_text(rng: random.Random, n_calls: int) -> str:
+    blocks = []
+    for _ in range(n_calls):
+        call = {
+            "name": _tool_name(rng),
+            "arguments": _arguments(rng, rng.sample(WORDS, 2)),
+        }
+        blocks.append(f"<tool_call>\n{call!r}\n</tool_call>")
+    return "\n".join(blocks)
+
+
+def hermes_row(rng: random.Random, idx: int) -> dict:
+    tools = [type1_tool(rng, rng.randint(1, 4)) for _ in range(rng.randint(1, 3))]
+    system = (
+        "You are a function calling AI model. You are provided with function signatures "
+        f"within <tools></tools> XML tags.\n<tools>\n{tools!r}\n</tools>\n"
+        "For each function call return a json object with function name and arguments "
+        "within <tool_call></tool_call> XML tags."
+    )
+    conversations = [{"from": "system", "value": system}]
+    for _ in range(rng.randint(1, 3)):
+        n_calls = rng.randint(1, 3)
+        conversations.append(
+            {"from": "human", "value": _sentence(rng, rng.randint(8, 30))}
+        )
+        conversations.append(
+            {"from": "gpt", "value": hermes_tool_call_text(rng, n_calls)}
+        )
+        responses = []
+        for _ in range(n_calls):
+            response = {
+                "name": _tool_name(rng),
+                "content": _arguments(rng, rng.sample(WORDS, 3)),
+            }
+            responses.append(f"<tool_response>\n{response!r}\n</tool_response>")
+        conversations.append({"from": "tool", "value": "\n".join(responses)})
+        conversations.append(
+            {"from": "gpt", "value": _sentence(rng, rng.randint(10, 40))}
+        )
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "conversations": conversations,
+        "category": rng.choice(WORDS),
+        "subcategory": rng.choice(WORDS),
+        "task": _sentence(rng, 4),
+    }
+
+
+def toolace_call_text(rng: random.Random, n_calls: int) -> str:
+    calls = []
+    for _ in range(n_calls):
+        name = _tool_name(rng, separator=" ").title() + " API"
+        args = ", ".join(
+            f'{key}="{value}"' if isinstance(value, str) else f"{key}={value}"
+            for key, value in _arguments(
+                rng, rng.sample(WORDS, rng.randint(1, 4))
+            ).items()
+            if not isinstance(value, list)
+        )
+        calls.append(f"{name}({args})")
+    return "[" + ", ".join(calls) + "]"
+
+
+def toolace_row(rng: random.Random, idx: int) -> dict:
+    tools = [
+        {
+            "name": _tool_name(rng, separator=" ").title() + " API",
+            "description": _sentence(rng, rng.randint(6, 16)),
+            "parameters": {
+                "type": "dict",
+                "properties": {
+                    name: {"description": _sentence(rng, 5), "type": "string"}
+                    for name in rng.sample(WORDS, rng.randint(1, 4))
+                },
+                "required": [],
+            },
+        }
+        for _ in range(rng.randint(1, 4))
+    ]
+    system = (
+        "You are an expert in composing functions. Here is a list of functions in JSON "
+        f"format that you can invoke:\n{json.dumps(tools)}. Should you decide to return "
+        "the function call(s), put it in the format of [func1(params_name=params_value)]"
+    )
+    n_calls = rng.randint(1, 3)
+    conversations = [
+        {"from": "user", "value": _sentence(rng, rng.randint(8, 30))},
+        {"from": "assistant", "value": toolace_call_text(rng, n_calls)},
+        {
+            "from": "tool",
+            "value": json.dumps(
+                [
+                    {
+                        "name": _tool_name(rng),
+                        "results": _arguments(rng, rng.sample(WORDS, 3)),
+                    }
+                    for _ in range(n_calls)
+                ]
+            ),
+        },
+        {"from": "assistant", "value": _sentence(rng, rng.randint(10, 40))},
+    ]
+    return {"system": system, "conversations": conversations}
+
+
+def bfcl_pair(rng: random.Random, idx: int) -> tuple[dict, dict]:
+    functions = []
+    for _ in range(rng.randint(1, 4)):
+        function = type1_tool(rng, rng.randint(1, 4))["function"]
+        function["name"] = _tool_name(rng, separator=".")
+        function["parameters"]["type"] = "dict"
+        functions.append(function)
+    ground_truth = [
+        {
+            function["name"]: {
+                name: [value, ""] if rng.random() < 0.3 else [value]
+                for name, value in _arguments(
+                    rng, list(function["parameters"]["properties"])
+                ).items()
+            }
+        }
+        for function in rng.sample(functions, rng.randint(1, len(functions)))
+    ]
+    input_data = {
+        "id": f"simple_{idx}",
+        "question": [[{"role": "user", "content": _sentence(rng, rng.randint(8, 30))}]],
+        "function": functions,
+    }
+    answer_data = {"id": f"simple_{idx}", "ground_truth": ground_truth}
+    return input_data, answer_data
+
+
+def dolphin_row(rng: random.Random, idx: int) -> dict:
+    tools = []
+    for _ in range(rng.randint(1, 3)):
+        if rng.random() < 0.5:
+            tools.append(type1_tool(rng, rng.randint(1, 4)))
+        else:
+            tools.append(
+                {
+                    "name": _tool_name(rng),
+                    "description": _sentence(rng, rng.randint(6, 16)),
+                    "parameters": type2_parameters(rng, rng.randint(1, 4)),
+                }
+            )
+    calls = [
+        {"name": _tool_name(rng), "arguments": _arguments(rng, rng.sample(WORDS, 2))}
+        for _ in range(rng.randint(1, 3))
+    ]
+    thinking = _sentence(rng, rng.randint(40, 200), KOREAN_WORDS)
+    return {
+        "messages": [
+            {
+                "role": "system",
+                "content": f"You are a function calling AI model.\n<tools>\n{json.dumps(tools)}\n</tools>",
+                "translated_content": None,
+            },
+            {
+                "role": "user",
+                "content": _sentence(rng, rng.randint(8, 30)),
+                "translated_content": _sentence(rng, rng.randint(8, 30), KOREAN_WORDS),
+            },
+            {
+                "role": "assistant",
+                "content": "",
+                "translated_content": f"<think>\n{thinking}\n</think>\n<tool_call>\n{calls!r}\n</tool_call>",
+            },
+        ]
+    }
+
+
+def generate(row_fn, n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [row_fn(rng, idx) for idx in range(n)]
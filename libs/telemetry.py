@@ -0,0 +1,282 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+
+# 오래 걸리는 LLM 단계의 처리량 / 지연 시간 telemetry
+#
+# 요청마다 request_started() / request_finished() 를 부르면, 백그라운드 스레드가 interval 초마다
+# ./telemetry/<name>.json 과 Prometheus textfile(./telemetry/<name>.prom) 을 덮어쓴다.
+# node_exporter 의 textfile collector 가 이 디렉터리를 읽게 하면 실행 중에 바로 볼 수 있다.
+#
+# 비율(req/s, tokens/s)과 지연 시간 분위수는 최근 window 초 기준과 전체 기준을 같이 낸다.
+
+TELEMETRY_DIR = "./telemetry"
+
+METRIC_PREFIX = "dataset_sanitizer"
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(values: list, q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Telemetry:
+    """
+    Request counters, latency percentiles, token rates and error classes of one run.
+
+    Call start() to write snapshots every interval seconds and close() to write the
+    final snapshot and print the summary.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        output_dir: str = TELEMETRY_DIR,
+        interval: float = 10.0,
+        window: float = 60.0,
+        reservoir_size: int = 100_000,
+    ):
+        self.name = name
+        self.output_dir = output_dir
+        self.interval = interval
+        self.window = window
+        self.reservoir_size = reservoir_size
+
+        self.started = time.monotonic()
+        self.finished = None
+        self.in_flight = 0
+        self.requests = 0
+        self.tokens = Counter()
+        self.errors = Counter()
+        # (완료 시각, 지연 시간, prompt tokens, completion tokens, error class)
+        self.recent = deque()
+        # 전체 지연 시간 분위수는 reservoir sample 로 계산한다.
+        self.latencies = []
+        self.gauges = {}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def gauge(self, name: str, fn):
+        """
+        Adds a value read at snapshot time, e.g. the current concurrency limit.
+        """
+        self.gauges[name] = fn
+
+    def start(self):
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write_snapshot()
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(
+        self,
+        latency: float,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        error: str | None = None,
+    ):
+        """
+        Records one finished request. error is the error class of a failed request
+        (e.g. "throttled", "server", "timeout" or the exception name).
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.tokens["prompt"] += prompt_tokens or 0
+            self.tokens["completion"] += completion_tokens or 0
+            if error:
+                self.errors[error] += 1
+            self.recent.append(
+                (now, latency, prompt_tokens or 0, completion_tokens or 0, error)
+            )
+            self._trim(now)
+
+            if len(self.latencies) < self.reservoir_size:
+                self.latencies.append(latency)
+            else:
+                slot = random.randrange(self.requests)
+                if slot < self.reservoir_size:
+                    self.latencies[slot] = latency
+
+    def _trim(self, now: float):
+        while self.recent and self.recent[0][0] < now - self.window:
+            self.recent.popleft()
+
+    def snapshot(self) -> dict:
+        now = self.finished or time.monotonic()
+        with self._lock:
+            self._trim(now)
+            recent = list(self.recent)
+            latencies = list(self.latencies)
+            elapsed = now - self.started
+            snapshot = {
+                "name": self.name,
+                "elapsed_s": elapsed,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "errors": dict(self.errors),
+                "tokens": dict(self.tokens),
+            }
+
+        span = min(self.window, elapsed) or None
+        requests, tokens = snapshot["requests"], snapshot["tokens"]
+        recent_errors = Counter(r[4] for r in recent if r[4])
+        snapshot["total"] = {
+            "requests_per_sec": requests / elapsed if elapsed else None,
+            "prompt_tokens_per_sec": (
+                tokens.get("prompt", 0) / elapsed if elapsed else None
+            ),
+            "completion_tokens_per_sec": (
+                tokens.get("completion", 0) / elapsed if elapsed else None
+            ),
+            "error_rate": (
+                sum(snapshot["errors"].values()) / requests if requests else None
+            ),
+            "latency_s": {str(q): percentile(latencies, q) for q in QUANTILES},
+        }
+        snapshot["window"] = {
+            "seconds": self.window,
+            "requests_per_sec": len(recent) / span if span else None,
+            "prompt_tokens_per_sec": sum(r[2] for r in recent) / span if span else None,
+            "completion_tokens_per_sec": (
+                sum(r[3] for r in recent) / span if span else None
+            ),
+            "error_rate": sum(recent_errors.values()) / len(recent) if recent else None,
+            "errors": dict(recent_errors),
+            "latency_s": {
+                str(q): percentile([r[1] for r in recent], q) for q in QUANTILES
+            },
+        }
+        snapshot["gauges"] = {name: fn() for name, fn in self.gauges.items()}
+        return snapshot
+
+    def prometheus(self, snapshot: dict) -> str:
+        run = self.name.replace("\\", "\\\\").replace('"', '\\"')
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                label_text = ",".join(
+                    [f'run="{run}"'] + [f'{k}="{v}"' for k, v in labels.items()]
+                )
+                lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {value}")
+
+        window = snapshot["window"]
+        metric(
+            "requests_total",
+            "counter",
+            "Finished requests",
+            [({}, snapshot["requests"])],
+        )
+        metric(
+            "request_errors_total",
+            "counter",
+            "Failed requests by error class",
+            [({"class": k}, v) for k, v in snapshot["errors"].items()],
+        )
+        metric(
+            "tokens_total",
+            "counter",
+            "Tokens by kind",
+            [({"kind": k}, v) for k, v in snapshot["tokens"].items()],
+        )
+        metric(
+            "in_flight", "gauge", "Requests in flight", [({}, snapshot["in_flight"])]
+        )
+        metric(
+            "requests_per_second",
+            "gauge",
+            f"Requests per second over the last {self.window:g}s",
+            [({}, window["requests_per_sec"])],
+        )
+        metric(
+            "tokens_per_second",
+            "gauge",
+            f"Tokens per second over the last {self.window:g}s",
+            [
+                ({"kind": "prompt"}, window["prompt_tokens_per_sec"]),
+                ({"kind": "completion"}, window["completion_tokens_per_sec"]),
+            ],
+        )
+        metric(
+            "request_latency_seconds",
+            "gauge",
+            f"Request latency quantiles over the last {self.window:g}s",
+            [({"quantile": q}, v) for q, v in window["latency_s"].items()],
+        )
+        for name, value in snapshot["gauges"].items():
+            metric(name, "gauge", name.replace("_", " ").capitalize(), [({}, value)])
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self) -> dict:
+        snapshot = self.snapshot()
+        os.makedirs(self.output_dir, exist_ok=True)
+        # textfile collector 가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓰고 교체한다.
+        for suffix, text in (
+            (".json", json.dumps(snapshot, indent=2)),
+            (".prom", self.prometheus(snapshot)),
+        ):
+            path = os.path.join(self.output_dir, f"{self.name}{suffix}")
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(f"{path}.tmp", path)
+        return snapshot
+
+    def close(self) -> dict:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.finished = time.monotonic()
+        snapshot = self.write_snapshot()
+        self.print_summary(snapshot)
+        return snapshot
+
+    def print_summary(self, snapshot: dict | None = None):
+        s = snapshot or self.snapshot()
+        total = s["total"]
+
+        def seconds(value):
+            return f"{value:.2f}s" if value is not None else "-"
+
+        def rate(value):
+            return f"{value:.1f}" if value is not None else "-"
+
+        latency = " ".join(
+            f"p{float(q) * 100:g} {seconds(v)}" for q, v in total["latency_s"].items()
+        )
+        errors = (
+            ", ".join(f"{k}: {v}" for k, v in sorted(s["errors"].items())) or "none"
+        )
+        print(
+            f"[{self.name}] {s['requests']} requests in {s['elapsed_s']:.1f}s "
+            f"({rate(total['requests_per_sec'])} req/s), latency {latency}"
+        )
+        print(
+            f"[{self.name}] tokens/s prompt {rate(total['prompt_tokens_per_sec'])}, "
+            f"completion {rate(total['completion_tokens_per_sec'])}; errors: {errors}"
+        )
+        print(
+            f"Telemetry saved to {os.path.join(self.output_dir, self.name)}.json/.prom"
+        )
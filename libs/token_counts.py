@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+
+# 로컬 tokenizer 파일(tokenizer.json)로 parsed 출력의 row 별 token 수를 센다.
+#
+# - messages 는 chat template 없이 "role\ncontent" 형태로, tools 는 저장된 JSON 문자열 그대로 센다.
+# - chat template 이 주어지면 messages + tools 를 템플릿으로 렌더링한 전체 token 수도 센다.
+#   (packing 에 쓰는 tokens 는 템플릿이 있으면 렌더링 결과, 없으면 messages + tools)
+# - 결과는 row 내용 hash(blake2b 64bit) 로 캐시한다. 캐시 파일은 tokenizer 파일 / 템플릿마다 따로
+#   (<cache_dir>/<fingerprint>.npz) 이고, 다시 돌리면 바뀐 row 만 tokenizer 를 거친다.
+
+TOKEN_STATS_DIR = "./token-stats"
+CACHE_DIR = os.path.join(TOKEN_STATS_DIR, "cache")
+
+# 히스토그램 구간 (0, 128, 256, ..., 131072 token), 마지막 구간은 그 이상 전부
+HISTOGRAM_EDGES = [0] + [2**i for i in range(7, 18)]
+
+# tokens, messages_tokens, tools_tokens
+COUNT_FIELDS = ("tokens", "messages_tokens", "tools_tokens")
+
+
+def fingerprint(
+    tokenizer_path: str,
+    template_source: str | None = None,
+    special_tokens: dict | None = None,
+) -> str:
+    """
+    Identifies what the counts depend on: the tokenizer file and the chat template.
+    """
+    digest = hashlib.sha256()
+    with open(tokenizer_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    digest.update(b"\x00")
+    if template_source is not None:
+        digest.update(template_source.encode("utf-8"))
+        digest.update(json.dumps(special_tokens or {}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def row_key(messages: list, tools: str | None) -> int:
+    encoded = json.dumps(messages, ensure_ascii=False, separators=(",", ":"))
+    encoded += "\x00" + (tools or "")
+    return int.from_bytes(
+        hashlib.blake2b(encoded.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def render_messages(messages: list) -> str:
+    """
+    Template-free rendering of canonical messages: role, content, reasoning and tool calls.
+    """
+    parts = []
+    for message in messages:
+        parts.append(message["role"])
+        for key in ("reasoning_content", "content"):
+            if message.get(key):
+                parts.append(message[key])
+        if message.get("tool_calls"):
+            parts.append(json.dumps(message["tool_calls"], ensure_ascii=False))
+    return "\n".join(parts)
+
+
+class TokenCache:
+    """
+    Row key -> (tokens, messages_tokens, tools_tokens), stored as sorted numpy arrays.
+    """
+
+    def __init__(self, path: str | None):
+        import numpy as np
+
+        self.path = path
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.counts = np.zeros((0, len(COUNT_FIELDS)), dtype=np.int32)
+        self._new_keys = []
+        self._new_counts = []
+        if path and os.path.exists(path):
+            with np.load(path) as data:
+                self.keys = data["keys"]
+                self.counts = data["counts"]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """
+        Returns (found mask, counts) for a uint64 array of row keys.
+        """
+        import numpy as np
+
+        counts = np.full((len(keys), len(COUNT_FIELDS)), -1, dtype=np.int32)
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool), counts
+        positions = np.searchsorted(self.keys, keys)
+        positions = np.minimum(positions, len(self.keys) - 1)
+        found = self.keys[positions] == keys
+        counts[found] = self.counts[positions[found]]
+        return found, counts
+
+    def add(self, key: int, counts: tuple):
+        self._new_keys.append(key)
+        self._new_counts.append(counts)
+
+    def save(self):
+        import numpy as np
+
+        if not self.path or not self._new_keys:
+            return
+        keys = np.concatenate([self.keys, np.array(self._new_keys, dtype=np.uint64)])
+        counts = np.concatenate(
+            [self.counts, np.array(self._new_counts, dtype=np.int32)]
+        )
+        keys, first = np.unique(keys, return_index=True)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, keys=keys, counts=counts[first])
+        os.replace(tmp_path, self.path)
+        self.keys, self.counts = keys, counts[first]
+        self._new_keys, self._new_counts = [], []
+
+
+def histogram(tokens) -> list[dict]:
+    """
+    Row counts per HISTOGRAM_EDGES bucket for an array of token counts (-1 = not counted).
+    """
+    import numpy as np
+
+    tokens = tokens[tokens >= 0]
+    top = max(int(tokens.max()) if len(tokens) else 0, HISTOGRAM_EDGES[-1]) + 1
+    edges = HISTOGRAM_EDGES + [top]
+    counts, _ = np.histogram(tokens, bins=edges)
+    return [
+        {"min": int(low), "max": int(high) - 1, "rows": int(count)}
+        for low, high, count in zip(edges[:-1], edges[1:], counts)
+    ]
+
+
+# ProcessPoolExecutor worker 쪽 상태 (initializer 에서 한 번만 로드)
+_worker_tokenizer = None
+_worker_template = None
+_worker_special_tokens = None
+
+
+def init_worker(
+    tokenizer_path: str,
+    template_source: str | None = None,
+    special_tokens: dict | None = None,
+):
+    global _worker_tokenizer, _worker_template, _worker_special_tokens
+    # 프로세스마다 병렬로 돌리므로 tokenizer 내부 thread pool 은 끈다.
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        raise ImportError(
+            "Counting tokens needs tokenizers (uv sync --extra tokenizer)"
+        ) from None
+
+    _worker_tokenizer = Tokenizer.from_file(tokenizer_path)
+    if template_source is not None:
+        from libs.chat_template import compile_template
+
+        _worker_template = compile_template(template_source)
+        _worker_special_tokens = special_tokens or {}
+
+
+def count_rows(chunk: tuple) -> tuple:
+    """
+    Counts tokens for (name, [(row_index, messages, tools JSON), ...]) in a worker.
+    Returns (name, [(row_index, (tokens, messages_tokens, tools_tokens) or None, error or None), ...]).
+    """
+    from libs.chat_template import render
+
+    name, rows = chunk
+    texts, results, pending = [], [], []
+    for row_index, messages, tools in rows:
+        try:
+            row_texts = [render_messages(messages), tools or ""]
+            if _worker_template is not None:
+                row_texts.append(
+                    render(
+                        _worker_template,
+                        messages,
+                        json.loads(tools) if tools else None,
+                        _worker_special_tokens,
+                    )
+                )
+        except Exception as e:
+            results.append((row_index, None, f"{type(e).__name__}: {e}"))
+            continue
+        pending.append((row_index, len(texts), len(row_texts)))
+        texts.extend(row_texts)
+
+    encode = getattr(
+        _worker_tokenizer, "encode_batch_fast", _worker_tokenizer.encode_batch
+    )
+    lengths = [
+        len(encoding.ids) for encoding in encode(texts, add_special_tokens=False)
+    ]
+    for row_index, start, n in pending:
+        messages_tokens, tools_tokens = lengths[start], lengths[start + 1]
+        tokens = lengths[start + 2] if n == 3 else messages_tokens + tools_tokens
+        results.append((row_index, (tokens, messages_tokens, tools_tokens), None))
+    return name, results
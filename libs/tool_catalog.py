@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from libs.parquet_shards import list_manifests
+
+# ./parsed 출력 전체의 tool 정의 카탈로그 (SQLite)
+#
+# - tools: 정규화(canonical JSON)된 tool 정의와 그 sha256, 이름
+# - files: 카탈로그에 반영된 샤드 파일과 sha256 (같은 sha256이면 다시 읽지 않음 -> 증분 빌드)
+# - postings: tool -> (샤드 파일, 샤드 내 row) 목록
+#
+# 데이터셋 기준 row 번호는 files.row_offset + postings.row 이다.
+
+CATALOG_PATH = "./catalog/tools.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tools (
+    tool_id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    name TEXT,
+    definition TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tools_name ON tools (name);
+CREATE TABLE IF NOT EXISTS files (
+    file TEXT PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    row_offset INTEGER NOT NULL,
+    num_rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    tool_id INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    PRIMARY KEY (tool_id, file, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file);
+"""
+
+
+def canonical_tool(tool: dict) -> str:
+    return json.dumps(tool, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def tool_hash(definition: str) -> str:
+    return hashlib.sha256(definition.encode("utf-8")).hexdigest()
+
+
+def _tool_name(tool: dict) -> str | None:
+    function = tool.get("function", tool) if isinstance(tool, dict) else None
+    return function.get("name") if isinstance(function, dict) else None
+
+
+def connect(path: str = CATALOG_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class ToolCatalog:
+    def __init__(self, path: str = CATALOG_PATH):
+        self.path = path
+        self.conn = connect(path)
+        # hash -> tool_id (빌드 중 같은 정의를 다시 조회하지 않도록)
+        self._tool_ids = {}
+
+    def close(self):
+        self.conn.close()
+
+    def _tool_id(self, tool) -> int:
+        definition = canonical_tool(tool)
+        digest = tool_hash(definition)
+        tool_id = self._tool_ids.get(digest)
+        if tool_id is not None:
+            return tool_id
+
+        row = self.conn.execute(
+            "SELECT tool_id FROM tools WHERE hash = ?", (digest,)
+        ).fetchone()
+        if row is None:
+            cursor = self.conn.execute(
+                "INSERT INTO tools (hash, name, definition) VALUES (?, ?, ?)",
+                (digest, _tool_name(tool), definition),
+            )
+            tool_id = cursor.lastrowid
+        else:
+            tool_id = row[0]
+        self._tool_ids[digest] = tool_id
+        return tool_id
+
+    def _remove_file(self, file: str):
+        self.conn.execute("DELETE FROM postings WHERE file = ?", (file,))
+        self.conn.execute("DELETE FROM files WHERE file = ?", (file,))
+
+    def _index_file(self, path: str, file: str, batch_size: int) -> int:
+        import pyarrow.parquet as pq
+
+        # 같은 tools 문자열(같은 tool 세트)은 한 번만 json.loads / hash 한다.
+        tool_sets = {}
+        row = 0
+        for batch in pq.ParquetFile(path).iter_batches(
+            batch_size=batch_size, columns=["tools"]
+        ):
+            postings = []
+            for tools in batch.column(0).to_pylist():
+                tool_ids = tool_sets.get(tools)
+                if tool_ids is None:
+                    parsed = json.loads(tools) if tools is not None else None
+                    tool_ids = sorted({self._tool_id(tool) for tool in parsed or []})
+                    if len(tool_sets) >= 100_000:
+                        tool_sets.clear()
+                    tool_sets[tools] = tool_ids
+                postings.extend((tool_id, file, row) for tool_id in tool_ids)
+                row += 1
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO postings (tool_id, file, row) VALUES (?, ?, ?)",
+                postings,
+            )
+        return row
+
+    def build(self, input_dir: str = "./parsed", batch_size: int = 10_000) -> dict:
+        """
+        Indexes every shard listed in the manifests of input_dir.
+        Shards whose sha256 is already in the catalog are not re-indexed (only their
+        row_offset is updated), and shards that no longer exist in any manifest are removed.
+        """
+        known = dict(self.conn.execute("SELECT file, sha256 FROM files").fetchall())
+        current = set()
+        stats = {"indexed": 0, "skipped": 0, "removed": 0}
+
+        for manifest in list_manifests(input_dir):
+            row_offset = 0
+            for shard in manifest["shards"]:
+                file = shard["file"]
+                current.add(file)
+                if known.get(file) == shard["sha256"]:
+                    # 내용은 같아도 앞 shard 의 row 수가 바뀌었으면 dataset 기준 위치가 달라진다.
+                    with self.conn:
+                        self.conn.execute(
+                            "UPDATE files SET dataset = ?, row_offset = ? WHERE file = ?",
+                            (manifest["name"], row_offset, file),
+                        )
+                    stats["skipped"] += 1
+                    row_offset += shard["num_rows"]
+                    continue
+
+                with self.conn:
+                    self._remove_file(file)
+                    num_rows = self._index_file(
+                        os.path.join(input_dir, file), file, batch_size
+                    )
+                    self.conn.execute(
+                        "INSERT INTO files (file, dataset, sha256, row_offset, num_rows) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (file, manifest["name"], shard["sha256"], row_offset, num_rows),
+                    )
+                stats["indexed"] += 1
+                print(f"Indexed {file} ({num_rows} rows)")
+                row_offset += shard["num_rows"]
+
+        with self.conn:
+            for file in set(known) - current:
+                self._remove_file(file)
+                stats["removed"] += 1
+            # 어떤 row에서도 쓰이지 않는 tool 정리
+            self.conn.execute(
+                "DELETE FROM tools WHERE tool_id NOT IN (SELECT tool_id FROM postings)"
+            )
+        self._tool_ids.clear()
+        return stats
+
+    def find_tools(self, key: str) -> list[tuple]:
+        """
+        Returns (tool_id, hash, name) of the tools whose name is key or whose hash starts with key.
+        """
+        return self.conn.execute(
+            "SELECT tool_id, hash, name FROM tools "
+            "WHERE name = ? OR substr(hash, 1, length(?)) = ? ORDER BY name, hash",
+            (key, key, key),
+        ).fetchall()
+
+    def rows(self, tool_id: int, limit: int | None = None) -> list[tuple]:
+        """
+        Returns (dataset, dataset row, shard file, shard row) of the rows using a tool.
+        """
+        return self.conn.execute(
+            "SELECT f.dataset, f.row_offset + p.row, p.file, p.row "
+            "FROM postings p JOIN files f ON f.file = p.file "
+            "WHERE p.tool_id = ? ORDER BY f.dataset, f.row_offset + p.row LIMIT ?",
+            (tool_id, -1 if limit is None else limit),
+        ).fetchall()
+
+    def stats(self) -> dict:
+        conn = self.conn
+        return {
+            "tools": conn.execute("SELECT COUNT(*) FROM tools").fetchone()[0],
+            "tool_names": conn.execute(
+                "SELECT COUNT(DISTINCT name) FROM tools"
+            ).fetchone()[0],
+            "files": conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+            "rows": conn.execute(
+                "SELECT COALESCE(SUM(num_rows), 0) FROM files"
+            ).fetchone()[0],
+            "postings": conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0],
+            "datasets": conn.execute(
+                "SELECT f.dataset, SUM(f.num_rows), "
+                "(SELECT COUNT(DISTINCT p.tool_id) FROM postings p "
+                " JOIN files g ON g.file = p.file WHERE g.dataset = f.dataset) "
+                "FROM files f GROUP BY f.dataset ORDER BY f.dataset"
+            ).fetchall(),
+        }
@@ -0,0 +1,69 @@
+from functools import lru_cache
+
+from libs.utils import func_name_sanitizer
+
+# 모든 변환기가 parse 직후 공통으로 거치는 tool 이름 정규화 단계
+#
+# row의 tool 이름 목록마다 {원래 이름: 정규화된 이름} 매핑을 한 번만 계산(캐시)하고,
+# tools / assistant tool_calls / tool 메시지의 name 을 같은 매핑으로 바꾼다.
+# 서로 다른 두 tool이 정규화 후 같은 이름이 되면 ToolNameCollisionError 를 던져
+# 해당 row가 quarantine 으로 가도록 한다.
+
+
+class ToolNameCollisionError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=None)
+def sanitize_tool_name(name: str) -> str:
+    return func_name_sanitizer(name)
+
+
+def _tool_function(tool: dict) -> dict:
+    # OpenAI 형식 {"type": "function", "function": {...}} 과 name이 최상위에 있는 형식 모두 처리
+    return tool["function"] if "function" in tool else tool
+
+
+@lru_cache(maxsize=65536)
+def tool_name_mapping(names: tuple) -> dict:
+    """
+    Returns {original name: sanitized name} for one tool set.
+    Raises ToolNameCollisionError when two distinct names sanitize to the same name.
+    """
+    mapping = {}
+    owners = {}
+    for name in names:
+        sanitized = sanitize_tool_name(name)
+        owner = owners.setdefault(sanitized, name)
+        if owner != name:
+            raise ToolNameCollisionError(
+                f"Tool names collide after sanitization: {[owner, name]} -> {sanitized!r}"
+            )
+        mapping[name] = sanitized
+    return mapping
+
+
+def normalize_tool_names(row: dict) -> dict:
+    """
+    Rewrites tool names in tools, tool_calls and tool messages of a parsed row in place.
+    Names that are called but not defined in tools are sanitized on their own.
+    """
+    functions = [_tool_function(tool) for tool in row.get("tools") or []]
+    mapping = tool_name_mapping(tuple(function["name"] for function in functions))
+
+    def rename(name):
+        if name is None:
+            return None
+        sanitized = mapping.get(name)
+        return sanitized if sanitized is not None else sanitize_tool_name(name)
+
+    for function in functions:
+        function["name"] = mapping[function["name"]]
+
+    for message in row["messages"]:
+        for tool_call in message.get("tool_calls") or []:
+            tool_call["function"]["name"] = rename(tool_call["function"]["name"])
+        if message.get("role") == "tool" and "name" in message:
+            message["name"] = rename(message["name"])
+
+    return row
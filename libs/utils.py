@@ -1,5 +1,21 @@
+import importlib.util
+import os
+
+
 def func_name_sanitizer(func_name: str) -> str:
     """
     Sanitize function name.
     """
     return func_name.replace(" ", "_").replace(".", "_")
+
+
+def load_script(path: str):
+    """
+    Imports a top-level script (e.g. "hermes-parse.py") as a module without running main().
+    Script names contain dashes, so they can't be imported with a plain import statement.
+    """
+    module_name = os.path.splitext(os.path.basename(path))[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,165 @@
+import heapq
+import json
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from libs.profiling import PROFILE_DIR
+
+# row 하나의 파싱 시간을 재고, --row-timeout 을 넘기면 SIGALRM 으로 중단시켜 quarantine 으로 보낸다.
+#
+#   try:
+#       with watchdog.row(idx, data):
+#           parsed = parse_function_calling_json(data)
+#       output.append(parsed)
+#   except Exception as e:
+#       error.add(idx, e, data)      # RowTimeoutError 도 여기서 quarantine 된다.
+#
+# 시그널 핸들러는 bytecode 사이와 re 매칭 중에 실행되므로 regex backtracking 이나 Python 루프는
+# 끊을 수 있지만, 하나의 C 호출(예: literal_eval 의 compile) 안에서는 그 호출이 끝난 뒤에 끊긴다.
+# 가장 느린 row K 개는 --slow-rows 로 ./profile/<name>.slow-rows.json 에 남긴다.
+
+
+class RowTimeoutError(Exception):
+    pass
+
+
+class _Timeout(BaseException):
+    # 파서 안의 except Exception 에 잡혀서 다른 경로로 계속 진행하지 않도록 BaseException 으로 던지고,
+    # row() 밖으로 나갈 때 RowTimeoutError 로 바꾼다.
+    pass
+
+
+def _row_size(row) -> int:
+    return len(json.dumps(row, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class RowWatchdog:
+    def __init__(
+        self,
+        name: str,
+        timeout: float | None = None,
+        slow_rows: int = 0,
+        row_offset: int = 0,
+        output_dir: str = PROFILE_DIR,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.slow_rows = slow_rows
+        # partition 실행에서 row index 를 전체 입력 기준으로 맞춘다.
+        self.row_offset = row_offset
+        self.output_dir = output_dir
+        self.timeouts = []
+        self._slowest = []
+        self._active = False
+        self._previous_handler = None
+
+        if timeout and not hasattr(signal, "setitimer"):
+            print(f"Row timeout is not supported on this platform, ignoring {timeout}s")
+            self.timeout = None
+        elif timeout and threading.current_thread() is not threading.main_thread():
+            print(f"Row timeout only works in the main thread, ignoring {timeout}s")
+            self.timeout = None
+        if self.timeout:
+            self._previous_handler = signal.signal(signal.SIGALRM, self._on_alarm)
+
+    def _on_alarm(self, signum, frame):
+        # 타이머를 끈 직후에 도착한 시그널은 무시한다.
+        if self._active:
+            self._active = False
+            raise _Timeout()
+
+    @contextmanager
+    def row(self, row_index: int, row=None):
+        """
+        Times the enclosed block for one row and raises RowTimeoutError if it runs past
+        the timeout.
+        """
+        start = time.perf_counter()
+        try:
+            # 타이머를 끄는 finally 도 except _Timeout 안쪽에 둔다. yield 가 끝난 뒤 _active 를
+            # 내리기 전에 시그널이 와도 _Timeout 이 밖으로 새지 않고 RowTimeoutError 가 된다.
+            try:
+                # 타이머는 try 안에서 켠다. (아주 짧은 timeout 이 yield 전에 울려도 여기서 잡히도록)
+                if self.timeout:
+                    self._active = True
+                    signal.setitimer(signal.ITIMER_REAL, self.timeout)
+                yield
+            finally:
+                if self.timeout:
+                    # _active 를 먼저 내리므로 이후에 도착한 시그널은 무시된다.
+                    self._active = False
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+        except _Timeout:
+            self.timeouts.append(row_index + self.row_offset)
+            raise RowTimeoutError(
+                f"Row took longer than the row timeout of {self.timeout}s"
+            ) from None
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.slow_rows:
+                entry = (elapsed, row_index, row)
+                if len(self._slowest) < self.slow_rows:
+                    heapq.heappush(self._slowest, entry)
+                elif elapsed > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def report(self) -> list[dict]:
+        """
+        The slowest rows, slowest first, with the size of each row and of its largest field.
+        """
+        timeouts = set(self.timeouts)
+        rows = []
+        for elapsed, row_index, row in sorted(
+            self._slowest, key=lambda entry: entry[0], reverse=True
+        ):
+            record = {
+                "row_index": row_index + self.row_offset,
+                "source": self.name,
+                "seconds": round(elapsed, 6),
+                "timed_out": row_index + self.row_offset in timeouts,
+                "size_bytes": _row_size(row) if row is not None else None,
+            }
+            if isinstance(row, dict) and row:
+                field_sizes = {key: _row_size(value) for key, value in row.items()}
+                largest = max(field_sizes, key=field_sizes.get)
+                record["largest_field"] = largest
+                record["largest_field_bytes"] = field_sizes[largest]
+            rows.append(record)
+        return rows
+
+    def finish(self):
+        """
+        Restores the signal handler, prints the timeouts and the slowest rows, and
+        saves the report to ./profile/<name>.slow-rows.json.
+        """
+        if self._previous_handler is not None:
+            signal.signal(signal.SIGALRM, self._previous_handler)
+            self._previous_handler = None
+
+        if self.timeouts:
+            print(
+                f"{len(self.timeouts)} rows exceeded the row timeout of {self.timeout}s "
+                f"and were quarantined"
+            )
+        if not self.slow_rows:
+            return
+
+        rows = self.report()
+        print(f"\n[{self.name}] slowest rows")
+        print(f"{'row':>10} {'seconds':>10} {'bytes':>10}  largest field")
+        for record in rows:
+            largest = record.get("largest_field", "-")
+            flag = "  (timed out)" if record["timed_out"] else ""
+            print(
+                f"{record['row_index']:>10} {record['seconds']:>10.4f} "
+                f"{str(record['size_bytes']):>10}  {largest}{flag}"
+            )
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        report_path = os.path.join(self.output_dir, f"{self.name}.slow-rows.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+        print(f"Slow rows report saved to {report_path}")
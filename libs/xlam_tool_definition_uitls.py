@@ -1,16 +1,12 @@
-from jsondiff import diff
-
 import logging
 import os
 import json, re, ast
 import typing
-from datasets import Dataset, load_dataset
-import pandas as pd
+from typing import Any, Union, Optional, Dict, List
 
+from libs.schema_normalizer import TYPE2_PASSES, normalize_schema
 
-import logging
-from typing import Any, Union, Optional, Dict, List
-from pydantic import TypeAdapter
+# pydantic은 import 비용이 커서 python_type_to_json_schema 안에서 필요할 때만 불러온다.
 
 
 # 환경변수에서 로깅 레벨 읽기 (없으면 'INFO' 기본값)
@@ -117,13 +113,11 @@ def python_type_to_json_schema(python_type: str, test: str) -> dict:
         logger.warning(f"Test value: {test}")
         return {}
 
+    from pydantic import TypeAdapter
+
     try:
-        schema = TypeAdapter(py_type).json_schema()
-        # 반드시 array 타입이면 items: {} 포함
-        if schema.get("type") == "array":
-            if "items" not in schema or not schema["items"]:
-                schema["items"] = {}
-        return schema
+        # 반드시 array 타입이면 items: {} 포함 (libs/schema_normalizer.py)
+        return normalize_schema(TypeAdapter(py_type).json_schema(), TYPE2_PASSES)
     except Exception as e:
         logger.warning(f"Schema generation error for '{python_type}': {str(e)}")
         return {}
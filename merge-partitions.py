@@ -0,0 +1,66 @@
+# Merges the partitions of sharded converter runs (--shard i/N) into ./parsed (libs/partitions.py).
+# Usage:
+#   for i in 0 1 2 3; do python xlam-parse.py --shard $i/4 & done; wait
+#   python merge-partitions.py xlam-function-calling-60k
+#   python merge-partitions.py                      # every run in ./partitions
+#
+# The merge fails without writing anything if a partition is missing or unfinished,
+# if row ranges overlap or leave gaps, or if a shard does not match its manifest.
+# It cannot tell whether the partitions dropped the same rows as a full run would; shard-check.py
+# compares a merged sharded run with a full run row by row.
+
+from argparse import ArgumentParser
+import os
+import sys
+
+from libs.partitions import PARTITIONS_DIR, merge_partitions
+from libs.quarantine import QUARANTINE_DIR
+
+parser = ArgumentParser()
+parser.add_argument(
+    "names", help="Runs to merge (default: all in the partitions dir)", nargs="*"
+)
+parser.add_argument(
+    "-p",
+    "--partitions-dir",
+    help="Partitions directory",
+    dest="partitions_dir",
+    default=PARTITIONS_DIR,
+)
+parser.add_argument(
+    "-o", "--output", help="Output directory", dest="output", default="./parsed"
+)
+parser.add_argument(
+    "-q",
+    "--quarantine-dir",
+    help="Quarantine directory",
+    dest="quarantine_dir",
+    default=QUARANTINE_DIR,
+)
+
+
+def main():
+    args = parser.parse_args()
+    names = args.names or sorted(
+        entry
+        for entry in os.listdir(args.partitions_dir)
+        if os.path.isdir(os.path.join(args.partitions_dir, entry))
+    )
+
+    failed = 0
+    for name in names:
+        try:
+            merged = merge_partitions(
+                name, args.output, args.partitions_dir, args.quarantine_dir
+            )
+        except (FileNotFoundError, ValueError) as e:
+            print(f"{name}: {e}")
+            failed += 1
+            continue
+        rows = ", ".join(f"{output}: {n}" for output, n in merged.items())
+        print(f"{name}: merged ({rows})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
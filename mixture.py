@@ -0,0 +1,310 @@
+# Builds a deterministic weighted mixture of the parsed datasets.
+#
+# Usage:
+#   python mixture.py -w xlam-function-calling-60k=0.4 -w toolace=0.2 -w func-calling=0.1 \
+#       -c apigen-mt-5k=3000 -t 100000 --seed 42 -o tool-mix
+#
+# Rows are never fully materialized:
+#   1. Each source is streamed batch by batch. The rows to keep are drawn with sequential
+#      stratified sampling (a hypergeometric draw decides how many of the remaining rows
+#      fall into each fixed block of SAMPLE_BLOCK_ROWS rows), which gives an exact uniform
+#      sample without replacement using O(block + batch) memory. The blocks do not depend
+#      on --batch-size, so a seed always gives the same mixture.
+#   2. A seeded permutation over the sampled rows assigns every row its output position.
+#      Rows are spilled to per-bucket Arrow IPC files by position.
+#   3. Each bucket is loaded on its own, sorted by position and appended to the sharded
+#      parquet output, so memory stays at one bucket plus the permutation (8 bytes/row).
+
+from argparse import ArgumentParser
+import json
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from libs.parquet_shards import (
+    DEFAULT_MAX_SHARD_BYTES,
+    ShardedParquetWriter,
+    list_manifests,
+)
+
+parser = ArgumentParser()
+parser.add_argument(
+    "-w",
+    "--weight",
+    help="Mixture fraction of a source, NAME=FRACTION (repeatable)",
+    dest="weights",
+    action="append",
+    default=[],
+)
+parser.add_argument(
+    "-c",
+    "--cap",
+    help="Fixed row count of a source, NAME=ROWS (repeatable)",
+    dest="caps",
+    action="append",
+    default=[],
+)
+parser.add_argument(
+    "-t",
+    "--total-rows",
+    help="Total rows of the mixture (default: largest mixture without upsampling)",
+    dest="total_rows",
+    type=int,
+)
+parser.add_argument(
+    "-s", "--seed", help="Random seed", dest="seed", type=int, default=42
+)
+parser.add_argument(
+    "-i", "--input", help="Parsed output directory", dest="input", default="./parsed"
+)
+parser.add_argument(
+    "-o", "--output", help="Mixture dataset name", dest="output", default="mixture"
+)
+parser.add_argument(
+    "--output-dir",
+    help="Mixture output directory",
+    dest="output_dir",
+    default="./mixed",
+)
+parser.add_argument(
+    "--bucket-rows",
+    help="Rows per shuffle bucket (bounds the memory of the write pass)",
+    dest="bucket_rows",
+    type=int,
+    default=200_000,
+)
+parser.add_argument(
+    "--batch-size",
+    help="Rows read from a source at a time",
+    dest="batch_size",
+    type=int,
+    default=65_536,
+)
+parser.add_argument(
+    "--max-shard-bytes",
+    help="Target size of an output shard",
+    dest="max_shard_bytes",
+    type=int,
+    default=DEFAULT_MAX_SHARD_BYTES,
+)
+args = parser.parse_args()
+
+
+def parse_specs(specs, value_type):
+    parsed = {}
+    for spec in specs:
+        if "=" not in spec:
+            raise ValueError(f"Invalid source spec '{spec}', expected NAME=VALUE")
+        name, value = spec.rsplit("=", 1)
+        parsed[name] = value_type(value)
+    return parsed
+
+
+def resolve_row_counts(num_rows: dict, weights: dict, caps: dict, total_rows):
+    """
+    Returns the number of rows to draw from every source.
+    Capped sources take min(cap, rows); weighted sources share the rest of total_rows.
+    """
+    counts = {name: min(cap, num_rows[name]) for name, cap in caps.items()}
+
+    if weights:
+        weight_sum = sum(weights.values())
+        if weight_sum <= 0:
+            raise ValueError("Weights must sum to a positive value")
+        weights = {name: w / weight_sum for name, w in weights.items()}
+
+        if total_rows is None:
+            # 업샘플링 없이 만들 수 있는 가장 큰 mixture
+            weighted_total = min(
+                num_rows[name] / w for name, w in weights.items() if w > 0
+            )
+        else:
+            weighted_total = total_rows - sum(counts.values())
+            if weighted_total < 0:
+                raise ValueError("Capped sources alone exceed --total-rows")
+
+        for name, w in weights.items():
+            counts[name] = int(round(w * weighted_total))
+            if counts[name] > num_rows[name]:
+                print(
+                    f"Upsampling {name}: {counts[name]} rows from {num_rows[name]} "
+                    f"({counts[name] / num_rows[name]:.2f}x)"
+                )
+
+    return counts
+
+
+# 표본을 뽑는 row 단위. 읽는 batch 크기와 따로 고정해야 같은 seed 로 같은 표본이 나온다.
+SAMPLE_BLOCK_ROWS = 65_536
+
+
+def source_batches(input_dir: str, manifest: dict):
+    for shard in manifest["shards"]:
+        parquet_file = pq.ParquetFile(os.path.join(input_dir, shard["file"]))
+        yield from parquet_file.iter_batches(batch_size=args.batch_size)
+
+
+def sample_counts(n, k, rng, block_rows=SAMPLE_BLOCK_ROWS):
+    """
+    Yields how many times each input row is sampled, for consecutive blocks of block_rows
+    rows. k may exceed n, in which case every row is repeated k // n times and the
+    remainder is sampled without replacement.
+    """
+    repeats, remaining_k = divmod(k, n)
+    remaining_n = n
+
+    for start in range(0, n, block_rows):
+        block_len = min(block_rows, n - start)
+
+        # 남은 row 중 이 block에서 뽑힐 개수 (hypergeometric) -> 정확히 k개의 균등 표본
+        taken = (
+            int(rng.hypergeometric(block_len, remaining_n - block_len, remaining_k))
+            if remaining_k
+            else 0
+        )
+        remaining_n -= block_len
+        remaining_k -= taken
+
+        counts = np.full(block_len, repeats, dtype=np.int64)
+        if taken:
+            counts[rng.choice(block_len, taken, replace=False)] += 1
+        yield counts
+
+
+def sample_source(input_dir, manifest, k, rng):
+    """
+    Streams a source and yields the sampled rows batch by batch.
+    """
+    n = manifest["num_rows"]
+    if n == 0 or k == 0:
+        return
+    blocks = sample_counts(n, k, rng)
+    pending = np.zeros(0, dtype=np.int64)
+
+    for batch in source_batches(input_dir, manifest):
+        batch_len = batch.num_rows
+        while len(pending) < batch_len:
+            pending = np.concatenate([pending, next(blocks)])
+        counts, pending = pending[:batch_len], pending[batch_len:]
+
+        indices = np.repeat(np.arange(batch_len), counts)
+        if len(indices):
+            yield batch.take(pa.array(indices))
+
+
+def align_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    # 소스마다 messages의 struct 필드가 다르므로 통합 스키마로 맞춘다. (없는 필드는 null)
+    return pa.concat_tables(
+        [schema.empty_table(), table], promote_options="permissive"
+    ).cast(schema)
+
+
+def main():
+    weights = parse_specs(args.weights, float)
+    caps = parse_specs(args.caps, int)
+    if not weights and not caps:
+        parser.error("at least one --weight or --cap is required")
+
+    manifests = {m["name"]: m for m in list_manifests(args.input)}
+    requested = list(dict.fromkeys([*weights, *caps]))
+    missing = [name for name in requested if name not in manifests]
+    if missing:
+        raise ValueError(f"No manifest in {args.input} for: {missing}")
+
+    num_rows = {name: manifests[name]["num_rows"] for name in requested}
+    counts = resolve_row_counts(num_rows, weights, caps, args.total_rows)
+    total = sum(counts.values())
+    if total == 0:
+        raise ValueError("The mixture is empty")
+
+    schema = pa.unify_schemas(
+        [
+            pq.read_schema(
+                os.path.join(args.input, manifests[name]["shards"][0]["file"])
+            )
+            for name in requested
+        ],
+        promote_options="permissive",
+    ).append(pa.field("source", pa.string()))
+    spill_schema = schema.append(pa.field("__position", pa.int64()))
+
+    # 전역 셔플: 뽑힌 row의 순번 j -> 출력 위치 permutation[j]
+    permutation = np.random.default_rng(args.seed).permutation(total)
+    num_buckets = math.ceil(total / args.bucket_rows)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{args.output}-", dir=args.output_dir)
+    try:
+        sinks = [
+            pa.OSFile(os.path.join(tmp_dir, f"bucket-{b:05d}.arrow"), "wb")
+            for b in range(num_buckets)
+        ]
+        spills = [pa.ipc.new_stream(sink, spill_schema) for sink in sinks]
+
+        ordinal = 0
+        for source_idx, name in enumerate(requested):
+            rng = np.random.default_rng([args.seed, source_idx])
+            for sampled in sample_source(
+                args.input, manifests[name], counts[name], rng
+            ):
+                table = pa.Table.from_batches([sampled])
+                table = table.append_column(
+                    "source", pa.array([name] * table.num_rows, pa.string())
+                )
+                positions = permutation[ordinal : ordinal + table.num_rows]
+                ordinal += table.num_rows
+                table = align_table(table, schema).append_column(
+                    "__position", pa.array(positions, pa.int64())
+                )
+
+                buckets = positions // args.bucket_rows
+                for b in np.unique(buckets):
+                    spills[b].write_table(table.filter(pa.array(buckets == b)))
+            print(f"Sampled {counts[name]} rows from {name} ({num_rows[name]} rows)")
+
+        for spill, sink in zip(spills, sinks):
+            spill.close()
+            sink.close()
+
+        writer = ShardedParquetWriter(
+            args.output, args.output_dir, max_shard_bytes=args.max_shard_bytes
+        )
+        for b in range(num_buckets):
+            path = os.path.join(tmp_dir, f"bucket-{b:05d}.arrow")
+            with pa.OSFile(path, "rb") as source:
+                bucket = pa.ipc.open_stream(source).read_all()
+            order = np.argsort(bucket["__position"].to_numpy())
+            writer.write(bucket.take(pa.array(order)).drop_columns(["__position"]))
+            os.remove(path)
+        manifest = writer.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    mixture_spec = {
+        "name": args.output,
+        "seed": args.seed,
+        "weights": weights,
+        "caps": caps,
+        "total_rows": total,
+        "sources": {
+            name: {"num_rows": num_rows[name], "sampled_rows": counts[name]}
+            for name in requested
+        },
+    }
+    spec_path = os.path.join(args.output_dir, f"{args.output}.mixture.json")
+    with open(spec_path, "w", encoding="utf-8") as f:
+        json.dump(mixture_spec, f, ensure_ascii=False, indent=2)
+
+    print(
+        f"Total rows: {manifest['num_rows']}, Shards: {len(manifest['shards'])}, "
+        f"Output: {args.output_dir}/{args.output}.manifest.json"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# Local OpenAI-compatible mock endpoint for testing the request engine (libs/request_engine.py).
+# Usage:
+#   python mock-llm-server.py -p 8000 --capacity 32 --latency 0.2
+#   DISTILL_BASE_URL=http://127.0.0.1:8000/v1 FRIENDLI_TOKEN=dummy python xlam-irrelevance-parse.py
+#
+# The server behaves like a capacity-limited endpoint: up to --capacity requests are served
+# at full speed, more than that slows every request down proportionally, and more than
+# --queue-limit requests in flight (or more than --rpm requests per minute) get a 429.
+# GET /stats returns the request counters.
+
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+
+parser = ArgumentParser()
+parser.add_argument("--host", help="Bind address", dest="host", default="127.0.0.1")
+parser.add_argument("-p", "--port", help="Port", dest="port", type=int, default=8000)
+parser.add_argument(
+    "--capacity",
+    help="Requests served concurrently at full speed",
+    dest="capacity",
+    type=int,
+    default=32,
+)
+parser.add_argument(
+    "--queue-limit",
+    help="Requests in flight before returning 429 (default: 2x capacity)",
+    dest="queue_limit",
+    type=int,
+)
+parser.add_argument(
+    "--latency",
+    help="Base latency per request in seconds",
+    dest="latency",
+    type=float,
+    default=0.2,
+)
+parser.add_argument(
+    "--token-latency",
+    help="Additional latency per completion token in seconds",
+    dest="token_latency",
+    type=float,
+    default=0.002,
+)
+parser.add_argument(
+    "--error-rate",
+    help="Fraction of requests answered with a 500",
+    dest="error_rate",
+    type=float,
+    default=0.01,
+)
+parser.add_argument(
+    "--tool-call-rate",
+    help="Fraction of answers that contain a tool call",
+    dest="tool_call_rate",
+    type=float,
+    default=0.05,
+)
+parser.add_argument(
+    "--rpm", help="Requests per minute before returning 429", dest="rpm", type=int
+)
+parser.add_argument("-s", "--seed", help="Random seed", dest="seed", type=int)
+
+
+class MockState:
+    def __init__(self, args):
+        self.args = args
+        self.queue_limit = args.queue_limit or args.capacity * 2
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.window_start = time.monotonic()
+        self.window_requests = 0
+        self.counts = {"ok": 0, "throttled": 0, "errors": 0}
+
+    def admit(self) -> str | None:
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.window_requests = now, 0
+            if self.in_flight >= self.queue_limit or (
+                self.args.rpm and self.window_requests >= self.args.rpm
+            ):
+                self.counts["throttled"] += 1
+                return "throttled"
+            if self.rng.random() < self.args.error_rate:
+                self.counts["errors"] += 1
+                return "error"
+            self.in_flight += 1
+            self.window_requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return None
+
+    def done(self):
+        with self.lock:
+            self.in_flight -= 1
+            self.counts["ok"] += 1
+
+
+def completion_body(request: dict, state: MockState) -> dict:
+    with state.lock:
+        completion_tokens = state.rng.randint(20, 200)
+        tool_call = state.rng.random() < state.args.tool_call_rate
+    answer = (
+        "```tool_call\n[mock_tool(param=1)]\n```"
+        if tool_call
+        else " ".join(["mock"] * completion_tokens)
+    )
+    prompt_tokens = len(json.dumps(request.get("messages", []))) // 4
+    return {
+        "id": f"chatcmpl-mock-{time.monotonic_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model") or "mock",
+        "choices": [
+            {
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": f"<analysis>\nmock analysis\n</analysis>\n{answer}",
+                },
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    state: MockState = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/stats":
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        state = self.state
+        with state.lock:
+            body = dict(
+                state.counts,
+                in_flight=state.in_flight,
+                peak_in_flight=state.peak_in_flight,
+            )
+        self._send(200, body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+
+        state = self.state
+        rejected = state.admit()
+        if rejected == "throttled":
+            self._send(
+                429,
+                {"error": {"message": "rate limited", "type": "rate_limit"}},
+                {"Retry-After": "1"},
+            )
+            return
+        if rejected == "error":
+            self._send(500, {"error": {"message": "mock internal error"}})
+            return
+
+        try:
+            body = completion_body(request, state)
+            tokens = body["usage"]["completion_tokens"]
+            # capacity 를 넘으면 모든 요청이 비례해서 느려진다 (processor sharing)
+            slowdown = max(1.0, state.in_flight / state.args.capacity)
+            time.sleep(
+                (state.args.latency + tokens * state.args.token_latency) * slowdown
+            )
+            self._send(200, body)
+        finally:
+            state.done()
+
+
+def main():
+    args = parser.parse_args()
+    Handler.state = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(
+        f"Mock LLM server on http://{args.host}:{args.port}/v1 "
+        f"(capacity {args.capacity}, queue limit {Handler.state.queue_limit})"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {Handler.state.counts}")
+
+
+if __name__ == "__main__":
+    main()
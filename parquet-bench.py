@@ -0,0 +1,130 @@
+# Compares the parquet writer profiles (libs/parquet_profiles.py) on the parsed datasets.
+# Usage: python parquet-bench.py [-n xlam-function-calling-60k] [-p fast-scan small-size]
+
+from argparse import ArgumentParser
+import json
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from libs.parquet_profiles import WRITER_PROFILES, get_profile, writer_options
+from libs.parquet_shards import list_manifests
+
+parser = ArgumentParser()
+parser.add_argument(
+    "-i", "--input", help="Parsed output directory", dest="input", default="./parsed"
+)
+parser.add_argument(
+    "-n",
+    "--names",
+    help="Datasets to benchmark (default: all)",
+    dest="names",
+    nargs="*",
+)
+parser.add_argument(
+    "-p",
+    "--profiles",
+    help="Writer profiles to compare (default: all)",
+    dest="profiles",
+    nargs="*",
+    default=list(WRITER_PROFILES),
+)
+parser.add_argument(
+    "-c",
+    "--columns",
+    help="Columns read in the columnar scan",
+    dest="columns",
+    nargs="*",
+    default=["tools"],
+)
+parser.add_argument(
+    "-r",
+    "--repeat",
+    help="Repeat count (best is reported)",
+    dest="repeat",
+    type=int,
+    default=3,
+)
+parser.add_argument(
+    "-o", "--output", help="Write results as JSON to this path", dest="output"
+)
+args = parser.parse_args()
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_profile(table: pa.Table, profile: str, path: str) -> dict:
+    options = writer_options(table.schema, profile)
+    row_group_size = get_profile(profile)["row_group_size"]
+
+    def write():
+        with pq.ParquetWriter(path, table.schema, **options) as writer:
+            writer.write_table(table, row_group_size=row_group_size)
+
+    write_time = best_of(write, args.repeat)
+    columns = [c for c in args.columns if c in table.column_names]
+
+    return {
+        "profile": profile,
+        "file_bytes": os.path.getsize(path),
+        "write_s": write_time,
+        "full_read_s": best_of(lambda: pq.read_table(path), args.repeat),
+        "column_read_s": (
+            best_of(lambda: pq.read_table(path, columns=columns), args.repeat)
+            if columns
+            else None
+        ),
+    }
+
+
+results = []
+
+for manifest in list_manifests(args.input):
+    if args.names and manifest["name"] not in args.names:
+        continue
+
+    table = pa.concat_tables(
+        [pq.read_table(os.path.join(args.input, s["file"])) for s in manifest["shards"]]
+    )
+    print(
+        f"\n{manifest['name']} ({table.num_rows} rows, {table.nbytes / 1e6:.1f} MB in memory)"
+    )
+    print(
+        f"{'profile':<12} {'size MB':>9} {'write s':>9} {'read s':>9} {'col read s':>11}"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in args.profiles:
+            result = benchmark_profile(
+                table, profile, os.path.join(tmp_dir, f"{profile}.parquet")
+            )
+            result["name"] = manifest["name"]
+            results.append(result)
+
+            column_read = (
+                f"{result['column_read_s']:>11.3f}"
+                if result["column_read_s"] is not None
+                else f"{'-':>11}"
+            )
+            print(
+                f"{profile:<12} {result['file_bytes'] / 1e6:>9.2f} "
+                f"{result['write_s']:>9.3f} {result['full_read_s']:>9.3f} {column_read}"
+            )
+
+if not results:
+    print(f"No manifests found in {args.input}, run the converters first.")
+
+if args.output:
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
@@ -0,0 +1,228 @@
+# Micro/macro benchmarks of the converter parsers on synthetic inputs (libs/synthetic_fixtures.py).
+# Usage:
+#   python parser-bench.py                          # 10k rows per case, compared to the stored baseline
+#   python parser-bench.py -r 10000 1000000 -k hermes
+#   python parser-bench.py --save-baseline          # overwrite parser-bench-baseline.json
+#
+# Every (case, rows) pair runs in a fresh child process so peak RSS is measured per case.
+
+import os
+
+# type2_tool_definition_conv 은 row 마다 INFO/WARNING 로그를 남기므로 벤치마크 중에는 끈다.
+os.environ.setdefault("LOGLEVEL", "ERROR")
+
+from argparse import ArgumentParser
+import gc
+import json
+import multiprocessing
+import resource
+import time
+
+from libs import synthetic_fixtures as fixtures
+from libs.utils import load_script
+
+parser = ArgumentParser()
+parser.add_argument(
+    "-r",
+    "--rows",
+    help="Row counts to run every case with",
+    dest="rows",
+    type=int,
+    nargs="+",
+    default=[10_000],
+)
+parser.add_argument(
+    "-k",
+    "--cases",
+    help="Only run cases whose name contains one of these strings",
+    dest="cases",
+    nargs="*",
+)
+parser.add_argument(
+    "-p",
+    "--pool",
+    help="Distinct synthetic inputs generated per case (rows cycle through them)",
+    dest="pool",
+    type=int,
+    default=10_000,
+)
+parser.add_argument(
+    "-b",
+    "--baseline",
+    help="Baseline file",
+    dest="baseline",
+    default="parser-bench-baseline.json",
+)
+parser.add_argument(
+    "--save-baseline",
+    help="Store the results as the new baseline",
+    dest="save_baseline",
+    action="store_true",
+)
+parser.add_argument(
+    "-o", "--output", help="Write results as JSON to this path", dest="output"
+)
+parser.add_argument(
+    "-s", "--seed", help="Fixture seed", dest="seed", type=int, default=0
+)
+
+
+def _xlam_parameters(rng, idx):
+    return (fixtures.type2_parameters(rng, rng.randint(1, 5)),)
+
+
+def _hermes_tool_calls(rng, idx):
+    return (fixtures.hermes_tool_call_text(rng, rng.randint(1, 3)), "tool_call")
+
+
+def _toolace_calls(rng, idx):
+    return (fixtures.toolace_call_text(rng, rng.randint(1, 3)),)
+
+
+# name: (kind, script, function, fixture -> positional arguments)
+CASES = {
+    "xlam.parse_function_calling_json": (
+        "macro",
+        "xlam-parse.py",
+        "parse_function_calling_json",
+        lambda rng, idx: (fixtures.xlam_row(rng, idx),),
+    ),
+    "xlam.type2_tool_definition_conv": (
+        "micro",
+        "xlam-parse.py",
+        "type2_tool_definition_conv",
+        _xlam_parameters,
+    ),
+    "hermes.parse_function_calling_json": (
+        "macro",
+        "hermes-parse.py",
+        "parse_function_calling_json",
+        lambda rng, idx: (fixtures.hermes_row(rng, idx),),
+    ),
+    "hermes.tag_list_parser": (
+        "micro",
+        "hermes-parse.py",
+        "tag_list_parser",
+        _hermes_tool_calls,
+    ),
+    "toolace.parse_function_calling_json": (
+        "macro",
+        "toolace-parse.py",
+        "parse_function_calling_json",
+        lambda rng, idx: (fixtures.toolace_row(rng, idx),),
+    ),
+    "toolace.parse_api_list_text_to_json_list": (
+        "micro",
+        "toolace-parse.py",
+        "parse_api_list_text_to_json_list",
+        _toolace_calls,
+    ),
+    "bfcl.parse_function_calling_json": (
+        "macro",
+        "bfcl-v1-non-live-ast-parse.py",
+        "parse_function_calling_json",
+        fixtures.bfcl_pair,
+    ),
+    "dolphin.parse_function_calling_json": (
+        "macro",
+        "dolphin-r1-korean-deepseek.py",
+        "parse_function_calling_json",
+        lambda rng, idx: (fixtures.dolphin_row(rng, idx),),
+    ),
+}
+
+
+def run_case(name, rows, pool_size, seed, queue):
+    kind, script, function_name, make_args = CASES[name]
+    function = getattr(load_script(script), function_name)
+
+    inputs = fixtures.generate(make_args, min(rows, pool_size), seed)
+    pool_len = len(inputs)
+    gc.collect()
+
+    errors = 0
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    for i in range(rows):
+        try:
+            # 파서가 입력을 수정하는 경우(bfcl)가 있어도 동일 입력을 재사용한다.
+            function(*inputs[i % pool_len])
+        except Exception:
+            errors += 1
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    queue.put(
+        {
+            "case": name,
+            "kind": kind,
+            "rows": rows,
+            "seconds": elapsed,
+            "cpu_seconds": cpu,
+            "rows_per_sec": rows / elapsed if elapsed else float("inf"),
+            # Linux에서 ru_maxrss 단위는 KiB
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "errors": errors,
+        }
+    )
+
+
+def run_isolated(name, rows, pool_size, seed):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=run_case, args=(name, rows, pool_size, seed, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = {f"{r['case']}@{r['rows']}": r for r in json.load(f)}
+
+    names = [
+        name
+        for name in CASES
+        if not args.cases or any(pattern in name for pattern in args.cases)
+    ]
+
+    print(
+        f"{'case':<42} {'kind':<6} {'rows':>9} {'rows/s':>10} {'peak MB':>8} "
+        f"{'errors':>7} {'vs base':>8}"
+    )
+    results = []
+    for rows in args.rows:
+        for name in names:
+            result = run_isolated(name, rows, args.pool, args.seed)
+            results.append(result)
+
+            base = baseline.get(f"{name}@{rows}")
+            ratio = (
+                f"{result['rows_per_sec'] / base['rows_per_sec']:>7.2f}x"
+                if base
+                else f"{'-':>8}"
+            )
+            print(
+                f"{name:<42} {result['kind']:<6} {rows:>9} "
+                f"{result['rows_per_sec']:>10.0f} {result['peak_rss_mb']:>8.1f} "
+                f"{result['errors']:>7} {ratio}"
+            )
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
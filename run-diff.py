@@ -0,0 +1,260 @@
+# Compares two converter outputs (e.g. ./parsed before and after a parser change) row by row (libs/row_hashes.py).
+# Usage:
+#   python run-diff.py ./parsed-old ./parsed                        # every dataset in both dirs, rows keyed by position
+#   python run-diff.py ./parsed-old ./parsed func-calling --key extra.id
+#   python run-diff.py ./parsed-old ./parsed --sample 20 -o diff.json
+#
+# Every row gets a 64bit content hash computed column by column on the Arrow buffers, rows are
+# joined by key, and only a sample of the changed rows is decoded and diffed field by field.
+# --key is a column name or a JSON path into a string column (extra.id); repeated keys are matched
+# in order of appearance. With the default position key a dropped row shows up as changes from
+# there on, so prefer a stable id when the run filters rows differently.
+
+from argparse import ArgumentParser
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from libs.parquet_shards import list_manifests
+from libs.row_hashes import hash_array, hash_table, mix
+
+# 필드 diff 전에 JSON 문자열 컬럼을 풀어서 비교한다.
+JSON_COLUMNS = ("tools", "extra")
+
+parser = ArgumentParser()
+parser.add_argument("old", help="Directory with the old manifests")
+parser.add_argument("new", help="Directory with the new manifests")
+parser.add_argument(
+    "names", help="Datasets to compare (default: all in both dirs)", nargs="*"
+)
+parser.add_argument(
+    "-k",
+    "--key",
+    help="Row key: position, a column, or a JSON path into a string column (extra.id)",
+    dest="key",
+    default="position",
+)
+parser.add_argument(
+    "-n",
+    "--sample",
+    help="Changed rows per dataset to diff field by field",
+    dest="sample",
+    type=int,
+    default=5,
+)
+parser.add_argument(
+    "--seed", help="Seed for the changed row sample", dest="seed", type=int, default=0
+)
+parser.add_argument("-o", "--output", help="Write the report as JSON", dest="output")
+
+
+def read_output(output_dir: str, manifest: dict):
+    tables = [
+        pq.read_table(os.path.join(output_dir, shard["file"]), memory_map=True)
+        for shard in manifest["shards"]
+    ]
+    if not tables:
+        return None
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def _json_path_values(column, path: list[str]) -> list:
+    values = []
+    for text in column.to_pylist():
+        value = None
+        try:
+            value = json.loads(text) if text else None
+            for part in path:
+                value = value[part]
+        except (ValueError, KeyError, IndexError, TypeError):
+            value = None
+        if value is not None and not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False)
+        values.append(value)
+    return values
+
+
+def row_keys(table, key: str):
+    """
+    uint64 key per row. Repeated keys are made unique by their occurrence.
+    """
+    if key == "position":
+        return np.arange(table.num_rows, dtype=np.uint64)
+
+    column, *path = key.split(".")
+    if column not in table.schema.names:
+        raise ValueError(f"Key column {column!r} not in {table.schema.names}")
+    if path:
+        keys = hash_array(pa.array(_json_path_values(table.column(column), path)))
+    else:
+        keys = hash_array(table.column(column))
+
+    # 같은 key 가 여러 번 나오면 몇 번째인지를 섞어서 순서대로 짝을 맞춘다.
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.r_[0, np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1]
+    occurrence = np.arange(len(keys)) - np.repeat(
+        starts, np.diff(np.r_[starts, len(keys)])
+    )
+    ranks = np.empty(len(keys), dtype=np.uint64)
+    ranks[order] = occurrence
+    with np.errstate(over="ignore"):
+        return np.where(ranks == 0, keys, mix(keys + mix(ranks)))
+
+
+def _key_labels(table, key: str, indices) -> list:
+    if key == "position":
+        return [int(i) for i in indices]
+    column, *path = key.split(".")
+    values = table.column(column).take(pa.array(indices, type=pa.int64()))
+    return _json_path_values(values, path) if path else values.to_pylist()
+
+
+def _decoded_row(row: dict) -> dict:
+    for column in JSON_COLUMNS:
+        if isinstance(row.get(column), str):
+            try:
+                row[column] = json.loads(row[column])
+            except ValueError:
+                pass
+    return row
+
+
+def diff_dataset(old, new, key: str, sample: int, rng) -> dict:
+    from jsondiff import diff
+
+    old_keys, new_keys = row_keys(old, key), row_keys(new, key)
+    common_columns = [name for name in new.schema.names if name in old.schema.names]
+    old_hashes, old_columns = hash_table(old, common_columns)
+    new_hashes, new_columns = hash_table(new, common_columns)
+
+    _, old_matched, new_matched = np.intersect1d(
+        old_keys, new_keys, assume_unique=True, return_indices=True
+    )
+    removed = np.setdiff1d(np.arange(old.num_rows), old_matched)
+    added = np.setdiff1d(np.arange(new.num_rows), new_matched)
+    # 원래 row 순서로
+    order = np.argsort(new_matched)
+    old_matched, new_matched = old_matched[order], new_matched[order]
+    changed = old_hashes[old_matched] != new_hashes[new_matched]
+
+    report = {
+        "old_rows": old.num_rows,
+        "new_rows": new.num_rows,
+        "unchanged": int((~changed).sum()),
+        "changed": int(changed.sum()),
+        "added": len(added),
+        "removed": len(removed),
+        "columns_added": [n for n in new.schema.names if n not in old.schema.names],
+        "columns_removed": [n for n in old.schema.names if n not in new.schema.names],
+        "schema_changed": [
+            name
+            for name in common_columns
+            if old.schema.field(name).type != new.schema.field(name).type
+        ],
+        "changed_by_column": {
+            name: int(
+                (old_columns[name][old_matched] != new_columns[name][new_matched]).sum()
+            )
+            for name in common_columns
+        },
+        "added_keys": _key_labels(new, key, added[:sample]),
+        "removed_keys": _key_labels(old, key, removed[:sample]),
+        "samples": [],
+    }
+
+    changed_old, changed_new = old_matched[changed], new_matched[changed]
+    if sample and len(changed_new):
+        picked = np.sort(
+            rng.choice(len(changed_new), min(sample, len(changed_new)), replace=False)
+        )
+        old_rows = old.take(pa.array(changed_old[picked])).to_pylist()
+        new_rows = new.take(pa.array(changed_new[picked])).to_pylist()
+        labels = _key_labels(new, key, changed_new[picked])
+        for label, old_index, new_index, old_row, new_row in zip(
+            labels, changed_old[picked], changed_new[picked], old_rows, new_rows
+        ):
+            report["samples"].append(
+                {
+                    "key": label,
+                    "old_row": int(old_index),
+                    "new_row": int(new_index),
+                    "diff": json.loads(
+                        diff(
+                            _decoded_row(old_row),
+                            _decoded_row(new_row),
+                            syntax="symmetric",
+                            dump=True,
+                        )
+                    ),
+                }
+            )
+    return report
+
+
+def print_report(name: str, report: dict):
+    print(
+        f"\n[{name}] {report['old_rows']} -> {report['new_rows']} rows: "
+        f"{report['unchanged']} unchanged, {report['changed']} changed, "
+        f"{report['added']} added, {report['removed']} removed"
+    )
+    for field in ("columns_added", "columns_removed", "schema_changed"):
+        if report[field]:
+            print(f"  {field.replace('_', ' ')}: {', '.join(report[field])}")
+    columns = {n: c for n, c in report["changed_by_column"].items() if c}
+    if columns:
+        print("  changed columns: " + ", ".join(f"{n} {c}" for n, c in columns.items()))
+    if report["added_keys"]:
+        print(f"  added: {report['added_keys']}")
+    if report["removed_keys"]:
+        print(f"  removed: {report['removed_keys']}")
+    for sample in report["samples"]:
+        print(
+            f"  ~ {sample['key']}: {json.dumps(sample['diff'], ensure_ascii=False)[:500]}"
+        )
+
+
+def main():
+    args = parser.parse_args()
+    old_manifests = {m["name"]: m for m in list_manifests(args.old)}
+    new_manifests = {m["name"]: m for m in list_manifests(args.new)}
+    names = args.names or sorted(set(old_manifests) | set(new_manifests))
+    rng = np.random.default_rng(args.seed)
+
+    reports = {}
+    differs = False
+    start = time.perf_counter()
+    for name in names:
+        if name not in old_manifests or name not in new_manifests:
+            where = args.new if name not in new_manifests else args.old
+            print(f"\n[{name}] no manifest in {where}")
+            reports[name] = {"missing_in": where}
+            differs = True
+            continue
+        old = read_output(args.old, old_manifests[name])
+        new = read_output(args.new, new_manifests[name])
+        if old is None or new is None:
+            print(f"\n[{name}] no shards to compare")
+            continue
+        report = diff_dataset(old, new, args.key, args.sample, rng)
+        print_report(name, report)
+        reports[name] = report
+        differs = differs or any(
+            report[field] for field in ("changed", "added", "removed")
+        )
+    print(f"\nCompared {len(names)} datasets in {time.perf_counter() - start:.2f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+        print(f"Report saved to {args.output}")
+    sys.exit(1 if differs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# Checks that a sharded converter run merged with merge-partitions.py gives the same output as a full run.
+# Usage:
+#   python shard-check.py                                          # dolphin-r1-korean-deepseek.py in 3 shards
+#   python shard-check.py xlam-parse.py hermes-parse.py -n 4
+#   python shard-check.py toolace-parse.py -- --filter 'len(conversations) > 2'
+#
+# Every converter runs once in full and once per shard in a scratch directory (same snapshots,
+# lockfile and ./exclusions), the partitions are merged, and every output is compared row by row
+# by content hash (libs/row_hashes.py) together with the quarantined row indexes.
+# Exits with 1 if any output differs.
+
+from argparse import ArgumentParser
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from libs.exclusions import EXCLUSIONS_DIR
+from libs.parquet_shards import list_manifests
+from libs.partitions import merge_partitions
+from libs.row_hashes import hash_table
+from libs.snapshots import LOCKFILE, SNAPSHOT_DIR
+
+parser = ArgumentParser()
+parser.add_argument(
+    "scripts",
+    help="Converter scripts to check",
+    nargs="*",
+    default=["dolphin-r1-korean-deepseek.py"],
+)
+parser.add_argument(
+    "-n", "--shards", help="Shards per run", dest="shards", type=int, default=3
+)
+parser.add_argument(
+    "-w",
+    "--work-dir",
+    help="Keep the runs in this directory (default: a temporary directory)",
+    dest="work_dir",
+)
+
+
+def run_converter(script: str, work_dir: str, extra: list[str]):
+    env = dict(
+        os.environ,
+        DATASET_SNAPSHOT_DIR=os.path.abspath(SNAPSHOT_DIR),
+        DATASET_LOCKFILE=os.path.abspath(LOCKFILE),
+    )
+    subprocess.run(
+        [sys.executable, os.path.abspath(script), *extra],
+        cwd=work_dir,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def quarantined_rows(quarantine_dir: str, name: str):
+    path = os.path.join(quarantine_dir, f"{name}.parquet")
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=np.int64)
+    return np.sort(pq.read_table(path, columns=["row_index"])["row_index"].to_numpy())
+
+
+def output_hashes(output_dir: str, manifest: dict):
+    tables = [
+        pq.read_table(os.path.join(output_dir, shard["file"]))
+        for shard in manifest["shards"]
+    ]
+    return np.concatenate(
+        [hash_table(table)[0] for table in tables] or [np.zeros(0, dtype=np.uint64)]
+    )
+
+
+def compare(full_dir: str, merged_dir: str) -> list[str]:
+    """
+    Differences between the outputs of a full run and of the merged partitions.
+    """
+    problems = []
+    full = {manifest["name"]: manifest for manifest in list_manifests(full_dir)}
+    merged = {manifest["name"]: manifest for manifest in list_manifests(merged_dir)}
+    for name in sorted(set(full) | set(merged)):
+        if name not in full or name not in merged:
+            problems.append(
+                f"{name}: only in the {'full' if name in full else 'merged'} run"
+            )
+            continue
+        full_hashes = output_hashes(full_dir, full[name])
+        merged_hashes = output_hashes(merged_dir, merged[name])
+        if len(full_hashes) != len(merged_hashes):
+            problems.append(
+                f"{name}: {len(full_hashes)} rows in the full run, "
+                f"{len(merged_hashes)} merged"
+            )
+            continue
+        changed = np.flatnonzero(full_hashes != merged_hashes)
+        if len(changed):
+            problems.append(
+                f"{name}: {len(changed)} rows differ (first at row {changed[0]})"
+            )
+        else:
+            print(f"  {name}: {len(full_hashes)} rows identical")
+    return problems
+
+
+def check(script: str, shards: int, work_dir: str, extra: list[str]) -> list[str]:
+    os.makedirs(work_dir, exist_ok=True)
+    exclusions = os.path.join(work_dir, "exclusions")
+    if not os.path.exists(exclusions) and os.path.isdir(EXCLUSIONS_DIR):
+        os.symlink(os.path.abspath(EXCLUSIONS_DIR), exclusions)
+
+    run_converter(script, work_dir, extra)
+    for index in range(shards):
+        run_converter(script, work_dir, [*extra, "--shard", f"{index}/{shards}"])
+
+    partitions_dir = os.path.join(work_dir, "partitions")
+    merged_dir = os.path.join(work_dir, "merged")
+    merged_quarantine = os.path.join(work_dir, "merged-quarantine")
+    names = sorted(os.listdir(partitions_dir))
+    for name in names:
+        merge_partitions(name, merged_dir, partitions_dir, merged_quarantine)
+
+    problems = compare(os.path.join(work_dir, "parsed"), merged_dir)
+    for name in names:
+        full_rows = quarantined_rows(os.path.join(work_dir, "quarantine"), name)
+        merged_rows = quarantined_rows(merged_quarantine, name)
+        if not np.array_equal(full_rows, merged_rows):
+            problems.append(
+                f"{name}: quarantined rows differ ({len(full_rows)} in the full run, "
+                f"{len(merged_rows)} merged)"
+            )
+    return problems
+
+
+def main():
+    # "--" 뒤의 인자는 모든 컨버터 실행에 그대로 넘긴다.
+    argv, extra = sys.argv[1:], []
+    if "--" in argv:
+        extra = argv[argv.index("--") + 1 :]
+        argv = argv[: argv.index("--")]
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for script in args.scripts:
+        print(f"[{script}] full run vs {args.shards} merged shards")
+        with tempfile.TemporaryDirectory(prefix="shard-check-") as scratch:
+            work_dir = os.path.join(
+                args.work_dir or scratch, os.path.splitext(os.path.basename(script))[0]
+            )
+            try:
+                problems = check(script, args.shards, work_dir, extra)
+            except subprocess.CalledProcessError as e:
+                problems = [f"converter run failed: {' '.join(e.cmd[1:])}"]
+        for problem in problems:
+            print(f"  {problem}")
+        failed += bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Local, revision-pinned snapshots of the upstream datasets (libs/snapshots.py).
+# Usage:
+#   python snapshot.py                              # every source at its locked revision (latest if not locked)
+#   python snapshot.py toolace --update             # move toolace to the latest revision
+#   python snapshot.py --list
+#   python snapshot.py --verify                     # check snapshots against the lockfile
+#
+# The converters read ./snapshots/<source> when it exists, so runs after this are offline.
+
+from argparse import ArgumentParser
+import sys
+
+from libs.snapshots import (
+    LOCKFILE,
+    SNAPSHOT_DIR,
+    SOURCES,
+    read_lockfile,
+    read_snapshot_info,
+    resolve_revision,
+    snapshot_source,
+    verify_snapshot,
+    write_lockfile,
+)
+
+parser = ArgumentParser()
+parser.add_argument(
+    "sources", help="Sources to snapshot (default: all)", nargs="*", metavar="source"
+)
+parser.add_argument(
+    "-d",
+    "--snapshot-dir",
+    help="Snapshot directory",
+    dest="snapshot_dir",
+    default=SNAPSHOT_DIR,
+)
+parser.add_argument(
+    "-l", "--lockfile", help="Lockfile", dest="lockfile", default=LOCKFILE
+)
+parser.add_argument(
+    "--update",
+    help="Resolve the latest revision instead of the locked one",
+    dest="update",
+    action="store_true",
+)
+parser.add_argument(
+    "--force",
+    help="Download again even if the snapshot matches the lockfile",
+    dest="force",
+    action="store_true",
+)
+parser.add_argument(
+    "--list", help="Show sources and their state", dest="list", action="store_true"
+)
+parser.add_argument(
+    "--verify",
+    help="Check snapshot files against the lockfile checksums",
+    dest="verify",
+    action="store_true",
+)
+
+
+def main():
+    args = parser.parse_args()
+    unknown = [key for key in args.sources if key not in SOURCES]
+    if unknown:
+        parser.error(
+            f"unknown sources: {', '.join(unknown)} (available: {', '.join(SOURCES)})"
+        )
+    keys = args.sources or list(SOURCES)
+    lock = read_lockfile(args.lockfile)
+
+    if args.list:
+        for key in keys:
+            entry = lock["sources"].get(key)
+            info = read_snapshot_info(key, args.snapshot_dir)
+            locked = entry["revision"][:12] if entry else "-"
+            state = "missing"
+            if info is not None:
+                state = (
+                    "ok"
+                    if entry and info["revision"] == entry["revision"]
+                    else f"at {info['revision'][:12]}"
+                )
+            print(f"{key:40} {SOURCES[key]['path']:50} {locked:12}  {state}")
+        return
+
+    if args.verify:
+        failed = 0
+        for key in keys:
+            entry = lock["sources"].get(key)
+            problems = (
+                verify_snapshot(key, entry, args.snapshot_dir)
+                if entry
+                else ["not in lockfile"]
+            )
+            print(f"{key}: {'ok' if not problems else '; '.join(problems)}")
+            failed += bool(problems)
+        sys.exit(1 if failed else 0)
+
+    for key in keys:
+        entry = lock["sources"].get(key)
+        if args.update or entry is None:
+            revision = resolve_revision(SOURCES[key]["path"])
+        else:
+            revision = entry["revision"]
+
+        info = read_snapshot_info(key, args.snapshot_dir)
+        if (
+            not args.force
+            and info is not None
+            and info["revision"] == revision
+            and entry is not None
+            and entry["revision"] == revision
+        ):
+            print(f"{key}: up to date ({revision[:12]})")
+            continue
+
+        print(f"{key}: snapshotting {SOURCES[key]['path']} at {revision[:12]}")
+        lock["sources"][key] = snapshot_source(key, revision, args.snapshot_dir)
+        # 소스 하나가 끝날 때마다 기록해 두면 중간에 실패해도 앞의 결과는 남는다.
+        write_lockfile(lock, args.lockfile)
+        rows = ", ".join(
+            f"{split}: {n}" for split, n in lock["sources"][key]["splits"].items()
+        )
+        print(f"{key}: saved to {args.snapshot_dir}/{key} ({rows})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# Token counts, length histograms and a packing plan for the parsed outputs (libs/token_counts.py, libs/packing.py).
+# Usage:
+#   python token-stats.py -t ./tokenizer.json                                  # every dataset in ./parsed
+#   python token-stats.py -t ./tokenizer.json xlam-function-calling-60k toolace
+#   python token-stats.py -t ./tokenizer.json -T ./tokenizer_config.json --pack 8192
+#
+# Writes per dataset ./token-stats/<name>.tokens.parquet (row_index, tokens, messages_tokens,
+# tools_tokens) and <name>.stats.json (percentiles, histogram), and with --pack N
+# ./token-stats/packing-N.parquet (bin, source, row_index, tokens) with its summary.
+# Runs offline; counts are cached by row content, so re-runs only tokenize changed rows.
+
+from argparse import ArgumentParser
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from libs.packing import plan_packing, write_packing_index
+from libs.parquet_shards import list_manifests
+from libs.token_counts import (
+    CACHE_DIR,
+    COUNT_FIELDS,
+    TOKEN_STATS_DIR,
+    TokenCache,
+    count_rows,
+    fingerprint,
+    histogram,
+    init_worker,
+    row_key,
+)
+
+parser = ArgumentParser()
+parser.add_argument(
+    "names", help="Datasets to count (default: all in the input dir)", nargs="*"
+)
+parser.add_argument(
+    "-t",
+    "--tokenizer",
+    help="Local tokenizer file (tokenizer.json)",
+    dest="tokenizer",
+    required=True,
+)
+parser.add_argument(
+    "-T",
+    "--template",
+    help="Chat template (.jinja or tokenizer_config.json) to count rendered rows with",
+    dest="template",
+)
+parser.add_argument(
+    "--template-name",
+    help="Named template in a tokenizer_config.json (default: tool_use, then default)",
+    dest="template_name",
+)
+parser.add_argument(
+    "-i", "--input", help="Directory with manifests", dest="input", default="./parsed"
+)
+parser.add_argument(
+    "-o", "--output", help="Output directory", dest="output", default=TOKEN_STATS_DIR
+)
+parser.add_argument(
+    "--cache-dir", help="Token count cache", dest="cache_dir", default=CACHE_DIR
+)
+parser.add_argument(
+    "--no-cache",
+    help="Do not read or write the cache",
+    dest="no_cache",
+    action="store_true",
+)
+parser.add_argument(
+    "--pack",
+    help="Plan first-fit-decreasing packing into sequences of this many tokens (repeatable)",
+    dest="pack",
+    type=int,
+    action="append",
+    metavar="CONTEXT_LENGTH",
+)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    help="Worker processes",
+    dest="jobs",
+    type=int,
+    default=os.cpu_count() or 1,
+)
+parser.add_argument(
+    "--chunk-size",
+    help="Rows sent to a worker at once",
+    dest="chunk_size",
+    type=int,
+    default=1000,
+)
+parser.add_argument(
+    "--batch-size",
+    help="Rows read from parquet at once",
+    dest="batch_size",
+    type=int,
+    default=10_000,
+)
+
+
+def source_batches(input_dir: str, manifest: dict, batch_size: int):
+    for shard in manifest["shards"]:
+        parquet_file = pq.ParquetFile(os.path.join(input_dir, shard["file"]))
+        yield from parquet_file.iter_batches(
+            batch_size=batch_size, columns=["messages", "tools"]
+        )
+
+
+def source_stats(name: str, counts, errors: int) -> dict:
+    tokens = counts[:, 0]
+    counted = tokens[tokens >= 0]
+    stats = {
+        "name": name,
+        "rows": len(tokens),
+        "counted": len(counted),
+        "errors": errors,
+    }
+    if len(counted):
+        percentiles = np.percentile(counted, [50, 90, 95, 99])
+        stats.update(
+            {
+                "total_tokens": int(counted.sum()),
+                "mean": round(float(counted.mean()), 1),
+                "min": int(counted.min()),
+                "p50": int(percentiles[0]),
+                "p90": int(percentiles[1]),
+                "p95": int(percentiles[2]),
+                "p99": int(percentiles[3]),
+                "max": int(counted.max()),
+            }
+        )
+        for field, column in zip(COUNT_FIELDS[1:], counts[:, 1:].T):
+            stats[f"total_{field}"] = int(column[column >= 0].sum())
+    stats["histogram"] = histogram(tokens)
+    return stats
+
+
+def print_stats(stats: dict):
+    print(f"\n[{stats['name']}] {stats['counted']}/{stats['rows']} rows counted")
+    if not stats["counted"]:
+        return
+    print(
+        f"tokens: total {stats['total_tokens']}, mean {stats['mean']}, "
+        f"min {stats['min']}, p50 {stats['p50']}, p90 {stats['p90']}, "
+        f"p95 {stats['p95']}, p99 {stats['p99']}, max {stats['max']}"
+    )
+    largest = max(bucket["rows"] for bucket in stats["histogram"])
+    for bucket in stats["histogram"]:
+        if not bucket["rows"]:
+            continue
+        bar = "#" * max(1, round(40 * bucket["rows"] / largest))
+        print(f"{bucket['min']:>8}-{bucket['max']:<8} {bucket['rows']:>9}  {bar}")
+
+
+def write_counts(output_dir: str, name: str, counts):
+    columns = {"row_index": pa.array(np.arange(len(counts), dtype=np.int64))}
+    for field, column in zip(COUNT_FIELDS, counts.T):
+        columns[field] = pa.array(column, mask=column < 0)
+    pq.write_table(
+        pa.table(columns), os.path.join(output_dir, f"{name}.tokens.parquet")
+    )
+
+
+def main():
+    from tqdm import tqdm
+    from libs.chat_template import load_chat_template
+
+    args = parser.parse_args()
+    manifests = {manifest["name"]: manifest for manifest in list_manifests(args.input)}
+    names = args.names or sorted(manifests)
+    missing = [name for name in names if name not in manifests]
+    if missing:
+        raise ValueError(f"No manifest in {args.input} for: {missing}")
+
+    template_source = special_tokens = None
+    if args.template:
+        template_source, special_tokens = load_chat_template(
+            args.template, args.template_name
+        )
+    # tokenizer / 템플릿 오류는 worker 를 띄우기 전에 여기서 바로 드러나게 한다.
+    init_worker(args.tokenizer, template_source, special_tokens)
+
+    cache_path = None
+    if not args.no_cache:
+        cache_key = fingerprint(args.tokenizer, template_source, special_tokens)
+        cache_path = os.path.join(args.cache_dir, f"{cache_key}.npz")
+    cache = TokenCache(cache_path)
+
+    counts = {
+        name: np.full(
+            (manifests[name]["num_rows"], len(COUNT_FIELDS)), -1, dtype=np.int32
+        )
+        for name in names
+    }
+    keys = {
+        name: np.zeros(manifests[name]["num_rows"], dtype=np.uint64) for name in names
+    }
+    errors = {name: Counter() for name in names}
+    cached = 0
+
+    with (
+        ProcessPoolExecutor(
+            max_workers=args.jobs,
+            initializer=init_worker,
+            initargs=(args.tokenizer, template_source, special_tokens),
+        ) as executor,
+        tqdm(total=sum(len(keys[name]) for name in names), desc="Counting") as progress,
+    ):
+
+        def collect(done):
+            for f in done:
+                name, results = f.result()
+                for row_index, row_counts, e in results:
+                    if e is None:
+                        counts[name][row_index] = row_counts
+                        cache.add(int(keys[name][row_index]), row_counts)
+                    else:
+                        errors[name][e] += 1
+                progress.update(len(results))
+
+        pending = set()
+        for name in names:
+            offset = 0
+            for batch in source_batches(args.input, manifests[name], args.batch_size):
+                messages = batch.column("messages").to_pylist()
+                tools = batch.column("tools").to_pylist()
+                batch_keys = np.array(
+                    [row_key(m, t) for m, t in zip(messages, tools)], dtype=np.uint64
+                )
+                end = offset + len(batch_keys)
+                keys[name][offset:end] = batch_keys
+                found, counts[name][offset:end] = cache.lookup(batch_keys)
+                cached += int(found.sum())
+                progress.update(int(found.sum()))
+
+                # 캐시에 없는 row 만 worker 로 보낸다.
+                misses = np.flatnonzero(~found).tolist()
+                for start in range(0, len(misses), args.chunk_size):
+                    chunk = [
+                        (offset + i, messages[i], tools[i])
+                        for i in misses[start : start + args.chunk_size]
+                    ]
+                    if len(pending) >= args.jobs * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    pending.add(executor.submit(count_rows, (name, chunk)))
+                offset = end
+        collect(wait(pending)[0])
+
+    cache.save()
+    if cache_path:
+        print(f"{cached} rows from cache, {len(cache)} entries in {cache_path}")
+
+    os.makedirs(args.output, exist_ok=True)
+    for name in names:
+        write_counts(args.output, name, counts[name])
+        stats = source_stats(name, counts[name], sum(errors[name].values()))
+        with open(
+            os.path.join(args.output, f"{name}.stats.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(stats, f, indent=2)
+        print_stats(stats)
+        for message, count in errors[name].most_common(5):
+            print(f"  {count:>8}  {message[:200]}")
+
+    for context_length in args.pack or []:
+        table, summary = plan_packing(
+            names, {name: counts[name][:, 0] for name in names}, context_length
+        )
+        path = write_packing_index(table, summary, args.output)
+        print(
+            f"\nPacking into {context_length} tokens: {summary['rows']} rows in "
+            f"{summary['bins']} sequences ({summary['rows_per_bin']} rows/sequence, "
+            f"{summary['efficiency']:.1%} filled), {summary['oversize_rows']} rows too long"
+        )
+        print(f"Packing index saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
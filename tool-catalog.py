@@ -0,0 +1,86 @@
+# Tool catalog over the parsed outputs (libs/tool_catalog.py).
+# Usage:
+#   python tool-catalog.py build                       # incremental, only new/changed shards are read
+#   python tool-catalog.py rows get_weather -n 20      # rows using a tool (name or hash prefix)
+#   python tool-catalog.py stats
+
+from argparse import ArgumentParser
+import json
+
+from libs.tool_catalog import CATALOG_PATH, ToolCatalog
+
+parser = ArgumentParser()
+parser.add_argument(
+    "-d", "--db", help="Catalog database path", dest="db", default=CATALOG_PATH
+)
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+build_parser = subparsers.add_parser("build", help="Index new or changed shards")
+build_parser.add_argument(
+    "-i", "--input", help="Directory with manifests", dest="input", default="./parsed"
+)
+build_parser.add_argument(
+    "-b",
+    "--batch-size",
+    help="Rows per read batch",
+    dest="batch_size",
+    type=int,
+    default=10_000,
+)
+
+rows_parser = subparsers.add_parser("rows", help="List the rows that use a tool")
+rows_parser.add_argument("key", help="Tool name or tool hash prefix")
+rows_parser.add_argument(
+    "-n", "--limit", help="Maximum rows per tool", dest="limit", type=int, default=50
+)
+rows_parser.add_argument(
+    "--show-definition",
+    help="Print the tool definition",
+    dest="show_definition",
+    action="store_true",
+)
+
+subparsers.add_parser("stats", help="Print catalog statistics")
+
+
+def main():
+    args = parser.parse_args()
+    catalog = ToolCatalog(args.db)
+
+    if args.command == "build":
+        stats = catalog.build(args.input, batch_size=args.batch_size)
+        print(
+            f"Indexed: {stats['indexed']}, Unchanged: {stats['skipped']}, "
+            f"Removed: {stats['removed']}"
+        )
+
+    elif args.command == "rows":
+        tools = catalog.find_tools(args.key)
+        if not tools:
+            print(f"No tool matches '{args.key}'")
+        for tool_id, digest, name in tools:
+            rows = catalog.rows(tool_id, limit=args.limit)
+            print(f"{name} ({digest[:12]}), showing {len(rows)} rows")
+            if args.show_definition:
+                (definition,) = catalog.conn.execute(
+                    "SELECT definition FROM tools WHERE tool_id = ?", (tool_id,)
+                ).fetchone()
+                print(json.dumps(json.loads(definition), indent=2, ensure_ascii=False))
+            for dataset, row, file, shard_row in rows:
+                print(f"  {dataset}[{row}]  ({file}:{shard_row})")
+
+    elif args.command == "stats":
+        stats = catalog.stats()
+        print(
+            f"Distinct tools: {stats['tools']} ({stats['tool_names']} names), "
+            f"Files: {stats['files']}, Rows: {stats['rows']}, Postings: {stats['postings']}"
+        )
+        print(f"{'dataset':<48} {'rows':>10} {'tools':>8}")
+        for dataset, rows, tools in stats["datasets"]:
+            print(f"{dataset:<48} {rows:>10} {tools:>8}")
+
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,16 @@
 import json, re
-from datasets import Dataset, load_dataset
-import pandas as pd
-from sympy import N
+from libs.arrow_rows import CanonicalRowBuilder
+from libs.parquet_shards import write_parquet_shards
+from libs.cli import converter_arg_parser
+from libs.profiling import StageProfiler
+from libs.arrow_batches import iter_rows
+from libs.quarantine import QuarantineSink
+from libs.watchdog import RowWatchdog
+from libs.snapshots import load_source
+from libs.exclusions import ExclusionList
+from libs.row_filters import RowFilter
+from libs.partitions import Partition
+from libs.tool_names import normalize_tool_names
 
 
 def toolace_system_parser(data):
@@ -113,6 +122,9 @@ def parse_api_list_text_to_json_list(api_list_text):
     return json_list
 
 
+INPUT_COLUMNS = ["system", "conversations"]
+
+
 def parse_function_calling_json(data):
 
     parsed = []
@@ -172,38 +184,63 @@ def parse_function_calling_json(data):
     return parsed_data
 
 
-repo = "Team-ACE/ToolACE"
-input_ds = load_dataset(repo)
+def main():
+    args = converter_arg_parser().parse_args()
+    repo = "Team-ACE/ToolACE"
+    output_name = repo.split("/")[1].lower()
+    profiler = StageProfiler(output_name, enabled=args.profile)
+    partition = Partition(output_name, args.shard)
+    row_filter = RowFilter(args.filters)
 
+    with profiler.stage("load") as stage:
+        input_ds = load_source(output_name)
+        exclusions = ExclusionList.load(output_name)
+        input_ds["train"] = partition.select(
+            row_filter.apply(exclusions.apply(input_ds["train"]))
+        )
+        stage["rows"] = len(input_ds["train"])
+        source_rows = partition.source_rows(exclusions, row_filter)
+
+    output = CanonicalRowBuilder()
+    error = QuarantineSink(output_name, partition.quarantine_dir)
+    watchdog = RowWatchdog(output_name, args.row_timeout, args.slow_rows)
+
+    with profiler.stage("parse", rows=len(input_ds["train"])):
+        for idx, data in enumerate(iter_rows(input_ds["train"], INPUT_COLUMNS)):
+            # for debugging
+            # if idx > 0:
+            #     break
+            try:
+                with watchdog.row(source_rows[idx], data):
+                    parsed = normalize_tool_names(parse_function_calling_json(data))
+                output.append(parsed)
+            except Exception as e:
+                error.add(source_rows[idx], e, data)
+    # JSON encoding done by the builder during the loop belongs to the serialize stage
+    profiler.move(
+        "parse", "serialize", output.serialize_wall_s, output.serialize_cpu_s
+    )
 
-output = []
-error = []
+    # Since each tool has different properties, tools are stored as a JSON string (see libs/arrow_rows.py).
+    with profiler.stage("serialize", rows=len(output)):
+        output_table = output.to_table()
 
-for idx, data in enumerate(input_ds["train"]):
     # for debugging
-    # if idx > 0:
-    #     break
-    try:
-        output.append(parse_function_calling_json(data))
-    except Exception as e:
-        error.append(data)
-        print(f"Idx: {idx}, Error: {e}")
+    # print(output_table.slice(0, 1).to_pylist())
 
-output_df = pd.DataFrame(output)
+    with profiler.stage("write", rows=output_table.num_rows):
+        write_parquet_shards(output_table, output_name, partition.output_dir)
 
-# Since each tool has different properties, convert to string to meet the requirements of parquet.
-output_df["tools"] = output_df["tools"].apply(lambda x: json.dumps(x))
-
-# for debugging
-# print(output_df.iloc[0].to_json(indent=2))
-
-dataset = Dataset.from_pandas(output_df)
+    print(
+        f"Total lines: {
+            len(input_ds['train'])
+        }, Success: {len(output)}, Error: {len(error)}"
+    )
+    watchdog.finish()
+    error.close()
+    partition.finish(errors=len(error))
+    profiler.finish()
 
-output_file_path = f"./parsed/{repo.split('/')[1].lower()}.parquet"
-dataset.to_parquet(output_file_path)
 
-print(
-    f"Total lines: {
-        len(input_ds['train'])
-    }, Success: {len(output)}, Error: {len(error)}"
-)
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,29 @@
 # for MadeAgents/xlam-irrelevance-7.5k dataset sanitization
 
-import os, json
-from openai import OpenAI
+import os, json, glob
+from functools import cache
 from dotenv import load_dotenv
-from datasets import Dataset, load_dataset
-import pandas as pd
-from multiprocessing import Pool, cpu_count
-from tqdm import tqdm
+from libs.arrow_rows import CanonicalRowBuilder, write_jsonl
+from libs.parquet_shards import write_parquet_shards
+from libs.cli import converter_arg_parser
+from libs.profiling import StageProfiler
+from libs.arrow_batches import iter_rows
+from libs.quarantine import QuarantineSink
+from libs.snapshots import load_source
+from libs.exclusions import ExclusionList
+from libs.row_filters import RowFilter
+from libs.partitions import Partition
+from libs.tool_names import normalize_tool_names
+from libs.request_engine import RequestEngine
+from libs.telemetry import Telemetry
+from libs.batch_files import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_REQUESTS,
+    MANIFEST_NAME,
+    BatchFileWriter,
+    BatchRequestError,
+    iter_batch_results,
+)
 import re
 
 load_dotenv()
@@ -24,16 +41,27 @@ load_dotenv()
 # model_id = "meta-llama-3.1-8b-instruct"
 
 
-client = OpenAI(
-    api_key=os.getenv("FRIENDLI_TOKEN"),
-    base_url="https://api.friendli.ai/dedicated/v1/",
-)
+@cache
+def get_client():
+    # openai는 import 비용이 커서 첫 요청 때 만들고, 모든 요청 스레드가 같이 쓴다.
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=os.getenv("FRIENDLI_TOKEN"),
+        # 로컬 테스트: python mock-llm-server.py 후 DISTILL_BASE_URL=http://127.0.0.1:8000/v1
+        base_url=os.getenv("DISTILL_BASE_URL", "https://api.friendli.ai/dedicated/v1/"),
+        # 재시도는 RequestEngine 이 한다. (429 를 보고 동시 요청 수를 줄여야 하므로)
+        max_retries=0,
+    )
+
+
 model_id = os.getenv("FRIENDLI_EID")
 
 
-def parse_function_calling_json(data):
+INPUT_COLUMNS = ["query", "tools"]
 
-    tools_list = json.loads(data["tools"])
+
+def build_messages(data):
     system_prompt = f"""Here is the list of tools available to you:
 <tools>
 {data["tools"]}
@@ -85,16 +113,33 @@ Example thought process:
 
 Remember, your goal is to be helpful, informative, and engaging in your responses, whether you're using a tool or not. Your final output should consist only of your response or tool call, and should not duplicate or rehash any of the work you did in the analysis section."""
 
-    response = client.chat.completions.create(
-        model=model_id,
-        n=1,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": data["query"]},
-        ],
-    )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": data["query"]},
+    ]
+
+
+def estimate_tokens(data):
+    # 대략 4글자당 1토큰 + 응답 예상치
+    return sum(len(message["content"]) for message in build_messages(data)) // 4 + 512
 
-    llm_resp = response.choices[0].message.content
+
+def check_tools(data):
+    if len(json.loads(data["tools"])) == 0:
+        raise ValueError("No tools available")
+
+
+def completion_body(data):
+    return {"model": model_id, "n": 1, "messages": build_messages(data)}
+
+
+def request_completion(data):
+    check_tools(data)
+    return get_client().chat.completions.create(**completion_body(data))
+
+
+def parse_completion(data, llm_resp):
+    tools_list = json.loads(data["tools"])
 
     # Extract analysis content between <analysis> tags
     analysis_match = re.search(r"<analysis>(.*?)</analysis>", llm_resp, re.DOTALL)
@@ -141,56 +186,263 @@ Remember, your goal is to be helpful, informative, and engaging in your response
     return parsed_data
 
 
+def parse_function_calling_json(data):
+    response = request_completion(data)
+    return parse_completion(data, response.choices[0].message.content)
+
+
 repo = "MadeAgents/xlam-irrelevance-7.5k"
-input_ds = load_dataset(repo)
 
+args_parser = converter_arg_parser()
+args_parser.add_argument(
+    "--mode",
+    help="live: call the endpoint, batch-write: write batch request files, "
+    "batch-ingest: parse downloaded batch result files",
+    dest="mode",
+    choices=["live", "batch-write", "batch-ingest"],
+    default="live",
+)
+args_parser.add_argument(
+    "--batch-dir",
+    help="Directory for batch request files; results are read from <batch-dir>/results "
+    "(default: ./batch/<dataset>)",
+    dest="batch_dir",
+)
+args_parser.add_argument(
+    "--batch-max-requests",
+    help="Maximum requests per batch file",
+    dest="batch_max_requests",
+    type=int,
+    default=DEFAULT_MAX_REQUESTS,
+)
+args_parser.add_argument(
+    "--batch-max-bytes",
+    help="Maximum size of a batch file in bytes",
+    dest="batch_max_bytes",
+    type=int,
+    default=DEFAULT_MAX_BYTES,
+)
+args_parser.add_argument(
+    "-c",
+    "--concurrency",
+    help="Initial number of concurrent requests (adapted at runtime)",
+    dest="concurrency",
+    type=int,
+    default=8,
+)
+args_parser.add_argument(
+    "--max-concurrency",
+    help="Upper bound of concurrent requests",
+    dest="max_concurrency",
+    type=int,
+    default=128,
+)
+args_parser.add_argument(
+    "--rpm", help="Requests per minute limit", dest="rpm", type=float
+)
+args_parser.add_argument(
+    "--tpm", help="Tokens per minute limit", dest="tpm", type=float
+)
+args_parser.add_argument(
+    "--telemetry-interval",
+    help="Seconds between telemetry snapshots in ./telemetry (0: only at the end)",
+    dest="telemetry_interval",
+    type=float,
+    default=10.0,
+)
 
-def process_item(data):
-    if len(json.loads(data["tools"])) == 0:
-        print("No tools available")
-        return {"success": False, "data": data, "error": "No tools available"}
-    try:
-        return {"success": True, "data": parse_function_calling_json(data)}
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        return {"success": False, "data": data, "error": str(e)}
 
+def write_batch_requests(
+    rows, source_rows, batch_dir, max_requests, max_bytes, metadata
+):
+    # custom_id 는 입력 데이터셋의 row 번호라서 제외 목록 / --filter / partition 과 무관하다.
+    writer = BatchFileWriter(batch_dir, max_requests, max_bytes, metadata)
+    skipped = 0
+    for idx, data in enumerate(rows):
+        try:
+            check_tools(data)
+        except ValueError:
+            # 요청을 만들지 않은 row 는 ingest 때 다시 걸러져 quarantine 으로 간다.
+            skipped += 1
+            continue
+        writer.write(str(source_rows[idx]), completion_body(data))
+    writer.close()
+    print(f"Skipped: {skipped}")
+
+
+def batch_response_content(body):
+    """
+    The assistant text of a batch response body, or a BatchRequestError if the body is
+    malformed or has no text (e.g. a refusal or a tool call reply).
+    """
+    try:
+        content = body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return BatchRequestError(
+            f"Malformed batch response body: {json.dumps(body, ensure_ascii=False)[:200]}"
+        )
+    if not content:
+        return BatchRequestError("Batch response has no message content")
+    return content
+
+
+def read_batch_results(rows, source_rows, batch_dir, num_rows):
+    """
+    Yields (idx, data, llm_resp, error) in input order from the result files in
+    <batch_dir>/results. Results are matched by input row (custom_id); a result for a row
+    that is not part of this run means the rows changed since batch-write.
+    """
+    manifest_file = os.path.join(batch_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_file):
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("rows") != num_rows:
+            raise ValueError(
+                f"Batch requests were written for {manifest.get('rows')} rows, "
+                f"but the dataset has {num_rows}"
+            )
+
+    paths = sorted(glob.glob(os.path.join(batch_dir, "results", "*.jsonl")))
+    if not paths:
+        raise FileNotFoundError(f"No batch result files in {batch_dir}/results")
+
+    # 결과 파일은 순서가 보장되지 않으므로 custom_id 로 응답 본문(텍스트)만 모아 둔다.
+    results = {}
+    for custom_id, body, e in iter_batch_results(paths):
+        results[custom_id] = e if e else batch_response_content(body)
+
+    unknown = sorted(set(results) - {str(row) for row in source_rows})
+    if unknown:
+        raise ValueError(
+            f"{len(unknown)} batch results are for input rows that are not in this run "
+            f"(e.g. custom_id {unknown[0]!r}); the exclusion list, --filter or --shard "
+            f"changed since the requests were written"
+        )
 
-num_processes = cpu_count()
-with Pool(processes=num_processes) as pool:
-    results = list(
-        tqdm(pool.imap(process_item, input_ds["train"]), total=len(input_ds["train"]))
+    for idx, data in enumerate(rows):
+        result = results.get(str(source_rows[idx]))
+        if result is None:
+            try:
+                check_tools(data)
+                result = BatchRequestError("No batch result for this row")
+            except ValueError as e:
+                result = e
+        if isinstance(result, Exception):
+            yield idx, data, None, result
+        else:
+            yield idx, data, result, None
+
+
+def main():
+    args = args_parser.parse_args()
+    from tqdm import tqdm
+
+    output_name = repo.split("/")[1]
+    profiler = StageProfiler(output_name, enabled=args.profile)
+    partition = Partition(output_name, args.shard)
+    row_filter = RowFilter(args.filters)
+
+    with profiler.stage("load") as stage:
+        input_ds = load_source(output_name)
+        exclusions = ExclusionList.load(output_name)
+        input_ds["train"] = partition.select(
+            row_filter.apply(exclusions.apply(input_ds["train"]))
+        )
+        stage["rows"] = len(input_ds["train"])
+        source_rows = partition.source_rows(exclusions, row_filter)
+
+    # partition 실행에서는 batch 파일도 partition 별로 둔다. (custom_id 는 입력 row 번호)
+    batch_dir = args.batch_dir or (
+        os.path.join(partition.output_dir, "batch")
+        if partition.sharded
+        else f"./batch/{output_name}"
     )
+    rows = iter_rows(input_ds["train"], INPUT_COLUMNS)
+    if args.mode == "batch-write":
+        with profiler.stage("write", rows=len(input_ds["train"])):
+            write_batch_requests(
+                rows,
+                source_rows,
+                batch_dir,
+                args.batch_max_requests,
+                args.batch_max_bytes,
+                {
+                    "name": output_name,
+                    "model": model_id,
+                    "rows": len(input_ds["train"]),
+                },
+            )
+        profiler.finish()
+        return
 
-output = []
-error = []
+    output = CanonicalRowBuilder()
+    error = QuarantineSink(output_name, partition.quarantine_dir)
+    parsed = [None] * len(input_ds["train"])
 
-for idx, result in enumerate(results):
-    if result["success"]:
-        output.append(result["data"])
+    if args.mode == "batch-ingest":
+        results = read_batch_results(
+            rows, source_rows, batch_dir, len(input_ds["train"])
+        )
     else:
-        error.append(result["data"])
-        print(f"Idx: {idx}, Error: {result['error']}")
-
-output_df = pd.DataFrame(output)
-
-print(output_df.head())
-
-output_df["tools"] = output_df["tools"].apply(lambda x: json.dumps(x))
-
-dataset = Dataset.from_pandas(output_df)
-error_df = pd.DataFrame(error)
-
-output_file_path = f"./parsed/{repo.split('/')[1]}.parquet"
-output_file_path_jsonl = f"./parsed/{repo.split('/')[1]}.jsonl"
-dataset.to_parquet(output_file_path)
-dataset.to_json(output_file_path_jsonl)
-
-error_file_path = f"./parsed/{repo.split('/')[1]}-error.parquet"
-error_file_path_jsonl = f"./parsed/{repo.split('/')[1]}-error.jsonl"
-error_df.to_parquet(error_file_path)
-error_df.to_json(error_file_path_jsonl, orient="records", lines=True)
+        # client 를 먼저 만들어 두어 첫 요청들의 지연 시간에 openai import 가 섞이지 않게 한다.
+        get_client()
+        telemetry = Telemetry(output_name, interval=args.telemetry_interval).start()
+        engine = RequestEngine(
+            request_completion,
+            concurrency=args.concurrency,
+            max_concurrency=args.max_concurrency,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            estimate_tokens=estimate_tokens,
+            usage=lambda response: (
+                (response.usage.prompt_tokens, response.usage.completion_tokens)
+                if response.usage
+                else None
+            ),
+            telemetry=telemetry,
+        )
+        results = (
+            (idx, data, None if e else response.choices[0].message.content, e)
+            for idx, data, response, e in engine.run(rows)
+        )
 
-print(f"Total lines: {len(input_ds['train'])}")
-print(f"Success: {len(output)}")
-print(f"Error: {len(error)}")
+    # live 모드는 요청이 엔진의 스레드에서 돌고, 응답 후처리는 도착 순서대로 여기서 한다.
+    with profiler.stage("parse", rows=len(input_ds["train"])):
+        for idx, data, llm_resp, e in tqdm(results, total=len(input_ds["train"])):
+            if e is None:
+                try:
+                    parsed[idx] = normalize_tool_names(parse_completion(data, llm_resp))
+                    continue
+                except Exception as parse_error:
+                    e = parse_error
+            error.add(source_rows[idx], e, data)
+    if args.mode == "live":
+        telemetry.close()
+        engine.print_summary()
+
+    # 출력은 입력 순서를 유지한다.
+    with profiler.stage("serialize") as stage:
+        for row in parsed:
+            if row is not None:
+                output.append(row)
+
+        output_table = output.to_table()
+        stage["rows"] = output_table.num_rows
+
+    print(output_table.slice(0, 5).to_pandas())
+
+    with profiler.stage("write", rows=output_table.num_rows):
+        output_file_path_jsonl = partition.jsonl_path()
+        write_parquet_shards(output_table, output_name, partition.output_dir)
+        write_jsonl(output_table, output_file_path_jsonl)
+
+    print(f"Total lines: {len(input_ds['train'])}")
+    print(f"Success: {len(output)}")
+    print(f"Error: {len(error)}")
+    error.close()
+    partition.finish(errors=len(error))
+    profiler.finish()
+
+
+if __name__ == "__main__":
+    main()
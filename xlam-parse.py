@@ -1,7 +1,21 @@
 import json
-from datasets import Dataset, load_dataset
-import pandas as pd
 from libs.xlam_tool_definition_uitls import type2_tool_definition_conv
+from libs.arrow_rows import CanonicalRowBuilder
+from libs.parquet_shards import write_parquet_shards
+from libs.cli import converter_arg_parser
+from libs.profiling import StageProfiler
+from libs.arrow_batches import iter_rows
+from libs.quarantine import QuarantineSink
+from libs.watchdog import RowWatchdog
+from libs.snapshots import load_source
+from libs.exclusions import ExclusionList
+from libs.row_filters import RowFilter
+from libs.partitions import Partition
+from libs.tool_names import normalize_tool_names
+
+
+# parse_function_calling_json 이 읽는 컬럼 (이 컬럼만 decode)
+INPUT_COLUMNS = ["id", "query", "tools", "answers"]
 
 
 def parse_function_calling_json(data):
@@ -55,38 +69,63 @@ def parse_function_calling_json(data):
     return parsed_data
 
 
-repo = "Salesforce/xlam-function-calling-60k"
-input_ds = load_dataset(repo)
-
+def main():
+    args = converter_arg_parser().parse_args()
+    repo = "Salesforce/xlam-function-calling-60k"
+    output_name = repo.split("/")[1]
+    profiler = StageProfiler(output_name, enabled=args.profile)
+    partition = Partition(output_name, args.shard)
+    row_filter = RowFilter(args.filters)
 
-output = []
-error = []
+    with profiler.stage("load") as stage:
+        input_ds = load_source(output_name)
+        exclusions = ExclusionList.load(output_name)
+        input_ds["train"] = partition.select(
+            row_filter.apply(exclusions.apply(input_ds["train"]))
+        )
+        stage["rows"] = len(input_ds["train"])
+        source_rows = partition.source_rows(exclusions, row_filter)
+
+    output = CanonicalRowBuilder()
+    error = QuarantineSink(output_name, partition.quarantine_dir)
+    watchdog = RowWatchdog(output_name, args.row_timeout, args.slow_rows)
+
+    with profiler.stage("parse", rows=len(input_ds["train"])):
+        for idx, data in enumerate(iter_rows(input_ds["train"], INPUT_COLUMNS)):
+            # for debugging
+            # if idx > 0:
+            #     break
+            try:
+                with watchdog.row(source_rows[idx], data):
+                    parsed = normalize_tool_names(parse_function_calling_json(data))
+                output.append(parsed)
+            except Exception as e:
+                error.add(source_rows[idx], e, data)
+    # JSON encoding done by the builder during the loop belongs to the serialize stage
+    profiler.move(
+        "parse", "serialize", output.serialize_wall_s, output.serialize_cpu_s
+    )
+
+    # Since each tool has different properties, tools are stored as a JSON string (see libs/arrow_rows.py).
+    with profiler.stage("serialize", rows=len(output)):
+        output_table = output.to_table()
 
-for idx, data in enumerate(input_ds["train"]):
     # for debugging
-    # if idx > 0:
-    #     break
-    try:
-        output.append(parse_function_calling_json(data))
-    except Exception as e:
-        error.append(data)
-        print(f"Idx: {idx}, Error: {e}")
-
-output_df = pd.DataFrame(output)
-
-# Since each tool has different properties, convert to string to meet the requirements of parquet.
-output_df["tools"] = output_df["tools"].apply(lambda x: json.dumps(x))
+    # print(output_table.slice(0, 1).to_pylist())
 
-# for debugging
-# print(output_df.iloc[0].to_json(indent=2))
+    with profiler.stage("write", rows=output_table.num_rows):
+        write_parquet_shards(output_table, output_name, partition.output_dir)
 
-dataset = Dataset.from_pandas(output_df)
+    print(
+        f"Total lines: {
+            len(input_ds['train'])
+        }, Success: {len(output)}, Error: {len(error)}"
+    )
+    watchdog.finish()
+    error.close()
+    partition.finish(errors=len(error))
+    profiler.finish()
 
-output_file_path = f"./parsed/{repo.split('/')[1]}.parquet"
-dataset.to_parquet(output_file_path)
 
-print(
-    f"Total lines: {
-        len(input_ds['train'])
-    }, Success: {len(output)}, Error: {len(error)}"
-)
+if __name__ == "__main__":
+    main()